@@ -0,0 +1,69 @@
+"""
+Benchmark dos backends de armazenamento: grava N tickets, marca-os como usados
+e mede busca por ID e consulta de usados no JsonBackend (arquivos) e no SqliteBackend.
+
+Uso (na pasta src):
+    python -m benchmarks.bench_backends [quantidade]
+"""
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from src.backends import JsonBackend, SqliteBackend
+from src.service import initialize_state
+from src.used_tickets import UsedTicketStore
+
+def medir(backend, tickets):
+    t0 = time.perf_counter()
+    if hasattr(backend, "save_tickets"):
+        backend.save_tickets(tickets)
+    else:
+        for t in tickets:
+            backend.save_ticket(t)
+    escrita = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for t in tickets[::10]:
+        backend.get_ticket(t["id"])
+    busca = (time.perf_counter() - t0) / len(tickets[::10])
+
+    t0 = time.perf_counter()
+    for t in tickets:
+        backend.mark_used(t["id"])
+    uso = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for t in tickets[::10]:
+        backend.is_used(t["id"])
+    consulta = (time.perf_counter() - t0) / len(tickets[::10])
+
+    t0 = time.perf_counter()
+    backend.save_state(initialize_state())
+    backend.load_state()
+    estado = time.perf_counter() - t0
+    return escrita, busca, uso, consulta, estado
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    tickets = [
+        {"id": uuid.uuid4().hex, "sala": i % 5 + 1, "filme": f"Filme {i % 5}",
+         "emissao": "2099-01-01T00:00:00+00:00", "assinatura": "00" * 256}
+        for i in range(n)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        backends = {
+            "json": JsonBackend("benchmark", tmp / "state.enc", tmp / "tickets", UsedTicketStore(tmp / "used")),
+            "sqlite": SqliteBackend.abrir("benchmark", tmp / "bench.db"),
+        }
+        print(f"{n} tickets")
+        print(f"{'backend':<8} {'grava (s)':>10} {'busca (µs)':>11} {'usa (s)':>9} {'consulta (µs)':>14} {'estado (s)':>11}")
+        for nome, b in backends.items():
+            escrita, busca, uso, consulta, estado = medir(b, tickets)
+            print(f"{nome:<8} {escrita:>10.2f} {busca * 1e6:>11.1f} {uso:>9.2f} {consulta * 1e6:>14.1f} {estado:>11.2f}")
+            b.close()
+
+if __name__ == "__main__":
+    main()
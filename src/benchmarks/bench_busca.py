@@ -0,0 +1,46 @@
+"""
+Benchmark do índice de busca: indexa N filmes e mede consultas
+(termo exato, prefixo, sem acento e com erro de digitação).
+
+Uso (na pasta src):
+    python -m benchmarks.bench_busca [quantidade]
+"""
+import random
+import sys
+import time
+
+from src.busca import IndiceBusca
+from src.models import Sala, Filme
+
+PALAVRAS = ["Ação", "Coração", "Missão", "Noite", "Estrela", "Sombra", "Cidade", "Guerra", "Amor", "Fúria",
+            "Vingança", "Família", "Herói", "Último", "Segredo", "Caçada", "Viagem", "Lenda", "Destino", "Mistério"]
+GENEROS = ["Ação", "Comédia", "Drama", "Ficção", "Terror", "Animação", "Romance", "Suspense"]
+CONSULTAS = ["acao", "cora", "missao noite", "vinganca familia", "misterio", "estrla", "heroi ultimo"]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rnd = random.Random(1)
+    salas = []
+    for i in range(n):
+        nome = " ".join(rnd.sample(PALAVRAS, 3)) + f" {i}"
+        salas.append(Sala(numero=i + 1, filme=Filme(nome, rnd.choice(GENEROS), 12, 50, "2099-12-31")))
+
+    t0 = time.perf_counter()
+    indice = IndiceBusca.from_state(salas)
+    print(f"{n} filmes indexados em {time.perf_counter() - t0:.2f}s")
+
+    for consulta in CONSULTAS:
+        t0 = time.perf_counter()
+        for _ in range(10):
+            resultado = indice.buscar(consulta)
+        ms = (time.perf_counter() - t0) / 10 * 1000
+        print(f"{consulta!r:<22} {ms:8.2f} ms  top: {resultado[0][0].filme.nome if resultado else '-'}")
+
+    t0 = time.perf_counter()
+    for sala in salas[:1000]:
+        indice.remover(sala.numero)
+        indice.adicionar(sala)
+    print(f"Atualização incremental: {(time.perf_counter() - t0):.3f} ms/filme")
+
+if __name__ == "__main__":
+    main()
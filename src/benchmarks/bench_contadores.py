@@ -0,0 +1,42 @@
+"""
+Benchmark do custo de tornar uma venda durável: contador mapeado em memória
+(data/contadores.bin) x regravar o state.enc inteiro.
+
+Uso (na pasta src):
+    python -m benchmarks.bench_contadores [vendas]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.contadores import ContadoresInventario
+from src.models import Sala, Filme
+from src.storage import encrypt_state
+from src.utils import salas_to_dict_state
+
+def main():
+    vendas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    state = [Sala(numero=i + 1, filme=Filme(f"Filme {i}", "Ação", 12, 50, "2099-12-31")) for i in range(20)]
+    with tempfile.TemporaryDirectory() as tmp:
+        contadores = ContadoresInventario.abrir(Path(tmp) / "contadores.bin")
+        contadores.aplicar(state)
+        t0 = time.perf_counter()
+        for i in range(vendas):
+            sala = state[i % len(state)]
+            sala.filme.ingressos = (sala.filme.ingressos - 1) % 50
+            contadores.gravar(sala)
+        contadores.sincronizar()
+        us = (time.perf_counter() - t0) / vendas * 1e6
+        print(f"Contador mapeado: {us:8.2f} µs/venda ({vendas} vendas, fsync em lotes)")
+        contadores.fechar()
+
+        n = 20
+        t0 = time.perf_counter()
+        for _ in range(n):
+            encrypt_state(salas_to_dict_state(state), "senha", Path(tmp) / "state.enc")
+        ms = (time.perf_counter() - t0) / n * 1000
+        print(f"Regravar state.enc: {ms:8.2f} ms/venda")
+
+if __name__ == "__main__":
+    main()
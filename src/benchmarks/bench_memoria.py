@@ -0,0 +1,115 @@
+"""
+Benchmark de memória do catálogo: modelos antigos (dataclass com __dict__ + asdict)
+x modelos atuais (slots + strings internadas) x CatalogoColunar.
+
+Uso (na pasta src):
+    python -m benchmarks.bench_memoria [quantidade]
+"""
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from typing import Optional
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from src.models import Filme, Sala
+from src.catalogo_colunar import CatalogoColunar
+
+# Cópia dos modelos como eram antes (referência para comparação)
+@dataclass
+class FilmeAntigo:
+    nome: str
+    genero: str
+    idade_minima: int
+    ingressos: int
+    data_saida: str
+
+    def to_dict(self):
+        return asdict(self)
+
+@dataclass
+class SalaAntiga:
+    numero: int
+    filme: Optional[FilmeAntigo] = None
+
+    def to_dict(self):
+        return {"numero": self.numero, "filme": self.filme.to_dict() if self.filme else None}
+
+GENEROS = ["Ação", "Comédia", "Drama", "Terror", "Animação", "Ficção científica", "Romance", "Documentário"]
+
+def gerar_linhas(n: int, seed: int = 42):
+    """Registros como chegariam do disco (JSON), cada string decodificada separadamente."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        yield json.dumps({
+            "numero": i + 1,
+            "filme": {
+                "nome": f"Filme {i}",
+                "genero": rnd.choice(GENEROS),
+                "idade_minima": rnd.choice([0, 10, 12, 14, 16, 18]),
+                "ingressos": 50,
+                "data_saida": f"2099-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            },
+        }, ensure_ascii=False)
+
+def medir(nome, linhas, construir):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = construir(linhas)
+    dt = time.perf_counter() - t0
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return nome, atual, dt, obj
+
+def construir_antigo(linhas):
+    out = []
+    for linha in linhas:
+        d = json.loads(linha)
+        out.append(SalaAntiga(d["numero"], FilmeAntigo(**d["filme"])))
+    return out
+
+def construir_atual(linhas):
+    out = []
+    for linha in linhas:
+        d = json.loads(linha)
+        out.append(Sala(d["numero"], Filme.from_dict(d["filme"])))
+    return out
+
+def construir_colunar(linhas):
+    cat = CatalogoColunar()
+    for linha in linhas:
+        d = json.loads(linha)
+        cat.append(d["numero"], Filme.from_dict(d["filme"]))
+    return cat
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    linhas = list(gerar_linhas(n))
+
+    resultados = [
+        medir("dataclass antiga", linhas, construir_antigo),
+        medir("slots + intern", linhas, construir_atual),
+        medir("colunar (array)", linhas, construir_colunar),
+    ]
+    base = resultados[0][1]
+    print(f"{n} registros")
+    print(f"{'representação':<20}{'memória (MiB)':>15}{'bytes/registro':>16}{'economia':>10}{'carga (s)':>11}")
+    for nome, mem, dt, _ in resultados:
+        print(f"{nome:<20}{mem / 2**20:>15.1f}{mem / n:>16.0f}{1 - mem / base:>10.0%}{dt:>11.2f}")
+
+    # to_dict: asdict (deepcopy) x dicionário raso
+    antigos, atuais = resultados[0][3], resultados[1][3]
+    t0 = time.perf_counter()
+    for s in antigos:
+        s.to_dict()
+    t_antigo = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for s in atuais:
+        s.to_dict()
+    t_atual = time.perf_counter() - t0
+    print(f"\nto_dict em {n} salas: antigo {t_antigo:.2f}s | atual {t_atual:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark do log de eventos: grava N eventos já salvos no state.enc e uma cauda
+de uma sessão que caiu sem salvar; mede o replay completo e a recuperação
+(inicialização normal), que só decifra a cauda a partir da marca pendente.
+
+Uso (na pasta src):
+    python -m benchmarks.bench_replay [quantidade] [cauda]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.event_log import EventLog, aplicar_evento
+from src.service import initialize_state, build_filme
+
+def _gravar(log, inicio, n, n_salas):
+    for i in range(inicio, inicio + n):
+        sala = i % n_salas + 1
+        if i % 1000 < n_salas:
+            filme = build_filme(f"Filme {i}", "Ação", 12, "2099-12-31")
+            log.append("filme_adicionado", {"sala": sala, "filme": filme.to_dict()})
+        else:
+            log.append("ticket_emitido", {"sala": sala, "ticket_id": f"{i:032x}",
+                                          "filme": f"Filme {i - i % 1000 + sala - 1}", "delta": -1})
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cauda = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    n_salas = len(initialize_state())
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        salva = EventLog.abrir("benchmark", Path(tmp), fsync=False)
+        salva.iniciar_sessao()
+        _gravar(salva, 0, n, n_salas)
+        salva.marcar_salvo(1)
+        salva.encerrar_sessao()
+        t_escrita = time.perf_counter() - t0
+
+        caiu = EventLog.abrir("benchmark", Path(tmp), fsync=False)
+        caiu.iniciar_sessao()
+        _gravar(caiu, n, cauda, n_salas)
+        caiu.encerrar_sessao()
+        tamanho = caiu.path.stat().st_size
+
+        t0 = time.perf_counter()
+        salas = {s.numero: s for s in initialize_state()}
+        for ev in caiu.ler():
+            aplicar_evento(salas, ev)
+        t_completo = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        reaberto = EventLog.abrir("benchmark", Path(tmp))
+        aplicados = reaberto.recuperar(initialize_state())
+        reaberto.encerrar_sessao()
+        t_cauda = time.perf_counter() - t0
+
+    total = n + cauda + 1
+    print(f"{total} eventos | log {tamanho / 2**20:.1f} MiB")
+    print(f"escrita (sem fsync):        {t_escrita:8.2f}s  ({n / t_escrita:,.0f} ev/s)")
+    print(f"replay completo:            {t_completo:8.2f}s  ({total / t_completo:,.0f} ev/s)")
+    print(f"recuperação ({aplicados} ev):    {t_cauda:8.2f}s  (inclui PBKDF2 da abertura)")
+
+if __name__ == "__main__":
+    main()
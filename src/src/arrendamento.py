@@ -0,0 +1,268 @@
+# src/arrendamento.py
+"""
+Arrendamento de inventário: vários pontos de venda (processos ou máquinas com o
+diretório data/ compartilhado) vendendo a mesma sala sem se coordenar a cada venda.
+
+O coordenador é um arquivo por sala (data/inventario/sala_<n>.json), alterado
+sob flock. Ele guarda a capacidade do filme e quanto ainda está livre. Um ponto
+de venda arrenda um bloco de ingressos (`arrendar`), vende dele só em memória e
+devolve a sobra (`devolver`) ao esgotar o bloco, ao vencer o prazo ou ao sair.
+
+Garantia: capacidade = livres + arrendados + vencidos + vendidos, sempre. Um
+bloco só é usado antes de `expira_em`; o coordenador só o considera vencido após
+`expira_em + MARGEM`, e um bloco vencido conta como vendido por inteiro até o
+dono devolvê-lo com a contagem real. Assim a soma dos ingressos emitidos nunca
+passa da capacidade, mesmo com ponto de venda travado ou sem devolver.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import eventos
+from .locks import file_lock
+from .models import Sala, Filme
+
+INVENTARIO_DIR = Path(__file__).resolve().parent.parent / "data" / "inventario"
+
+# Ingressos por bloco e validade do bloco (segundos)
+BLOCO_PADRAO = 10
+TTL_PADRAO = 5 * 60
+# Folga entre o fim do uso pelo ponto de venda e o vencimento no coordenador
+MARGEM = 30
+# Blocos vencidos aceitam devolução tardia por este tempo; depois a sobra é perdida
+RETENCAO_VENCIDOS = 24 * 60 * 60
+
+def identidade_filme(filme: Filme) -> str:
+    return f"{filme.nome}|{filme.data_saida}"
+
+
+class CoordenadorInventario:
+    def __init__(self, base_dir: Path = None, margem: float = MARGEM):
+        self.base_dir = Path(base_dir or INVENTARIO_DIR)
+        self.margem = margem
+
+    def _path(self, sala: int) -> Path:
+        return self.base_dir / f"sala_{sala}.json"
+
+    def _ler(self, sala: int) -> Optional[dict]:
+        path = self._path(sala)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _gravar(self, sala: int, livro: dict):
+        path = self._path(sala)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(livro, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _vencer(self, livro: dict, agora: float):
+        for aid, a in list(livro["arrendamentos"].items()):
+            if a["expira_em"] + self.margem <= agora:
+                # Sem a contagem do dono, o bloco inteiro conta como vendido
+                livro["vencidos"][aid] = dict(a, vencido_em=agora)
+                del livro["arrendamentos"][aid]
+        for aid, a in list(livro["vencidos"].items()):
+            if a["vencido_em"] + RETENCAO_VENCIDOS <= agora:
+                livro["vendidos"] += a["quantidade"]
+                del livro["vencidos"][aid]
+
+    def arrendar(self, sala: Sala, quantidade: int = BLOCO_PADRAO, ttl: float = TTL_PADRAO,
+                 dono: str = "", agora: Optional[float] = None) -> dict:
+        """
+        Arrenda até `quantidade` ingressos da sala (menos se sobrou menos).
+        Na primeira vez para o filme, a capacidade é o saldo atual de `sala.filme`.
+        ValueError se não há ingressos livres.
+        """
+        if sala.esta_vazia():
+            raise ValueError("Sala vazia ou inexistente.")
+        if quantidade <= 0:
+            raise ValueError("Quantidade inválida.")
+        agora = time.time() if agora is None else agora
+        filme = identidade_filme(sala.filme)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.base_dir / f"sala_{sala.numero}.lock"):
+            livro = self._ler(sala.numero)
+            if livro is None or livro["filme"] != filme:
+                # Filme novo na sala: blocos do anterior não valem mais
+                livro = {
+                    "filme": filme, "capacidade": sala.filme.ingressos, "livres": sala.filme.ingressos,
+                    "vendidos": 0, "arrendamentos": {}, "vencidos": {},
+                }
+            self._vencer(livro, agora)
+            concedidos = min(quantidade, livro["livres"])
+            if concedidos <= 0:
+                self._gravar(sala.numero, livro)
+                raise ValueError("Ingressos esgotados.")
+            aid = uuid.uuid4().hex
+            arrendamento = {"quantidade": concedidos, "expira_em": agora + ttl, "dono": dono}
+            livro["livres"] -= concedidos
+            livro["arrendamentos"][aid] = arrendamento
+            self._gravar(sala.numero, livro)
+        return dict(arrendamento, id=aid, sala=sala.numero, filme=filme)
+
+    def devolver(self, arrendamento: dict, usados: int) -> int:
+        """Encerra o bloco informando quantos foram vendidos; retorna quantos voltaram a ficar livres."""
+        if not 0 <= usados <= arrendamento["quantidade"]:
+            raise ValueError("Quantidade vendida inválida para o bloco.")
+        sala = arrendamento["sala"]
+        with file_lock(self.base_dir / f"sala_{sala}.lock"):
+            livro = self._ler(sala)
+            if livro is None or livro["filme"] != arrendamento["filme"]:
+                return 0
+            a = livro["arrendamentos"].pop(arrendamento["id"], None) or livro["vencidos"].pop(arrendamento["id"], None)
+            if a is None:
+                return 0
+            sobra = a["quantidade"] - usados
+            livro["livres"] += sobra
+            livro["vendidos"] += usados
+            self._gravar(sala, livro)
+        return sobra
+
+    def estornar(self, sala: Sala, quantidade: int) -> int:
+        """
+        Ingressos vendidos de um bloco já encerrado que voltaram (cancelamento,
+        reserva vencida): passam de vendidos para livres. Retorna quantos voltaram.
+        """
+        if sala.esta_vazia() or quantidade <= 0:
+            return 0
+        with file_lock(self.base_dir / f"sala_{sala.numero}.lock"):
+            livro = self._ler(sala.numero)
+            if livro is None or livro["filme"] != identidade_filme(sala.filme):
+                return 0
+            # Venda ainda num bloco aberto (de outro ponto de venda) não está em vendidos
+            devolvidos = min(quantidade, livro["vendidos"])
+            if devolvidos:
+                livro["vendidos"] -= devolvidos
+                livro["livres"] += devolvidos
+                self._gravar(sala.numero, livro)
+        return devolvidos
+
+    def situacao(self, sala: int, agora: Optional[float] = None) -> Optional[dict]:
+        """Resumo do livro da sala: capacidade, livres, arrendados, vencidos e vendidos."""
+        with file_lock(self.base_dir / f"sala_{sala}.lock", shared=True):
+            livro = self._ler(sala)
+        if livro is None:
+            return None
+        self._vencer(livro, time.time() if agora is None else agora)
+        return {
+            "filme": livro["filme"],
+            "capacidade": livro["capacidade"],
+            "livres": livro["livres"],
+            "arrendados": sum(a["quantidade"] for a in livro["arrendamentos"].values()),
+            "vencidos": sum(a["quantidade"] for a in livro["vencidos"].values()),
+            "vendidos": livro["vendidos"],
+        }
+
+
+class PontoDeVenda:
+    """
+    Lado do ponto de venda: um bloco por sala, consumido sem acessar o coordenador.
+    Chame `consumir` antes de emitir (issue_ticket/criar_reserva) e `estornar` com o
+    arrendamento devolvido por ele se a emissão falhar ou a reserva for desfeita.
+    `vincular` guarda de qual bloco saiu cada ticket/reserva; o `ouvinte` usa isso
+    para devolver ao inventário os tickets cancelados.
+    """
+
+    def __init__(self, coordenador: Optional[CoordenadorInventario] = None,
+                 bloco: int = BLOCO_PADRAO, ttl: float = TTL_PADRAO, dono: str = ""):
+        self.coordenador = coordenador or CoordenadorInventario()
+        self.bloco = bloco
+        self.ttl = ttl
+        self.dono = dono or f"{socket.gethostname()}:{os.getpid()}"
+        self._blocos: Dict[int, dict] = {}
+        # ID do ticket/reserva -> arrendamento de onde saiu (só blocos ainda abertos)
+        self._origens: Dict[str, str] = {}
+        self._mutex = threading.Lock()
+
+    def _encerrar(self, numero: int) -> int:
+        bloco = self._blocos.pop(numero, None)
+        if bloco is None:
+            return 0
+        # Daqui em diante o estorno desses ingressos vai direto ao coordenador
+        for chave in [c for c, aid in self._origens.items() if aid == bloco["id"]]:
+            del self._origens[chave]
+        return self.coordenador.devolver(bloco, bloco["usados"])
+
+    def consumir(self, sala: Sala, quantidade: int = 1, agora: Optional[float] = None) -> str:
+        """
+        Desconta do bloco local; arrenda outro bloco quando este não basta. ValueError se esgotado.
+        Retorna o ID do arrendamento de onde os ingressos saíram (para `estornar`/`vincular`).
+        """
+        if sala.esta_vazia():
+            raise ValueError("Sala vazia ou inexistente.")
+        agora = time.time() if agora is None else agora
+        with self._mutex:
+            bloco = self._blocos.get(sala.numero)
+            if bloco is not None and (
+                bloco["filme"] != identidade_filme(sala.filme)
+                or bloco["expira_em"] <= agora
+                or bloco["quantidade"] - bloco["usados"] < quantidade
+            ):
+                self._encerrar(sala.numero)
+                bloco = None
+            if bloco is None:
+                bloco = self.coordenador.arrendar(sala, max(self.bloco, quantidade), self.ttl, self.dono, agora)
+                bloco["usados"] = 0
+                if bloco["quantidade"] < quantidade:
+                    self.coordenador.devolver(bloco, 0)
+                    raise ValueError("Ingressos insuficientes.")
+                self._blocos[sala.numero] = bloco
+            bloco["usados"] += quantidade
+            return bloco["id"]
+
+    def vincular(self, chave: str, arrendamento: Optional[str]):
+        """Registra que o ticket/reserva `chave` saiu do `arrendamento`."""
+        with self._mutex:
+            if arrendamento is not None and any(b["id"] == arrendamento for b in self._blocos.values()):
+                self._origens[chave] = arrendamento
+
+    def origem(self, chave: str) -> Optional[str]:
+        """Arrendamento do ticket/reserva `chave` (e esquece o vínculo); None se o bloco já foi encerrado."""
+        with self._mutex:
+            return self._origens.pop(chave, None)
+
+    def estornar(self, sala: Sala, quantidade: int = 1, arrendamento: Optional[str] = None) -> int:
+        """
+        Devolve ingressos consumidos e não emitidos (ou cancelados) ao bloco de onde
+        saíram. Se esse bloco já foi encerrado (ou é desconhecido), eles voltam
+        direto ao coordenador; o bloco atual nunca é creditado por vendas de outro.
+        """
+        with self._mutex:
+            bloco = self._blocos.get(sala.numero)
+            if bloco is not None and arrendamento is not None and bloco["id"] == arrendamento:
+                # Mesmo vencido: o dono ainda vai informar a contagem real ao devolver
+                estornados = min(quantidade, bloco["usados"])
+                bloco["usados"] -= estornados
+                return estornados
+        return self.coordenador.estornar(sala, quantidade)
+
+    def ouvinte(self, tipo: str, dados: dict):
+        """Para `eventos.registrar_ouvinte`: ticket cancelado e reembolsado volta ao inventário."""
+        if tipo == eventos.TICKET_REVOGADO and isinstance(dados.get("sala"), Sala):
+            self.estornar(dados["sala"], 1, self.origem(dados["ticket_id"]))
+
+    def devolver_vencidos(self, agora: Optional[float] = None) -> int:
+        """Encerra os blocos com prazo vencido; retorna quantos ingressos voltaram ao coordenador."""
+        agora = time.time() if agora is None else agora
+        with self._mutex:
+            return sum(self._encerrar(n) for n, b in list(self._blocos.items()) if b["expira_em"] <= agora)
+
+    def devolver_todos(self) -> int:
+        with self._mutex:
+            return sum(self._encerrar(n) for n in list(self._blocos))
+
+    def disponiveis(self) -> List[dict]:
+        """Blocos em uso: sala, restantes e validade."""
+        return [
+            {"sala": n, "restantes": b["quantidade"] - b["usados"], "expira_em": b["expira_em"]}
+            for n, b in sorted(self._blocos.items())
+        ]
@@ -1,6 +1,19 @@
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 import os, base64
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .crypto_keys import carregar_chave_privada, definir_chave_sessao
+from .locks import file_lock
+
 
 def gerar_salt(n=16):
     return os.urandom(n)
@@ -26,3 +39,147 @@ def verify_password(password: str, salt: bytes, expected: bytes, iterations: int
         return True
     except Exception:
         return False
+
+
+# Contas de operador
+OPERADORES_FILE = Path(__file__).resolve().parent.parent / "data" / "operadores.json"
+
+# Custo do login: iterações do PBKDF2 calibradas para ~ALVO_LOGIN_S nesta máquina,
+# nunca abaixo do padrão histórico do projeto
+ALVO_LOGIN_S = 0.25
+MIN_ITERACOES = 200000
+
+# Permissões por papel. Listar e filtrar salas não exigem permissão.
+PAPEIS = {
+    "admin": {"catalogo", "emitir", "verificar", "cancelar", "salvar", "resetar", "operadores"},
+    "bilheteiro": {"emitir", "verificar", "cancelar", "salvar"},
+    "porteiro": {"verificar"},
+}
+
+def calibrar_iteracoes(alvo_s: float = ALVO_LOGIN_S, amostra: int = 20000) -> int:
+    """Mede o PBKDF2 com `amostra` iterações e extrapola para o tempo-alvo (múltiplo de 1000)."""
+    t0 = time.perf_counter()
+    hash_password("calibragem", b"\0" * 16, amostra)
+    por_iteracao = (time.perf_counter() - t0) / amostra
+    return max(MIN_ITERACOES, int(alvo_s / por_iteracao) // 1000 * 1000)
+
+def _subchaves(mestre: bytes):
+    """(verificador guardado no arquivo, chave do cofre): nunca a mesma derivação."""
+    def hkdf(info):
+        return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info).derive(mestre)
+    return hkdf(b"operador-verificador"), hkdf(b"operador-cofre")
+
+@dataclass
+class Sessao:
+    """Sessão em memória aberta por um único login."""
+    operador: str
+    papel: str
+    senha_estado: str
+    chave_privada: object = None
+
+    def pode(self, permissao: str) -> bool:
+        return permissao in PAPEIS.get(self.papel, ())
+
+    def ativar(self):
+        """Deixa a chave de assinatura disponível para issue_ticket sem novo prompt."""
+        definir_chave_sessao(self.chave_privada)
+
+    def encerrar(self):
+        definir_chave_sessao(None)
+        self.senha_estado = ""
+        self.chave_privada = None
+
+
+def carregar_operadores(path: Path = None) -> Dict[str, dict]:
+    path = Path(path or OPERADORES_FILE)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def existem_operadores(path: Path = None) -> bool:
+    return bool(carregar_operadores(path))
+
+def _gravar_operadores(path: Path, operadores: Dict[str, dict]):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(operadores, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+
+def criar_operador(
+    nome: str,
+    senha: str,
+    papel: str,
+    senha_estado: str,
+    senha_chave: Optional[str] = None,
+    iteracoes: Optional[int] = None,
+    path: Path = None,
+):
+    """
+    Cria (ou substitui) a conta `nome`. As senhas do estado e da chave privada vão num
+    cofre AES-GCM cifrado com a senha do operador; a da chave só para papéis que emitem.
+    """
+    nome = nome.strip()
+    if not nome:
+        raise ValueError("Nome do operador não pode ser vazio.")
+    if papel not in PAPEIS:
+        raise ValueError(f"Papel inválido. Use: {', '.join(PAPEIS)}.")
+    if len(senha) < 8:
+        raise ValueError("A senha do operador deve ter ao menos 8 caracteres.")
+
+    iteracoes = iteracoes or calibrar_iteracoes()
+    salt = gerar_salt()
+    verificador, chave = _subchaves(hash_password(senha, salt, iteracoes))
+    cofre = {"estado": senha_estado, "chave": senha_chave if "emitir" in PAPEIS[papel] else None}
+    nonce = os.urandom(12)
+    ct = AESGCM(chave).encrypt(nonce, json.dumps(cofre).encode(), nome.encode())
+
+    path = Path(path or OPERADORES_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path.with_name(path.name + ".lock")):
+        operadores = carregar_operadores(path)
+        operadores[nome] = {
+            "papel": papel,
+            "iteracoes": iteracoes,
+            "salt": base64.b64encode(salt).decode("utf-8"),
+            "hash": base64.b64encode(verificador).decode("utf-8"),
+            "cofre": base64.b64encode(nonce + ct).decode("utf-8"),
+        }
+        _gravar_operadores(path, operadores)
+
+def remover_operador(nome: str, path: Path = None):
+    path = Path(path or OPERADORES_FILE)
+    with file_lock(path.with_name(path.name + ".lock")):
+        operadores = carregar_operadores(path)
+        if operadores.pop(nome, None) is None:
+            raise ValueError("Operador não encontrado.")
+        _gravar_operadores(path, operadores)
+
+def login(nome: str, senha: str, path: Path = None) -> Sessao:
+    """
+    Um único PBKDF2 (com as iterações guardadas na conta) abre a sessão: libera a
+    senha do estado e desbloqueia a chave privada. PermissionError se falhar.
+    """
+    operadores = carregar_operadores(path)
+    conta = operadores.get(nome.strip())
+    if conta is None:
+        # Mesmo custo da conta mais cara (contas calibradas passam do mínimo):
+        # o tempo de resposta não revela quais nomes existem
+        iteracoes = max((c["iteracoes"] for c in operadores.values()), default=MIN_ITERACOES)
+        hash_password(senha, b"\0" * 16, iteracoes)
+        raise PermissionError("Operador ou senha inválidos.")
+
+    salt = base64.b64decode(conta["salt"])
+    verificador, chave = _subchaves(hash_password(senha, salt, conta["iteracoes"]))
+    if not hmac.compare_digest(verificador, base64.b64decode(conta["hash"])):
+        raise PermissionError("Operador ou senha inválidos.")
+
+    blob = base64.b64decode(conta["cofre"])
+    cofre = json.loads(AESGCM(chave).decrypt(blob[:12], blob[12:], nome.strip().encode()))
+    chave_privada = None
+    if cofre.get("chave") is not None:
+        try:
+            chave_privada = carregar_chave_privada(cofre["chave"])
+        except (ValueError, FileNotFoundError):
+            # Chave regerada depois da criação da conta: a sessão segue sem emitir
+            chave_privada = None
+    return Sessao(operador=nome.strip(), papel=conta["papel"], senha_estado=cofre["estado"], chave_privada=chave_privada)
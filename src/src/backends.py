@@ -0,0 +1,369 @@
+# src/backends.py
+"""
+Interface de armazenamento (estado, tickets emitidos, IDs usados) e duas
+implementações: JsonBackend (arquivos atuais em data/) e SqliteBackend.
+
+Ambas expõem mark_used/is_used/trava como o UsedTicketStore, então podem ser
+passadas como `store=` para verify_ticket_payload/revoke_ticket.
+"""
+import bisect
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .ids import eh_id_compacto, limite_inferior
+from .locks import file_lock
+from .models import Sala, Filme
+from .storage import STATE_FILE, TICKET_DIR, derive_key, encrypt_state, decrypt_state
+from .used_tickets import UsedTicketStore, default_store, load_used_tickets
+from .utils import salas_to_dict_state, dict_state_to_salas
+
+SQLITE_FILE = Path(__file__).resolve().parent.parent / "data" / "bilheteria.db"
+
+class StorageBackend(ABC):
+    """Operações de persistência usadas pela CLI e pelo service."""
+
+    @abstractmethod
+    def load_state(self) -> Optional[List[Sala]]:
+        """Estado salvo, ou None se ainda não há estado."""
+
+    @abstractmethod
+    def save_state(self, state: List[Sala]): ...
+
+    @abstractmethod
+    def save_ticket(self, ticket: dict): ...
+
+    @abstractmethod
+    def get_ticket(self, ticket_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def listar_tickets(self, desde: Optional[datetime] = None, ate: Optional[datetime] = None) -> Iterator[dict]:
+        """Tickets emitidos em [desde, ate), em ordem de emissão."""
+
+    @abstractmethod
+    def mark_used(self, ticket_id: str, emissao: Optional[str] = None) -> bool:
+        """Registra o uso; False se o ticket já estava usado."""
+
+    @abstractmethod
+    def is_used(self, ticket_id: str, emissao: Optional[str] = None) -> bool: ...
+
+    @abstractmethod
+    def trava(self, ticket_id: str):
+        """Context manager: lock entre processos para decidir usar x cancelar o ticket."""
+
+    def buscar_filmes(self, nome_prefixo: str = "", data_de: str = "", data_ate: str = "") -> List[Sala]:
+        """Salas com filme, filtradas por prefixo do nome e intervalo de data de saída."""
+        prefixo = nome_prefixo.strip().lower()
+        return [
+            s for s in (self.load_state() or [])
+            if s.filme
+            and (not prefixo or s.filme.nome.lower().startswith(prefixo))
+            and (not data_de or s.filme.data_saida >= data_de)
+            and (not data_ate or s.filme.data_saida <= data_ate)
+        ]
+
+    def close(self):
+        pass
+
+
+class JsonBackend(StorageBackend):
+    """Formato atual: state.enc (AES-GCM), um JSON por ticket e o registro de usados por shards."""
+
+    def __init__(self, senha: str, state_file: Path = None, ticket_dir: Path = None,
+                 used_store: Optional[UsedTicketStore] = None):
+        self.senha = senha
+        self.state_file = Path(state_file or STATE_FILE)
+        self.ticket_dir = Path(ticket_dir or TICKET_DIR)
+        self.used = used_store or default_store()
+
+    def load_state(self):
+        data = decrypt_state(self.senha, self.state_file)
+        return dict_state_to_salas(data) if data is not None else None
+
+    def save_state(self, state):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        encrypt_state(salas_to_dict_state(state), self.senha, self.state_file)
+
+    def save_ticket(self, ticket):
+        self.ticket_dir.mkdir(parents=True, exist_ok=True)
+        path = self.ticket_dir / f"ticket_{ticket['id']}.json"
+        path.write_text(json.dumps(ticket, ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+    def get_ticket(self, ticket_id):
+        path = self.ticket_dir / f"ticket_{ticket_id}.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def listar_tickets(self, desde=None, ate=None):
+        """
+        Com IDs compactos o nome do arquivo já ordena por emissão: o intervalo sai
+        por busca binária nos nomes, sem abrir arquivos fora dele. Tickets com ID
+        antigo (UUID) só entram na listagem sem intervalo.
+        """
+        if not self.ticket_dir.exists():
+            return
+        nomes = sorted(p.name[len("ticket_"):-len(".json")] for p in self.ticket_dir.glob("ticket_*.json"))
+        if desde is None and ate is None:
+            selecionados = nomes
+        else:
+            compactos = [n for n in nomes if eh_id_compacto(n)]
+            i = bisect.bisect_left(compactos, limite_inferior(desde)) if desde else 0
+            j = bisect.bisect_left(compactos, limite_inferior(ate)) if ate else len(compactos)
+            selecionados = compactos[i:j]
+        for ticket_id in selecionados:
+            ticket = self.get_ticket(ticket_id)
+            if ticket is not None:
+                yield ticket
+
+    def mark_used(self, ticket_id, emissao=None):
+        return self.used.mark_used(ticket_id, emissao)
+
+    def is_used(self, ticket_id, emissao=None):
+        return self.used.is_used(ticket_id, emissao)
+
+    def trava(self, ticket_id):
+        return self.used.trava(ticket_id)
+
+
+_VERIFICADOR = b"bilheteria-sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS salas (
+    numero INTEGER PRIMARY KEY,
+    nome TEXT,
+    genero TEXT,
+    idade_minima INTEGER,
+    ingressos INTEGER,
+    data_saida TEXT,
+    reservas BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_salas_nome ON salas (nome COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_salas_data_saida ON salas (data_saida);
+CREATE TABLE IF NOT EXISTS tickets (
+    id_hash BLOB PRIMARY KEY,
+    sala INTEGER NOT NULL,
+    emissao TEXT NOT NULL,
+    dados BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tickets_sala ON tickets (sala);
+CREATE INDEX IF NOT EXISTS idx_tickets_emissao ON tickets (emissao);
+CREATE TABLE IF NOT EXISTS usados (
+    id_hash BLOB PRIMARY KEY,
+    em TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+class SqliteBackend(StorageBackend):
+    """
+    SQLite em modo WAL. Catálogo em colunas indexadas (nome, data de saída);
+    tickets com o corpo cifrado (AES-GCM) e IDs guardados como HMAC, de modo que
+    a busca por ID continua indexada sem expor os IDs no arquivo.
+    Reservas também vão cifradas. A senha só passa pelo PBKDF2 uma vez, na abertura.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, chave: bytes):
+        self.conn = conn
+        subchaves = HKDF(algorithm=hashes.SHA256(), length=64, salt=None, info=b"bilheteria-sqlite").derive(chave)
+        self._aes = AESGCM(subchaves[:32])
+        self._chave_mac = subchaves[32:]
+
+    @classmethod
+    def abrir(cls, senha: str, path: Path = None) -> "SqliteBackend":
+        path = Path(path or SQLITE_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        os.chmod(path, 0o600)
+
+        row = conn.execute("SELECT valor FROM meta WHERE chave = 'salt'").fetchone()
+        if row is None:
+            salt = os.urandom(16)
+            backend = cls(conn, derive_key(senha, salt))
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('salt', ?)", (salt,))
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('verificador', ?)", (backend._cifrar(_VERIFICADOR, b"meta"),))
+            conn.execute("COMMIT")
+            return backend
+
+        backend = cls(conn, derive_key(senha, row[0]))
+        (verificador,) = conn.execute("SELECT valor FROM meta WHERE chave = 'verificador'").fetchone()
+        try:
+            backend._decifrar(verificador, b"meta")
+        except Exception:
+            conn.close()
+            raise ValueError("Senha incorreta para o banco SQLite.") from None
+        return backend
+
+    # Criptografia de campos
+    def _cifrar(self, dados: bytes, aad: bytes) -> bytes:
+        nonce = os.urandom(12)
+        return nonce + self._aes.encrypt(nonce, dados, aad)
+
+    def _decifrar(self, blob: bytes, aad: bytes) -> bytes:
+        return self._aes.decrypt(blob[:12], blob[12:], aad)
+
+    def _id_hash(self, ticket_id: str) -> bytes:
+        return hmac.new(self._chave_mac, str(ticket_id).encode(), hashlib.sha256).digest()[:16]
+
+    # Estado
+    def _sala_da_linha(self, row) -> Sala:
+        numero, nome, genero, idade, ingressos, data_saida, reservas = row
+        filme = Filme(nome, genero, idade, ingressos, data_saida) if nome is not None else None
+        res = json.loads(self._decifrar(reservas, b"reservas%d" % numero)) if reservas else {}
+        return Sala(numero=numero, filme=filme, reservas=res)
+
+    def load_state(self):
+        rows = self.conn.execute("SELECT * FROM salas ORDER BY numero").fetchall()
+        return [self._sala_da_linha(r) for r in rows] if rows else None
+
+    def save_state(self, state):
+        linhas = []
+        for s in state:
+            f = s.filme
+            reservas = self._cifrar(json.dumps(s.reservas).encode(), b"reservas%d" % s.numero) if s.reservas else None
+            linhas.append((
+                s.numero,
+                f.nome if f else None, f.genero if f else None, f.idade_minima if f else None,
+                f.ingressos if f else None, f.data_saida if f else None,
+                reservas,
+            ))
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("DELETE FROM salas")
+            self.conn.executemany("INSERT INTO salas VALUES (?, ?, ?, ?, ?, ?, ?)", linhas)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def buscar_filmes(self, nome_prefixo="", data_de="", data_ate=""):
+        sql = "SELECT * FROM salas WHERE nome IS NOT NULL"
+        args = []
+        if nome_prefixo.strip():
+            # LIKE com prefixo usa o índice NOCASE
+            sql += " AND nome LIKE ? ESCAPE '\\'"
+            escapado = nome_prefixo.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            args.append(escapado + "%")
+        if data_de:
+            sql += " AND data_saida >= ?"
+            args.append(data_de)
+        if data_ate:
+            sql += " AND data_saida <= ?"
+            args.append(data_ate)
+        return [self._sala_da_linha(r) for r in self.conn.execute(sql + " ORDER BY numero", args)]
+
+    # Tickets
+    def save_ticket(self, ticket):
+        id_hash = self._id_hash(ticket["id"])
+        dados = self._cifrar(json.dumps(ticket, ensure_ascii=False).encode(), id_hash)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tickets VALUES (?, ?, ?, ?)",
+            (id_hash, ticket["sala"], ticket["emissao"], dados),
+        )
+
+    def save_tickets(self, tickets):
+        """Inserção em lote (uma transação)."""
+        self.conn.execute("BEGIN")
+        try:
+            for t in tickets:
+                self.save_ticket(t)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def get_ticket(self, ticket_id):
+        id_hash = self._id_hash(ticket_id)
+        row = self.conn.execute("SELECT dados FROM tickets WHERE id_hash = ?", (id_hash,)).fetchone()
+        return json.loads(self._decifrar(row[0], id_hash)) if row else None
+
+    def listar_tickets(self, desde=None, ate=None):
+        # IDs viram HMAC no banco: o intervalo usa o índice da emissão (ISO em UTC, ordenável)
+        sql = "SELECT id_hash, dados FROM tickets WHERE 1 = 1"
+        args = []
+        if desde:
+            sql += " AND emissao >= ?"
+            args.append(desde.astimezone(timezone.utc).isoformat())
+        if ate:
+            sql += " AND emissao < ?"
+            args.append(ate.astimezone(timezone.utc).isoformat())
+        for id_hash, dados in self.conn.execute(sql + " ORDER BY emissao", args).fetchall():
+            yield json.loads(self._decifrar(dados, id_hash))
+
+    def contar_tickets(self, sala: int) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM tickets WHERE sala = ?", (sala,)).fetchone()[0]
+
+    # Usados
+    def mark_used(self, ticket_id, emissao=None):
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO usados VALUES (?, ?)",
+            (self._id_hash(ticket_id), datetime.now(timezone.utc).isoformat()),
+        )
+        return cur.rowcount == 1
+
+    def is_used(self, ticket_id, emissao=None):
+        return self.conn.execute(
+            "SELECT 1 FROM usados WHERE id_hash = ?", (self._id_hash(ticket_id),)
+        ).fetchone() is not None
+
+    @contextmanager
+    def trava(self, ticket_id):
+        # Um lock para o banco inteiro: a decisão também consulta o log de revogações (fora do banco)
+        arquivo = self.conn.execute("PRAGMA database_list").fetchone()[2]
+        if not arquivo:
+            yield
+            return
+        with file_lock(Path(arquivo + ".decisao.lock")):
+            yield
+
+    def close(self):
+        self.conn.close()
+
+
+def migrar_json_para_sqlite(senha: str, destino: Path = None, origem: Optional[JsonBackend] = None) -> dict:
+    """
+    Copia estado, tickets (data/tickets/*.json) e IDs usados para o SQLite.
+    Idempotente: pode ser rodada de novo sem duplicar registros.
+    """
+    origem = origem or JsonBackend(senha)
+    state = origem.load_state()
+    if state is None and origem.state_file.exists():
+        raise ValueError("Senha incorreta para o estado atual.")
+
+    db = SqliteBackend.abrir(senha, destino)
+    try:
+        if state is not None:
+            db.save_state(state)
+
+        tickets = []
+        for path in sorted(origem.ticket_dir.glob("ticket_*.json")):
+            try:
+                tickets.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError):
+                continue
+        db.save_tickets(tickets)
+
+        usados = origem.used.load_all() | load_used_tickets()
+        db.conn.execute("BEGIN")
+        for ticket_id in usados:
+            db.mark_used(ticket_id)
+        db.conn.execute("COMMIT")
+    finally:
+        db.close()
+    return {"salas": len(state or []), "tickets": len(tickets), "usados": len(usados)}
@@ -0,0 +1,342 @@
+# src/backup.py
+"""
+Backup incremental e deduplicado da pasta data/.
+
+Os arquivos são fatiados em pedaços definidos pelo conteúdo (hash rolante Gear,
+no estilo FastCDC): inserir bytes no meio de um arquivo muda só os pedaços em
+volta da alteração. Cada pedaço é comprimido (zlib), cifrado (AES-GCM) e gravado
+uma única vez em chunks/, com nome HMAC(conteúdo), então backups sucessivos só
+guardam pedaços novos. Arquivos com mesmo tamanho e mtime do snapshot anterior
+nem são lidos.
+
+Bancos SQLite (bilheteria.db, em modo WAL) não são lidos direto do disco: o
+arquivo principal sozinho pode estar atrás do -wal, e copiar os dois em momentos
+diferentes dá um banco inconsistente. Eles são copiados com a API de backup do
+SQLite (uma leitura consistente) e o -wal/-shm fica de fora.
+
+Cada execução grava um manifesto cifrado em snapshots/<AAAAMMDDTHHMMSSZ>.snap
+com a lista de arquivos e seus pedaços. A restauração escolhe o snapshot pelo
+nome ou pelo instante (o último até ele) e reconstrói os arquivos em paralelo.
+
+Uso (na pasta src):
+    python -m src.backup criar [--repo pasta] [--origem pasta]
+    python -m src.backup listar [--repo pasta]
+    python -m src.backup restaurar --destino pasta [--snapshot nome | --em AAAA-MM-DDTHH:MM] [--threads N]
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from getpass import getpass
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .storage import derive_key
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+BACKUP_DIR = Path(__file__).resolve().parent.parent / "backups"
+
+# Tamanhos dos pedaços: mínimo, médio (2^13) e máximo
+PEDACO_MIN = 2 * 1024
+BITS_MEDIO = 13
+PEDACO_MAX = 64 * 1024
+_LEITURA = 1024 * 1024
+
+# Não entram no backup: locks, temporários, sockets (só arquivos regulares são lidos)
+# e os arquivos auxiliares do SQLite (o banco é copiado já com eles aplicados)
+IGNORAR_SUFIXOS = (".lock", ".tmp", ".sock", "-wal", "-shm", "-journal")
+_CABECALHO_SQLITE = b"SQLite format 3\x00"
+
+_VERIFICADOR = b"bilheteria-backup"
+_M64 = (1 << 64) - 1
+# Bits altos do hash: dependem dos últimos bytes lidos (janela de ~64 bytes)
+_MASCARA = ((1 << BITS_MEDIO) - 1) << (64 - BITS_MEDIO)
+_GEAR = [int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8).digest(), "big") for i in range(256)]
+
+def _corte(buf, inicio: int, fim: int) -> int:
+    """Posição do fim do pedaço que começa em `inicio` (no máximo `fim`)."""
+    limite = min(fim, inicio + PEDACO_MAX)
+    i = inicio + PEDACO_MIN
+    if i >= limite:
+        return limite
+    h = 0
+    gear = _GEAR
+    while i < limite:
+        h = ((h << 1) + gear[buf[i]]) & _M64
+        i += 1
+        if not h & _MASCARA:
+            return i
+    return limite
+
+def fatiar(f: BinaryIO) -> Iterator[bytes]:
+    """Pedaços definidos pelo conteúdo, lendo o arquivo em blocos de 1 MiB."""
+    buf = b""
+    pos = 0
+    fim_arquivo = False
+    while not fim_arquivo:
+        bloco = f.read(_LEITURA)
+        fim_arquivo = not bloco
+        buf = buf[pos:] + bloco
+        pos = 0
+        # Sem o fim do arquivo, só corta com um pedaço máximo inteiro à frente
+        while len(buf) - pos >= PEDACO_MAX or (fim_arquivo and pos < len(buf)):
+            corte = _corte(buf, pos, len(buf))
+            yield buf[pos:corte]
+            pos = corte
+
+
+def _e_sqlite(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(_CABECALHO_SQLITE)) == _CABECALHO_SQLITE
+
+def _copiar_sqlite(path: Path, destino: Path):
+    """Cópia consistente do banco (inclui o que ainda está só no -wal)."""
+    origem = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        copia = sqlite3.connect(destino)
+        try:
+            origem.backup(copia)
+        finally:
+            copia.close()
+    finally:
+        origem.close()
+
+
+class RepositorioBackup:
+    def __init__(self, path: Path, chave_cifra: bytes, chave_id: bytes):
+        self.path = Path(path)
+        self._aes = AESGCM(chave_cifra)
+        self._chave_id = chave_id
+
+    # Abertura
+    @staticmethod
+    def _subchaves(mestre: bytes):
+        def hkdf(info):
+            return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info).derive(mestre)
+        return hkdf(b"backup-verificador"), hkdf(b"backup-cifra"), hkdf(b"backup-id")
+
+    @classmethod
+    def abrir(cls, senha: str, path: Path = None) -> "RepositorioBackup":
+        """Abre (ou cria) o repositório. PermissionError se a senha não confere."""
+        path = Path(path or BACKUP_DIR)
+        config = path / "config.json"
+        if config.exists():
+            dados = json.loads(config.read_text(encoding="utf-8"))
+            salt = base64.b64decode(dados["salt"])
+            verificador, cifra, ident = cls._subchaves(derive_key(senha, salt))
+            esperado = base64.b64decode(dados["verificador"])
+            if not hmac.compare_digest(hmac.new(verificador, _VERIFICADOR, "sha256").digest(), esperado):
+                raise PermissionError("Senha do backup incorreta.")
+        else:
+            salt = os.urandom(16)
+            verificador, cifra, ident = cls._subchaves(derive_key(senha, salt))
+            (path / "chunks").mkdir(parents=True, exist_ok=True)
+            (path / "snapshots").mkdir(exist_ok=True)
+            config.write_text(json.dumps({
+                "salt": base64.b64encode(salt).decode(),
+                "verificador": base64.b64encode(hmac.new(verificador, _VERIFICADOR, "sha256").digest()).decode(),
+            }), encoding="utf-8")
+        return cls(path, cifra, ident)
+
+    # Pedaços
+    def _id_pedaco(self, dados: bytes) -> str:
+        # HMAC e não SHA-256 puro: o nome do arquivo não revela o conteúdo
+        return hmac.new(self._chave_id, dados, "sha256").hexdigest()[:32]
+
+    def _chunk_path(self, cid: str) -> Path:
+        return self.path / "chunks" / cid[:2] / cid
+
+    def _selar(self, dados: bytes, aad: bytes) -> bytes:
+        nonce = os.urandom(12)
+        return nonce + self._aes.encrypt(nonce, zlib.compress(dados, 6), aad)
+
+    def _abrir_selado(self, blob: bytes, aad: bytes) -> bytes:
+        try:
+            return zlib.decompress(self._aes.decrypt(blob[:12], blob[12:], aad))
+        except InvalidTag:
+            raise ValueError("Backup corrompido ou adulterado.") from None
+
+    def _guardar_pedaco(self, dados: bytes) -> tuple:
+        """(id, bytes gravados; 0 se o pedaço já existia)."""
+        cid = self._id_pedaco(dados)
+        path = self._chunk_path(cid)
+        if path.exists():
+            return cid, 0
+        path.parent.mkdir(exist_ok=True)
+        blob = self._selar(dados, cid.encode())
+        tmp = path.with_name(f"{cid}.{os.urandom(4).hex()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        return cid, len(blob)
+
+    def ler_pedaco(self, cid: str) -> bytes:
+        dados = self._abrir_selado(self._chunk_path(cid).read_bytes(), cid.encode())
+        if self._id_pedaco(dados) != cid:
+            raise ValueError("Backup corrompido ou adulterado.")
+        return dados
+
+    # Snapshots
+    def snapshots(self) -> List[str]:
+        return sorted(p.stem for p in (self.path / "snapshots").glob("*.snap"))
+
+    def manifesto(self, nome: str) -> dict:
+        blob = (self.path / "snapshots" / f"{nome}.snap").read_bytes()
+        return json.loads(self._abrir_selado(blob, b"manifesto:" + nome.encode()))
+
+    def escolher(self, quando: Optional[datetime] = None) -> Optional[str]:
+        """Último snapshot criado até `quando` (o mais recente sem `quando`)."""
+        nomes = self.snapshots()
+        if quando is not None:
+            if quando.tzinfo is None:
+                quando = quando.astimezone()
+            limite = quando.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            nomes = [n for n in nomes if n[:16] <= limite]
+        return nomes[-1] if nomes else None
+
+    def _backup_arquivo(self, path: Path, rel: str, anterior: Optional[dict]) -> tuple:
+        st = path.stat()
+        if _e_sqlite(path):
+            # Sem atalho por mtime: com WAL o arquivo principal não muda a cada commit
+            with tempfile.TemporaryDirectory() as tmp:
+                copia = Path(tmp) / path.name
+                _copiar_sqlite(path, copia)
+                return self._backup_conteudo(copia, rel, st)
+        if anterior and anterior["tamanho"] == st.st_size and anterior["mtime_ns"] == st.st_mtime_ns:
+            return dict(anterior, caminho=rel), 0, 0, True
+        return self._backup_conteudo(path, rel, st)
+
+    def _backup_conteudo(self, path: Path, rel: str, st: os.stat_result) -> tuple:
+        chunks, gravados, lidos = [], 0, 0
+        with open(path, "rb") as f:
+            for pedaco in fatiar(f):
+                cid, n = self._guardar_pedaco(pedaco)
+                chunks.append(cid)
+                gravados += n
+                lidos += len(pedaco)
+        entrada = {"caminho": rel, "tamanho": lidos, "mtime_ns": st.st_mtime_ns, "modo": st.st_mode & 0o777, "chunks": chunks}
+        return entrada, gravados, lidos, False
+
+    def criar_snapshot(self, origem: Path = None, threads: int = 0, agora: Optional[datetime] = None) -> dict:
+        """Faz o backup de `origem` e retorna estatísticas (bytes lidos e gravados, arquivos reaproveitados)."""
+        origem = Path(origem or DATA_DIR)
+        agora = agora or datetime.now(timezone.utc)
+        ultimo = self.escolher()
+        anteriores = {a["caminho"]: a for a in self.manifesto(ultimo)["arquivos"]} if ultimo else {}
+
+        arquivos = sorted(
+            p for p in origem.rglob("*")
+            if p.is_file() and not p.is_symlink() and not p.name.endswith(IGNORAR_SUFIXOS)
+            and self.path.resolve() not in p.resolve().parents
+        )
+        stats = {"arquivos": 0, "reaproveitados": 0, "bytes_lidos": 0, "bytes_gravados": 0}
+        entradas = []
+        with ThreadPoolExecutor(max_workers=threads or min(8, os.cpu_count() or 1)) as pool:
+            futuros = []
+            for p in arquivos:
+                rel = p.relative_to(origem).as_posix()
+                futuros.append(pool.submit(self._backup_arquivo, p, rel, anteriores.get(rel)))
+            for fut in futuros:
+                try:
+                    entrada, gravados, lidos, reaproveitado = fut.result()
+                except FileNotFoundError:
+                    # Apagado durante o backup
+                    continue
+                entradas.append(entrada)
+                stats["arquivos"] += 1
+                stats["reaproveitados"] += reaproveitado
+                stats["bytes_lidos"] += lidos
+                stats["bytes_gravados"] += gravados
+
+        nome = agora.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        if nome in self.snapshots():
+            nome += f"-{os.urandom(3).hex()}"
+        manifesto = {"criado_em": agora.isoformat(), "origem": str(origem), "arquivos": entradas}
+        blob = self._selar(json.dumps(manifesto, ensure_ascii=False).encode(), b"manifesto:" + nome.encode())
+        destino = self.path / "snapshots" / f"{nome}.snap"
+        tmp = destino.with_suffix(".tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, destino)
+        return dict(stats, snapshot=nome)
+
+    def _restaurar_arquivo(self, entrada: dict, destino: Path) -> int:
+        path = destino / entrada["caminho"]
+        if destino.resolve() not in path.resolve().parents:
+            raise ValueError(f"Caminho inválido no manifesto: {entrada['caminho']}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".restaurando")
+        escritos = 0
+        with open(tmp, "wb") as f:
+            for cid in entrada["chunks"]:
+                escritos += f.write(self.ler_pedaco(cid))
+        if escritos != entrada["tamanho"]:
+            tmp.unlink()
+            raise ValueError(f"Tamanho restaurado não confere: {entrada['caminho']}")
+        os.chmod(tmp, entrada["modo"])
+        os.replace(tmp, path)
+        return escritos
+
+    def restaurar(self, destino: Path, nome: Optional[str] = None, quando: Optional[datetime] = None,
+                  threads: int = 0) -> dict:
+        """Restaura o snapshot `nome` (ou o vigente em `quando`) em `destino`, arquivos em paralelo."""
+        nome = nome or self.escolher(quando)
+        if nome is None:
+            raise ValueError("Nenhum snapshot até o instante pedido.")
+        manifesto = self.manifesto(nome)
+        destino = Path(destino)
+        destino.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=threads or min(8, os.cpu_count() or 1)) as pool:
+            total = sum(pool.map(lambda e: self._restaurar_arquivo(e, destino), manifesto["arquivos"]))
+        return {"snapshot": nome, "arquivos": len(manifesto["arquivos"]), "bytes": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup deduplicado e cifrado da pasta data/")
+    parser.add_argument("comando", choices=["criar", "listar", "restaurar"])
+    parser.add_argument("--repo", type=Path, default=BACKUP_DIR)
+    parser.add_argument("--origem", type=Path, default=DATA_DIR)
+    parser.add_argument("--destino", type=Path, help="Pasta para restaurar (não precisa ser a data/ atual)")
+    parser.add_argument("--snapshot", help="Nome do snapshot a restaurar")
+    parser.add_argument("--em", help="Restaurar o último snapshot até este instante (AAAA-MM-DDTHH:MM, horário local)")
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        repo = RepositorioBackup.abrir(getpass("Senha do backup: "), args.repo)
+    except PermissionError as e:
+        print(f"❌ {e}")
+        return
+
+    if args.comando == "criar":
+        r = repo.criar_snapshot(args.origem, args.threads)
+        print(
+            f"✅ Snapshot {r['snapshot']}: {r['arquivos']} arquivo(s), {r['reaproveitados']} sem mudança; "
+            f"{r['bytes_lidos']} bytes lidos, {r['bytes_gravados']} bytes novos gravados."
+        )
+    elif args.comando == "listar":
+        for nome in repo.snapshots():
+            print(nome)
+    else:
+        if args.destino is None:
+            print("❌ Informe --destino.")
+            return
+        try:
+            quando = datetime.fromisoformat(args.em) if args.em else None
+            r = repo.restaurar(args.destino, args.snapshot, quando, args.threads)
+        except (ValueError, OSError) as e:
+            print(f"❌ Falha na restauração: {e}")
+            return
+        print(f"✅ Snapshot {r['snapshot']} restaurado: {r['arquivos']} arquivo(s), {r['bytes']} bytes.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# src/busca.py
+"""
+Índice de busca de filmes por nome e gênero.
+
+Textos são normalizados (NFKD, sem acentos, casefold), então "acao" encontra
+"Ação". Cada termo da consulta casa com termos do índice por igualdade, por
+prefixo (busca binária no vocabulário ordenado) ou por similaridade de
+trigramas (erros de digitação). O ranking soma, por termo da consulta, o melhor
+casamento ponderado pelo campo (nome vale mais que gênero); filmes que casam
+mais termos da consulta vêm primeiro.
+
+O índice é atualizado por eventos (FILME_ADICIONADO / FILME_REMOVIDO).
+"""
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .models import Sala, Filme
+from . import eventos
+
+PESO_NOME = 2.0
+PESO_GENERO = 1.0
+# Fator do casamento em relação ao termo exato
+FATOR_PREFIXO = 0.7
+FATOR_TRIGRAMA = 0.5
+# Similaridade mínima (Jaccard de trigramas) para considerar um termo parecido
+LIMIAR_TRIGRAMA = 0.4
+
+_NAO_ALFANUM = re.compile(r"[^0-9a-z]+")
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos e com qualquer pontuação virando espaço."""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _NAO_ALFANUM.sub(" ", sem_acento.casefold()).strip()
+
+def termos(texto: str) -> List[str]:
+    return normalizar(texto).split()
+
+def trigramas(termo: str) -> FrozenSet[str]:
+    t = f"  {termo} "
+    return frozenset(t[i:i + 3] for i in range(len(t) - 2))
+
+
+class IndiceBusca:
+    def __init__(self):
+        self._docs: Dict[int, Tuple[Sala, Filme]] = {}
+        self._termos_doc: Dict[int, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._vocab: List[str] = []
+        self._trigramas: Dict[str, Set[str]] = {}
+        self._tg_termo: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def from_state(cls, state: List[Sala]) -> "IndiceBusca":
+        """Constrói o índice do catálogo inteiro, ordenando o vocabulário uma vez só."""
+        indice = cls()
+        for sala in state:
+            indice._indexar(sala, ordenado=False)
+        indice._vocab.sort()
+        return indice
+
+    def __len__(self):
+        return len(self._docs)
+
+    # Atualização incremental
+    def adicionar(self, sala: Sala):
+        """Indexa (ou reindexa) o filme atual da sala."""
+        self.remover(sala.numero)
+        self._indexar(sala)
+
+    def _indexar(self, sala: Sala, ordenado: bool = True):
+        # Sem `ordenado`, termos novos vão para o fim do vocabulário: quem chama ordena no final
+        if not sala.filme:
+            return
+        pesos: Dict[str, float] = {}
+        for t in termos(sala.filme.genero):
+            pesos[t] = max(pesos.get(t, 0.0), PESO_GENERO)
+        for t in termos(sala.filme.nome):
+            pesos[t] = max(pesos.get(t, 0.0), PESO_NOME)
+        self._docs[sala.numero] = (sala, sala.filme)
+        self._termos_doc[sala.numero] = pesos
+        for t, peso in pesos.items():
+            docs = self._postings.get(t)
+            if docs is None:
+                docs = self._postings[t] = {}
+                if ordenado:
+                    bisect.insort(self._vocab, t)
+                else:
+                    self._vocab.append(t)
+                tg = self._tg_termo[t] = trigramas(t)
+                for g in tg:
+                    self._trigramas.setdefault(g, set()).add(t)
+            docs[sala.numero] = peso
+
+    def remover(self, numero: int):
+        pesos = self._termos_doc.pop(numero, None)
+        self._docs.pop(numero, None)
+        for t in pesos or ():
+            docs = self._postings[t]
+            docs.pop(numero, None)
+            if docs:
+                continue
+            del self._postings[t]
+            del self._vocab[bisect.bisect_left(self._vocab, t)]
+            for g in self._tg_termo.pop(t):
+                termos_g = self._trigramas[g]
+                termos_g.discard(t)
+                if not termos_g:
+                    del self._trigramas[g]
+
+    def ouvinte(self, tipo: str, dados: dict):
+        """Para `eventos.registrar_ouvinte`."""
+        if tipo == eventos.FILME_ADICIONADO:
+            self.adicionar(dados["sala"])
+        elif tipo == eventos.FILME_REMOVIDO:
+            self.remover(dados["sala"].numero)
+
+    # Consulta
+    def _casamentos(self, t: str) -> Dict[int, float]:
+        melhor: Dict[int, float] = {}
+
+        def casar(termo, fator):
+            for doc, peso in self._postings[termo].items():
+                if fator * peso > melhor.get(doc, 0.0):
+                    melhor[doc] = fator * peso
+
+        i = bisect.bisect_left(self._vocab, t)
+        while i < len(self._vocab) and self._vocab[i].startswith(t):
+            termo = self._vocab[i]
+            casar(termo, 1.0 if termo == t else FATOR_PREFIXO)
+            i += 1
+
+        if len(t) >= 3:
+            tg = trigramas(t)
+            comuns = Counter()
+            for g in tg:
+                comuns.update(self._trigramas.get(g, ()))
+            for termo, n in comuns.items():
+                sim = n / (len(tg) + len(self._tg_termo[termo]) - n)
+                if sim >= LIMIAR_TRIGRAMA:
+                    casar(termo, FATOR_TRIGRAMA * sim)
+        return melhor
+
+    def buscar(self, consulta: str, limite: Optional[int] = 20) -> List[Tuple[Sala, float]]:
+        """Salas em ordem de relevância, com a pontuação de cada uma."""
+        pontos: Dict[int, float] = {}
+        casados: Counter = Counter()
+        for t in dict.fromkeys(termos(consulta)):
+            for doc, valor in self._casamentos(t).items():
+                pontos[doc] = pontos.get(doc, 0.0) + valor
+                casados[doc] += 1
+
+        resultado = []
+        for doc, valor in pontos.items():
+            sala, filme = self._docs[doc]
+            # Filme trocado sem evento (ex.: reset): entrada obsoleta
+            if sala.filme is not filme:
+                continue
+            resultado.append((sala, valor))
+        ordem = lambda r: (-casados[r[0].numero], -r[1], r[0].filme.nome)
+        if limite:
+            # Top-k sem ordenar todos os candidatos
+            return heapq.nsmallest(limite, resultado, key=ordem)
+        return sorted(resultado, key=ordem)
@@ -0,0 +1,152 @@
+# src/catalog_io.py
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .models import Sala, Filme
+from . import eventos
+from .service import build_filme, INGRESSOS_POR_FILME
+
+CAMPOS = ["sala", "nome", "genero", "idade_minima", "data_saida", "ingressos"]
+
+# Linhas validadas por lote durante a importação
+TAMANHO_LOTE = 1000
+
+class ImportacaoError(ValueError):
+    """Importação rejeitada; `erros` traz (linha, mensagem) de todas as linhas inválidas."""
+
+    def __init__(self, erros: List[Tuple[int, str]]):
+        self.erros = erros
+        super().__init__(f"{len(erros)} erro(s) na importação do catálogo.")
+
+def _formato(path: Path) -> str:
+    sufixo = path.suffix.lower()
+    if sufixo == ".csv":
+        return "csv"
+    if sufixo in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError("Formato não suportado. Use .csv ou .jsonl.")
+
+def ler_linhas(path: Path) -> Iterator[Tuple[int, object]]:
+    """
+    Lê o arquivo em streaming, produzindo (número da linha, registro).
+    Linhas JSONL malformadas viram uma string de erro em vez do dicionário.
+    """
+    path = Path(path)
+    if _formato(path) == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for n, linha in enumerate(f, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    yield n, json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield n, f"JSON inválido: {e.msg}"
+
+def _validar_linha(row, salas: Dict[int, Sala], hoje) -> Tuple[Sala, Filme]:
+    if isinstance(row, str):
+        raise ValueError(row)
+    if not isinstance(row, dict):
+        raise ValueError("Registro deve ser um objeto.")
+
+    try:
+        sala = salas.get(int(row.get("sala")))
+    except (TypeError, ValueError):
+        sala = None
+    if sala is None:
+        raise ValueError(f"Sala inexistente: {row.get('sala')!r}.")
+
+    try:
+        idade = int(row.get("idade_minima"))
+    except (TypeError, ValueError):
+        raise ValueError("Idade mínima inválida.") from None
+
+    ingressos = row.get("ingressos")
+    try:
+        ingressos = INGRESSOS_POR_FILME if ingressos in (None, "") else int(ingressos)
+    except (TypeError, ValueError):
+        raise ValueError("Quantidade de ingressos inválida.") from None
+
+    filme = build_filme(
+        str(row.get("nome") or ""),
+        str(row.get("genero") or ""),
+        idade,
+        str(row.get("data_saida") or ""),
+        ingressos=ingressos,
+        hoje=hoje,
+    )
+    return sala, filme
+
+def validar_catalogo(linhas: Iterable[Tuple[int, object]], state: List[Sala]):
+    """
+    Valida todas as linhas (em lotes), sem alterar o estado.
+    Retorna (plano, erros): plano é a lista de (sala, filme) a aplicar.
+    """
+    hoje = datetime.now().date()
+    plano: List[Tuple[Sala, Filme]] = []
+    erros: List[Tuple[int, str]] = []
+    linha_da_sala: Dict[int, int] = {}
+    salas = {s.numero: s for s in state}
+
+    it = iter(linhas)
+    while True:
+        lote = list(islice(it, TAMANHO_LOTE))
+        if not lote:
+            break
+        for n, row in lote:
+            try:
+                sala, filme = _validar_linha(row, salas, hoje)
+            except ValueError as e:
+                erros.append((n, str(e)))
+                continue
+            anterior = linha_da_sala.setdefault(sala.numero, n)
+            if anterior != n:
+                erros.append((n, f"Sala {sala.numero} já definida na linha {anterior}."))
+                continue
+            plano.append((sala, filme))
+    return plano, erros
+
+def importar_catalogo(state: List[Sala], path: Path) -> int:
+    """
+    Importa filmes de CSV/JSONL (colunas: sala, nome, genero, idade_minima, data_saida[, ingressos]).
+    Tudo ou nada: com qualquer erro nenhuma sala é alterada e ImportacaoError lista todos eles.
+    Retorna quantas salas foram atualizadas.
+    """
+    plano, erros = validar_catalogo(ler_linhas(path), state)
+    if erros:
+        raise ImportacaoError(erros)
+    # Só atribuições a partir daqui: não há como falhar no meio
+    for sala, filme in plano:
+        sala.adicionar_filme(filme)
+    for sala, filme in plano:
+        eventos.emitir(eventos.FILME_ADICIONADO, sala=sala, filme=filme)
+    return len(plano)
+
+def exportar_catalogo(state: List[Sala], path: Path) -> int:
+    """Exporta as salas com filme para CSV/JSONL (mesmo formato aceito na importação)."""
+    path = Path(path)
+    formato = _formato(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CAMPOS) if formato == "csv" else None
+        if writer:
+            writer.writeheader()
+        for sala in state:
+            if not sala.filme:
+                continue
+            row = {"sala": sala.numero, **sala.filme.to_dict()}
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            total += 1
+    return total
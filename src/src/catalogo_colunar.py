@@ -0,0 +1,88 @@
+# src/catalogo_colunar.py
+from array import array
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+import sys
+
+from .models import Filme, Sala
+
+class CatalogoColunar:
+    """
+    Catálogo em colunas (array.array) para redes com centenas de milhares de sessões.
+
+    Cada registro é uma sala/sessão com filme. Campos numéricos ficam em arrays
+    compactos (4 bytes por valor em vez de um objeto int), a data de saída vira
+    o ordinal do dia e o gênero vira um código numa tabela de categorias.
+    Só o nome continua como lista de strings.
+    """
+
+    def __init__(self):
+        self.sala = array("i")
+        self.idade_minima = array("b")
+        self.ingressos = array("i")
+        self.data_saida = array("i")  # date.toordinal()
+        self.genero = array("H")      # índice em self.generos
+        self.nome: List[str] = []
+        self.generos: List[str] = []
+        self._codigo_genero: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.nome)
+
+    def _codigo(self, genero: str) -> int:
+        codigo = self._codigo_genero.get(genero)
+        if codigo is None:
+            codigo = self._codigo_genero[genero] = len(self.generos)
+            self.generos.append(sys.intern(genero))
+        return codigo
+
+    def append(self, numero_sala: int, filme: Filme) -> int:
+        """Adiciona um registro e retorna sua posição."""
+        self.sala.append(numero_sala)
+        self.idade_minima.append(filme.idade_minima)
+        self.ingressos.append(filme.ingressos)
+        self.data_saida.append(date.fromisoformat(filme.data_saida).toordinal())
+        self.genero.append(self._codigo(filme.genero))
+        self.nome.append(filme.nome)
+        return len(self.nome) - 1
+
+    @classmethod
+    def from_salas(cls, salas: List[Sala]) -> "CatalogoColunar":
+        cat = cls()
+        for s in salas:
+            if s.filme:
+                cat.append(s.numero, s.filme)
+        return cat
+
+    def filme(self, i: int) -> Filme:
+        """Materializa o registro `i` como Filme (cópia; alterações não voltam ao catálogo)."""
+        return Filme(
+            nome=self.nome[i],
+            genero=self.generos[self.genero[i]],
+            idade_minima=self.idade_minima[i],
+            ingressos=self.ingressos[i],
+            data_saida=date.fromordinal(self.data_saida[i]).isoformat(),
+        )
+
+    def to_salas(self) -> List[Sala]:
+        return [Sala(numero=self.sala[i], filme=self.filme(i)) for i in range(len(self))]
+
+    def iter_dicts(self) -> Iterator[dict]:
+        """Registros no formato de Sala.to_dict, gerados sob demanda."""
+        for i in range(len(self)):
+            yield {"numero": self.sala[i], "filme": self.filme(i).to_dict()}
+
+    def posicoes_por_data(self, data_de: str = "", data_ate: str = "") -> List[int]:
+        """Posições com data de saída no intervalo (comparação direta nos ordinais)."""
+        de = date.fromisoformat(data_de).toordinal() if data_de else None
+        ate = date.fromisoformat(data_ate).toordinal() if data_ate else None
+        return [
+            i for i, d in enumerate(self.data_saida)
+            if (de is None or d >= de) and (ate is None or d <= ate)
+        ]
+
+    def posicao_da_sala(self, numero_sala: int) -> Optional[int]:
+        try:
+            return self.sala.index(numero_sala)
+        except ValueError:
+            return None
@@ -0,0 +1,192 @@
+# src/catalogo_publico.py
+"""
+Catálogo público para quiosques e site: filmes em cartaz e ingressos restantes,
+sem criptografia, assinado com a chave RSA da bilheteria (a mesma dos tickets).
+Quem só exibe o catálogo não precisa da senha do estado.
+
+Arquivos em data/catalogo_publico/ (podem ser servidos como arquivos estáticos):
+  catalogo.json          snapshot completo da versão atual
+  deltas/<versão>.json   salas alteradas em relação à versão anterior
+
+Cada versão tem um cabeçalho assinado {versao, etag, gerado_em}; o ETag é o
+SHA-256 das salas em JSON canônico. O cliente que aplica deltas recalcula o ETag
+e confere com o cabeçalho assinado (ver aplicar_resposta), então os deltas não
+precisam de assinatura própria.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .crypto_keys import sign_payload, verify_signature
+from .locks import file_lock
+from .models import Sala
+
+CATALOGO_DIR = Path(__file__).resolve().parent.parent / "data" / "catalogo_publico"
+
+# Versões anteriores com delta guardado; cliente mais atrasado recebe o snapshot completo
+MAX_DELTAS = 500
+
+def entrada_publica(sala: Sala) -> dict:
+    """Só o que é público: sem reservas."""
+    return {"numero": sala.numero, "filme": sala.filme.to_dict() if sala.filme else None}
+
+def _canonico(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+def calcular_etag(salas: List[dict]) -> str:
+    return hashlib.sha256(_canonico(sorted(salas, key=lambda s: s["numero"]))).hexdigest()[:32]
+
+def _cabecalho(doc: dict) -> bytes:
+    return _canonico({"versao": doc["versao"], "etag": doc["etag"], "gerado_em": doc["gerado_em"]})
+
+def verificar_cabecalho(doc: dict, pub) -> bool:
+    try:
+        return verify_signature(pub, _cabecalho(doc), bytes.fromhex(doc["assinatura"]))
+    except (KeyError, TypeError, ValueError):
+        return False
+
+def _gravar_json(path: Path, obj: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(json.dumps(obj, ensure_ascii=False).encode())
+    os.replace(tmp, path)
+
+
+class CatalogoPublico:
+    """Publica versões (CLI) e responde consultas de quiosques (verification_server)."""
+
+    def __init__(self, base_dir: Path = None, max_deltas: int = MAX_DELTAS):
+        self.base_dir = Path(base_dir or CATALOGO_DIR)
+        self.max_deltas = max_deltas
+        self._arquivo = self.base_dir / "catalogo.json"
+        self._deltas = self.base_dir / "deltas"
+        # Snapshot em memória, recarregado quando o arquivo muda
+        self._assinatura_arquivo = None
+        self._doc: Optional[dict] = None
+        # Respostas de delta por versão de origem (válidas até a próxima publicação)
+        self._respostas: Dict[int, dict] = {}
+        self._mutex = threading.Lock()
+
+    def _delta_path(self, versao: int) -> Path:
+        return self._deltas / f"{versao:010d}.json"
+
+    # Publicação
+    def atual(self) -> Optional[dict]:
+        """Snapshot publicado (None se ainda não há)."""
+        try:
+            st = self._arquivo.stat()
+        except FileNotFoundError:
+            return None
+        with self._mutex:
+            if self._assinatura_arquivo != (st.st_mtime_ns, st.st_size):
+                self._doc = json.loads(self._arquivo.read_text(encoding="utf-8"))
+                self._assinatura_arquivo = (st.st_mtime_ns, st.st_size)
+                self._respostas.clear()
+            return self._doc
+
+    def publicar(self, state: List[Sala], priv_key) -> Optional[int]:
+        """
+        Publica o catálogo de `state` como nova versão. Retorna a versão, ou None se
+        nada mudou desde a última publicação.
+        """
+        salas = [entrada_publica(s) for s in sorted(state, key=lambda s: s.numero)]
+        etag = calcular_etag(salas)
+        self._deltas.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.base_dir / "catalogo.lock"):
+            anterior = self.atual()
+            if anterior is not None and anterior["etag"] == etag:
+                return None
+            versao = anterior["versao"] + 1 if anterior else 1
+            doc = {"versao": versao, "etag": etag, "gerado_em": datetime.now(timezone.utc).isoformat()}
+            doc["assinatura"] = sign_payload(priv_key, _cabecalho(doc)).hex()
+
+            if anterior is not None:
+                antes = {s["numero"]: s for s in anterior["salas"]}
+                depois = {s["numero"] for s in salas}
+                delta = dict(doc, de=versao - 1,
+                             salas=[s for s in salas if antes.get(s["numero"]) != s],
+                             removidas=sorted(set(antes) - depois))
+                # Delta antes do snapshot: quem vê a versão nova sempre encontra o delta dela
+                _gravar_json(self._delta_path(versao), delta)
+            _gravar_json(self._arquivo, dict(doc, salas=salas))
+
+            antigo = versao - self.max_deltas
+            while antigo > 0 and self._delta_path(antigo).exists():
+                self._delta_path(antigo).unlink()
+                antigo -= 1
+        return versao
+
+    # Consulta
+    def _combinar(self, desde: int, doc: dict) -> Optional[dict]:
+        """Deltas de desde+1 até a versão atual combinados; None se algum já foi podado."""
+        salas: Dict[int, dict] = {}
+        removidas = set()
+        for v in range(desde + 1, doc["versao"] + 1):
+            try:
+                delta = json.loads(self._delta_path(v).read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                return None
+            for s in delta["salas"]:
+                salas[s["numero"]] = s
+                removidas.discard(s["numero"])
+            for n in delta["removidas"]:
+                salas.pop(n, None)
+                removidas.add(n)
+        cab = {k: doc[k] for k in ("versao", "etag", "gerado_em", "assinatura")}
+        return dict(cab, de=desde, salas=[salas[n] for n in sorted(salas)], removidas=sorted(removidas))
+
+    def consultar(self, desde: Optional[int] = None, etag: Optional[str] = None) -> dict:
+        """
+        Resposta para um cliente que está na versão `desde` (ou tem o ETag `etag`):
+          {"inalterado": true, ...cabeçalho}            já está atualizado
+          {"de": desde, "salas": [...], "removidas": [...], ...cabeçalho}   delta
+          {"completo": true, "salas": [...], ...cabeçalho}                  snapshot
+        """
+        doc = self.atual()
+        if doc is None:
+            raise FileNotFoundError("Catálogo público ainda não publicado.")
+        cab = {k: doc[k] for k in ("versao", "etag", "gerado_em", "assinatura")}
+        if etag == doc["etag"] or desde == doc["versao"]:
+            return dict(cab, inalterado=True)
+        if isinstance(desde, int) and 0 < desde < doc["versao"] and doc["versao"] - desde <= self.max_deltas:
+            with self._mutex:
+                resposta = self._respostas.get(desde)
+            if resposta is None or resposta["versao"] != doc["versao"]:
+                resposta = self._combinar(desde, doc)
+                if resposta is not None:
+                    with self._mutex:
+                        self._respostas[desde] = resposta
+            if resposta is not None:
+                return resposta
+        return dict(cab, completo=True, salas=doc["salas"])
+
+
+def aplicar_resposta(catalogo: Optional[dict], resposta: dict, pub) -> dict:
+    """
+    Lado do quiosque: aplica a resposta de `consultar` ao catálogo local e devolve o
+    novo catálogo. ValueError se a assinatura ou o ETag resultante não conferem.
+    """
+    if not verificar_cabecalho(resposta, pub):
+        raise ValueError("Assinatura do catálogo inválida.")
+    if resposta.get("inalterado"):
+        if catalogo is None or catalogo["etag"] != resposta["etag"]:
+            raise ValueError("Catálogo local não corresponde à versão informada.")
+        return catalogo
+    if resposta.get("completo"):
+        salas = resposta["salas"]
+    else:
+        if catalogo is None or catalogo["versao"] != resposta["de"]:
+            raise ValueError("Delta não se aplica à versão local do catálogo.")
+        por_numero = {s["numero"]: s for s in catalogo["salas"]}
+        for n in resposta["removidas"]:
+            por_numero.pop(n, None)
+        for s in resposta["salas"]:
+            por_numero[s["numero"]] = s
+        salas = [por_numero[n] for n in sorted(por_numero)]
+    if calcular_etag(salas) != resposta["etag"]:
+        raise ValueError("Catálogo montado não confere com o ETag assinado.")
+    cab = {k: resposta[k] for k in ("versao", "etag", "gerado_em", "assinatura")}
+    return dict(cab, salas=salas)
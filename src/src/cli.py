@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 from datetime import datetime
 from tabulate import tabulate
@@ -8,11 +8,29 @@ import json
 from .models import Sala
 from .service import (
     find_sala, add_filme_to_sala, remove_filme_from_sala,
-    issue_ticket, filter_salas, initialize_state
+    issue_ticket, filter_salas, initialize_state, revoke_ticket, check_ticket, peek_ticket,
+    commit_ticket_use,
 )
-from .storage import encrypt_state, decrypt_state, STATE_FILE
-from .crypto_keys import generate_keys, load_public_key, verify_signature
-from .used_tickets import load_used_tickets, save_used_tickets
+from .catalog_io import importar_catalogo, exportar_catalogo, ImportacaoError
+from .event_log import EventLog
+from .expiry import VarredorExpiracao, varrer_estado
+from . import eventos
+from .busca import IndiceBusca
+from .holds import AgendaReservas, criar_reserva, confirmar_reserva
+from .arrendamento import PontoDeVenda
+from .reconciliacao import reconciliar
+from .contadores import ContadoresInventario
+from .disponibilidade import FeedDisponibilidade, SOCKET_PATH as FEED_SOCKET
+from .storage import (
+    encrypt_state, decrypt_state, STATE_FILE, TICKET_DIR,
+    ConflitoVersao, ler_estado_versionado, salvar_estado_cas, versao_estado,
+)
+from .mesclagem import mesclar_estados, aplicar_estado
+from .crypto_keys import generate_keys, carregar_chave_privada, chave_sem_senha, load_private_key
+from .catalogo_publico import CatalogoPublico
+from .used_tickets import default_store
+from .backends import SqliteBackend, StorageBackend, migrar_json_para_sqlite
+from .auth import PAPEIS, Sessao, criar_operador, existem_operadores, login
 from .utils import (
     salas_to_dict_state, dict_state_to_salas,
     input_numero_sala, input_idade_minima, input_data_futura,
@@ -20,9 +38,29 @@ from .utils import (
 )
 
 # Configuração de tickets
-TICKET_DIR = Path(__file__).resolve().parent.parent / "data" / "tickets"
 TICKET_DIR.mkdir(parents=True, exist_ok=True)
 
+# Backend alternativo (--backend sqlite); None = arquivos em data/
+_backend: Optional[StorageBackend] = None
+
+# Sessão do operador logado (quando há contas em data/operadores.json)
+_sessao: Optional[Sessao] = None
+
+# Venda com inventário arrendado (--arrendar-inventario); None = só o saldo do estado local
+_ponto_venda: Optional[PontoDeVenda] = None
+
+# Estado lido do state.enc e sua versão: base da mesclagem ao salvar (ver mesclagem.py)
+_leitura: Optional[tuple] = None
+# Tentativas de salvar quando outras instâncias gravam ao mesmo tempo
+TENTATIVAS_SALVAR = 5
+
+# Permissão exigida por opção do menu (ver auth.PAPEIS); opções ausentes são livres
+PERMISSOES_MENU = {
+    "2": "catalogo", "3": "catalogo", "4": "emitir", "6": "verificar", "7": "salvar",
+    "8": "resetar", "9": "emitir", "10": "emitir", "11": "cancelar", "12": "catalogo", "14": "verificar",
+    "16": "catalogo",
+}
+
 def get_filme(sala):
     return sala.filme if hasattr(sala, "filme") else sala["filme"]
 
@@ -95,21 +133,86 @@ def emitir(state: List[Sala]):
         return
 
     try:
-        ticket = issue_ticket(sala)
-        path = TICKET_DIR / f"ticket_{ticket['id']}.json"
-        ticket_json_output = ticket.copy()
-        ticket_json_output["assinatura"] = ticket["assinatura"]
-        path.write_text(
-            json.dumps(ticket_json_output, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
+        arrendamento = _ponto_venda.consumir(sala) if _ponto_venda is not None else None
+        try:
+            ticket = issue_ticket(sala)
+        except Exception:
+            if _ponto_venda is not None:
+                _ponto_venda.estornar(sala, 1, arrendamento)
+            raise
+        if _ponto_venda is not None:
+            _ponto_venda.vincular(ticket["id"], arrendamento)
+        path = salvar_ticket(ticket)
         print(f"🎟️ Ticket emitido para {sala.filme.nome} - Sala {numero}")
         print("Ticket gerado:", path)
     except Exception as e:
         print(f"❌ Erro ao emitir ticket: {e}")
 
-def verificar_ticket(state):
-    print("\n=== VERIFICAR TICKET ===")
+def salvar_ticket(ticket: dict) -> Path:
+    if _backend is not None:
+        _backend.save_ticket(ticket)
+    path = TICKET_DIR / f"ticket_{ticket['id']}.json"
+    ticket_json_output = ticket.copy()
+    ticket_json_output["assinatura"] = ticket["assinatura"]
+    path.write_text(
+        json.dumps(ticket_json_output, ensure_ascii=False, indent=2),
+        encoding="utf-8"
+    )
+    return path
+
+# Reservas (ingressos segurados enquanto o cliente paga)
+def reservar(state: List[Sala], agenda: AgendaReservas):
+    numero = input_numero_sala()
+    if numero is None: return
+
+    sala = find_sala(state, numero)
+    if not sala or sala.esta_vazia():
+        print("❌ Sala vazia ou inexistente.")
+        return
+
+    try:
+        quantidade = int(input("Quantidade de ingressos: ").strip())
+        arrendamento = _ponto_venda.consumir(sala, quantidade) if _ponto_venda is not None else None
+        try:
+            reserva_id = criar_reserva(sala, quantidade, agenda=agenda)
+        except ValueError:
+            if _ponto_venda is not None:
+                _ponto_venda.estornar(sala, quantidade, arrendamento)
+            raise
+        if _ponto_venda is not None:
+            _ponto_venda.vincular(reserva_id, arrendamento)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    print(f"⏳ Reserva {reserva_id} criada ({quantidade} ingresso(s) na Sala {numero}).")
+
+def confirmar(state: List[Sala]):
+    numero = input_numero_sala()
+    if numero is None: return
+
+    sala = find_sala(state, numero)
+    if not sala:
+        print("❌ Sala inexistente")
+        return
+
+    reserva_id = input("ID da reserva: ").strip()
+    reserva = sala.reservas.get(reserva_id)
+    arrendamento = _ponto_venda.origem(reserva_id) if _ponto_venda is not None else None
+    try:
+        tickets = confirmar_reserva(sala, reserva_id)
+    except Exception as e:
+        # Reserva vencida ou emissão falhou: os ingressos voltaram ao filme
+        if _ponto_venda is not None and reserva is not None:
+            _ponto_venda.estornar(sala, reserva["quantidade"], arrendamento)
+        print(f"❌ Erro ao confirmar reserva: {e}")
+        return
+    for ticket in tickets:
+        if _ponto_venda is not None:
+            _ponto_venda.vincular(ticket["id"], arrendamento)
+        print("Ticket gerado:", salvar_ticket(ticket))
+
+def ler_ticket_interativo():
+    """Lê um ticket colado (JSON) ou um caminho de arquivo. Retorna dict ou None."""
     print("Cole o ticket JSON (finalize com uma linha vazia) ou informe caminho do arquivo:")
     entrada = []
     while True:
@@ -118,21 +221,27 @@ def verificar_ticket(state):
         entrada.append(linha)
     if not entrada:
         print("Nenhum ticket informado.")
-        return
+        return None
 
     if len(entrada) == 1 and Path(entrada[0].strip()).exists():
         try:
             ticket_text = Path(entrada[0].strip()).read_text(encoding="utf-8")
         except Exception as e:
             print(f"❌ Falha ao ler o arquivo: {e}")
-            return
+            return None
     else:
         ticket_text = "\n".join(entrada)
 
     try:
-        ticket_obj = json.loads(ticket_text)
+        return json.loads(ticket_text)
     except Exception:
         print("❌ Ticket inválido: formato JSON incorreto.")
+        return None
+
+def verificar_ticket(state):
+    print("\n=== VERIFICAR TICKET ===")
+    ticket_obj = ler_ticket_interativo()
+    if ticket_obj is None:
         return
 
     obrigatorios = {"id", "sala", "filme", "emissao", "assinatura"}
@@ -140,33 +249,32 @@ def verificar_ticket(state):
         print("❌ Ticket inválido: campos obrigatórios ausentes.")
         return
 
-    sig_hex = ticket_obj.pop("assinatura", None)
-    if not sig_hex:
+    if not ticket_obj.get("assinatura"):
         print("❌ Ticket sem assinatura. INVÁLIDO.")
         return
 
+    # Assinatura avulsa ou de lote (prova de inclusão + raiz assinada)
     try:
-        payload = json.dumps(ticket_obj, sort_keys=True, ensure_ascii=False).encode()
-        sig = bytes.fromhex(sig_hex)
-        pub = load_public_key()
-        ok = verify_signature(pub, payload, sig)
+        ticket_obj = check_ticket(ticket_obj)
+    except ValueError:
+        print("❌ Assinatura inválida — ticket falsificado ou corrompido.")
+        return
     except Exception:
         print("❌ Falha na verificação da assinatura.")
         return
 
-    if not ok:
-        print("❌ Assinatura inválida — ticket falsificado ou corrompido.")
-        return
-
-    used = load_used_tickets()
-    ticket_id = ticket_obj.get("id")
-    if ticket_id in used:
-        print("❌ Ticket já foi utilizado anteriormente! Acesso NEGADO.")
+    # Mesmo caminho do verificador: evento TICKET_VERIFICADO (log de auditoria, cache de verificação)
+    try:
+        commit_ticket_use(ticket_obj, store=_backend or default_store())
+    except ValueError as e:
+        if str(e) == "Ticket cancelado.":
+            print("❌ Ticket cancelado/reembolsado! Acesso NEGADO.")
+        elif str(e) == "Ticket já utilizado.":
+            print("❌ Ticket já foi utilizado anteriormente! Acesso NEGADO.")
+        else:
+            print(f"❌ {e} Acesso NEGADO.")
         return
 
-    used.add(ticket_id)
-    save_used_tickets(used)
-
     print("\n=== Ticket VÁLIDO ===")
     print(f"ID: {ticket_obj.get('id')}")
     print(f"Filme: {ticket_obj.get('filme')}")
@@ -175,6 +283,67 @@ def verificar_ticket(state):
     print("Ticket agora registrado como utilizado (não pode ser reaproveitado).")
     print()
 
+def consultar_ticket(state):
+    """Confere autenticidade e situação do ticket sem registrá-lo como utilizado."""
+    print("\n=== CONSULTAR TICKET ===")
+    ticket_obj = ler_ticket_interativo()
+    if ticket_obj is None:
+        return
+    try:
+        r = peek_ticket(ticket_obj, store=_backend)
+    except Exception:
+        print("❌ Falha na verificação da assinatura.")
+        return
+    if not r["valido"]:
+        print(f"❌ Ticket INVÁLIDO: {r['erro']}")
+        return
+    situacao = "cancelado" if r["cancelado"] else "já utilizado" if r["usado"] else "não utilizado"
+    print(f"✅ Ticket autêntico — {r['filme']}, Sala {r['sala']} ({situacao}).")
+    print("O ticket NÃO foi consumido.")
+
+def buscar_filme(indice: IndiceBusca):
+    print("\n=== BUSCAR FILME ===")
+    consulta = input("Nome ou gênero (acentos opcionais): ").strip()
+    resultados = indice.buscar(consulta)
+    if not resultados:
+        print("\nNenhum filme encontrado.\n")
+        return
+    print("\n--- RESULTADOS ---")
+    for sala, _ in resultados:
+        filme = sala.filme
+        print(
+            f"Sala: {sala.numero} | Filme: {filme.nome} | Gênero: {filme.genero} | "
+            f"Saída: {converter_data_iso_para_br(filme.data_saida)} | Ingressos: {filme.ingressos}"
+        )
+
+def publicar_catalogo(state: List[Sala], chave=None):
+    """Publica o catálogo público (quiosques/site) assinado; pede a senha da chave se preciso."""
+    chave = chave or load_private_key()
+    if chave is None:
+        return
+    try:
+        versao = CatalogoPublico().publicar(state, chave)
+    except (OSError, ValueError, PermissionError) as e:
+        print(f"❌ Falha ao publicar catálogo: {e}")
+        return
+    if versao is None:
+        print("Catálogo público já está atualizado.")
+    else:
+        print(f"✅ Catálogo público publicado (versão {versao}).")
+
+def cancelar_ticket(state: List[Sala]):
+    print("\n=== CANCELAR TICKET ===")
+    ticket_obj = ler_ticket_interativo()
+    if ticket_obj is None:
+        return
+    try:
+        # Mesmo registro de usados que a verificação (SQLite com --backend sqlite)
+        versao = revoke_ticket(state, ticket_obj, store=_backend or default_store())
+    except Exception as e:
+        print(f"❌ Não foi possível cancelar: {e}")
+        return
+    print(f"✅ Ticket {ticket_obj.get('id')} cancelado (revogações v{versao}). Ingresso devolvido à Sala {ticket_obj.get('sala')}.")
+
 # Filtrar filmes
 def filtrar(state):
     print("\n=== FILTRAR FILMES ===")
@@ -225,37 +394,215 @@ def filtrar(state):
 
     print()
 
+# Importação / exportação em lote
+def importar(state: List[Sala]):
+    caminho = input("Arquivo para importar (.csv ou .jsonl): ").strip()
+    try:
+        total = importar_catalogo(state, Path(caminho))
+    except ImportacaoError as e:
+        print(f"❌ {e} Nenhuma sala foi alterada.")
+        for linha, msg in e.erros:
+            print(f"  linha {linha}: {msg}")
+        return
+    except (OSError, ValueError) as e:
+        print(f"❌ Falha na importação: {e}")
+        return
+    print(f"✅ {total} sala(s) atualizada(s). Salve o estado para persistir.")
+
+def exportar(state: List[Sala]):
+    caminho = input("Arquivo de destino (.csv ou .jsonl): ").strip()
+    try:
+        total = exportar_catalogo(state, Path(caminho))
+    except (OSError, ValueError) as e:
+        print(f"❌ Falha na exportação: {e}")
+        return
+    print(f"✅ {total} filme(s) exportado(s) para {caminho}.")
+
 # Reset de estado
-def resetar(state: List[Sala]):
-    if input("Confirma resetar para estado inicial? (S/N): ").lower() != "s": return
+def resetar(state: List[Sala]) -> bool:
+    """True se o estado foi resetado (as salas passam a ser objetos novos)."""
+    if input("Confirma resetar para estado inicial? (S/N): ").lower() != "s": return False
     state[:] = initialize_state()
     print("✅ Estado resetado.")
+    return True
 
 # Load / Save interativo
 def load_state_interactive() -> List[Sala]:
+    return _load_state_e_senha()[0]
+
+def _load_state_e_senha():
+    """Como load_state_interactive, mas também devolve a senha que abriu o estado (ou None)."""
+    global _leitura
+    if _sessao is not None:
+        data_dict, versao = ler_estado_versionado(_sessao.senha_estado)
+        state = dict_state_to_salas(data_dict) if data_dict else initialize_state()
+        _leitura = (salas_to_dict_state(state), versao)
+        return state, _sessao.senha_estado
     if not STATE_FILE.exists():
         print("Arquivo de estado não encontrado. Inicializando com salas padrão.")
-        return initialize_state()
+        state = initialize_state()
+        _leitura = (salas_to_dict_state(state), 0)
+        return state, None
 
     for _ in range(3):
         pwd = getpass("Senha para descriptografar estado: ")
         try:
-            data_dict = decrypt_state(pwd)
-            return dict_state_to_salas(data_dict)
+            data_dict, versao = ler_estado_versionado(pwd)
+            if data_dict is None:
+                raise ValueError("senha incorreta")
+            state = dict_state_to_salas(data_dict)
+            _leitura = (salas_to_dict_state(state), versao)
+            return state, pwd
         except Exception:
             print("❌ Falha ao descriptografar, tente novamente.")
     print("⚠️ Modo somente leitura com estado vazio.")
-    return initialize_state()
+    return initialize_state(), None
+
+def _abrir_sqlite_e_senha():
+    """Abre o banco SQLite (3 tentativas de senha). Retorna (state, senha) ou (estado vazio, None)."""
+    global _backend
+    for _ in range(3):
+        pwd = _sessao.senha_estado if _sessao else getpass("Senha do banco SQLite: ")
+        try:
+            _backend = SqliteBackend.abrir(pwd)
+        except ValueError as e:
+            print(f"❌ {e}")
+            continue
+        return _backend.load_state() or initialize_state(), pwd
+    print("⚠️ Modo somente leitura com estado vazio.")
+    return initialize_state(), None
+
+def migrar_para_sqlite():
+    pwd = getpass("Senha do estado atual (também será a do banco): ")
+    try:
+        resumo = migrar_json_para_sqlite(pwd)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    print(f"✅ Migrado: {resumo['salas']} sala(s), {resumo['tickets']} ticket(s), {resumo['usados']} ID(s) usado(s).")
+
+def abrir_log_eventos(state: List[Sala], senha: Optional[str], recuperar: bool = True):
+    """
+    Abre o log de eventos com a senha do estado e devolve (log, estado).
+    Com `recuperar`, os eventos não salvos de CLIs encerradas (queda, saída sem
+    salvar) são reaplicados ao estado lido, que continua sendo a base da mesclagem.
+    """
+    if not senha:
+        return None, state
+    try:
+        log = EventLog.abrir(senha, operador=_sessao.operador if _sessao else None)
+        aplicados = log.recuperar(state) if recuperar else 0
+    except ValueError as e:
+        print(f"⚠️ Log de eventos indisponível: {e}")
+        return None, state
+    if aplicados:
+        print(f"↺ {aplicados} evento(s) não salvo(s) reaplicado(s) a partir do log.")
+    log.anexar()
+    return log, state
 
 def save_state_interactive(state: List[Sala]):
-    pwd = getpass("Senha para criptografar estado: ")
+    """Salva o estado. Retorna as salas alteradas pela mesclagem, ou None se o state.enc não foi gravado."""
+    if _backend is not None:
+        try:
+            _backend.save_state(state)
+            print("✅ Estado salvo no banco.")
+        except Exception as e:
+            print(f"❌ Falha ao salvar estado: {e}")
+        return
+    pwd = _sessao.senha_estado if _sessao else getpass("Senha para criptografar estado: ")
     data_to_save = salas_to_dict_state(state)
     try:
-        encrypt_state(data_to_save, pwd)
+        trocadas = _salvar_com_mesclagem(state, data_to_save, pwd)
         print("✅ Estado salvo e criptografado com sucesso.")
+        return trocadas
     except Exception as e:
         print(f"❌ Falha ao salvar estado: {e}")
-
+    return None
+
+def _salvar_com_mesclagem(state: List[Sala], local: dict, pwd: str) -> List[Sala]:
+    """
+    Salva com compare-and-swap. Se outra instância salvou depois da nossa leitura,
+    mescla (três vias) com o que ela gravou, atualiza `state` e tenta de novo.
+    Retorna as salas cujo filme mudou por causa da mesclagem.
+    """
+    global _leitura
+    if _leitura is None:
+        # Nada foi lido nesta instância: gravação simples
+        encrypt_state(local, pwd)
+        _leitura = (local, versao_estado())
+        return []
+
+    base, versao = _leitura
+    trocadas = []
+    for _ in range(TENTATIVAS_SALVAR):
+        try:
+            _leitura = (local, salvar_estado_cas(local, pwd, versao))
+            return trocadas
+        except ConflitoVersao:
+            remoto, versao = ler_estado_versionado(pwd)
+            if remoto is None:
+                raise ValueError("Estado salvo por outra instância não pôde ser lido com esta senha.")
+            local, conflitos = mesclar_estados(base, local, remoto)
+            base = remoto
+            for c in conflitos:
+                print(f"⚠️ Conflito: {c}")
+            trocadas += aplicar_estado(state, local)
+            print("↻ Alterações de outra instância incorporadas.")
+    raise ValueError("Estado sendo salvo por outras instâncias; tente novamente.")
+
+
+# Expiração de filmes
+def relatar_expirados(removidos):
+    for r in removidos:
+        print(f"🗑️ Filme '{r['filme']}' removido da Sala {r['sala']} (saída em {converter_data_iso_para_br(r['data_saida'])}).")
+
+def varrer_expirados_uma_vez():
+    """Comando avulso: carrega o estado, remove filmes vencidos e salva."""
+    state, senha = _load_state_e_senha()
+    log, state = abrir_log_eventos(state, senha)
+    removidos = varrer_estado(state)
+    if not removidos:
+        print("Nenhum filme expirado.")
+        if log:
+            log.desanexar()
+        return
+    relatar_expirados(removidos)
+    if save_state_interactive(state) is not None and log:
+        log.marcar_salvo(_leitura[1])
+    if log:
+        log.desanexar()
+
+# Reconciliação
+def reconciliar_interativo():
+    """Comando avulso: confere tickets, saldo dos filmes e usados/cancelados e relata divergências."""
+    state, _ = _load_state_e_senha()
+    print("Conferindo tickets (assinaturas em paralelo)...")
+    try:
+        r = reconciliar(state)
+    except (OSError, ValueError) as e:
+        print(f"❌ Falha na reconciliação: {e}")
+        return
+    print(f"{r['arquivos']} ticket(s): {r['verificados']} verificado(s) agora, {r['do_checkpoint']} do checkpoint.")
+    print(tabulate(
+        [[s["sala"], s["filme"], s["capacidade"], s["emitidos"], s["restantes"], s["reservados"], s["excesso"]] for s in r["salas"]],
+        headers=["Sala", "Filme", "Capacidade", "Emitidos", "Restantes", "Reservados", "Excesso"],
+    ))
+    for s in r["excessos"]:
+        print(f"❌ Sala {s['sala']} ('{s['filme']}'): {s['excesso']} ingresso(s) além da capacidade.")
+    for t in r["invalidos"]:
+        print(f"❌ {t['arquivo']}: {t['erro']}")
+    for d in r["duplicados"]:
+        print(f"❌ ID {d['id']} em {len(d['arquivos'])} arquivos: {', '.join(d['arquivos'])}")
+    for rotulo, chave in (("usado sem ticket", "usados_orfaos"), ("cancelado sem ticket", "cancelados_orfaos"),
+                          ("usado e cancelado", "usados_e_cancelados")):
+        for ticket_id in r[chave]:
+            print(f"⚠️ ID {ticket_id}: {rotulo}.")
+    problemas = len(r["excessos"]) + len(r["invalidos"]) + len(r["duplicados"]) + len(r["usados_orfaos"]) \
+        + len(r["cancelados_orfaos"]) + len(r["usados_e_cancelados"])
+    if r["fora_de_cartaz"]:
+        print(f"{r['fora_de_cartaz']} ticket(s) de filmes que não estão mais em cartaz.")
+    if not problemas:
+        print("✅ Nenhuma divergência encontrada.")
 
 # Inicialização
 def init_app():
@@ -266,9 +613,135 @@ def init_app():
         encrypt_state(salas_to_dict_state(initialize_state()), getpass("Defina senha para criptografar estado: "))
         print("✅ Estado inicial salvo.")
 
+# Operadores
+def login_interativo() -> Optional[Sessao]:
+    """Login do operador (3 tentativas). Ativa a sessão: estado e chave sem novos prompts."""
+    global _sessao
+    for _ in range(3):
+        nome = input("Operador: ").strip()
+        try:
+            _sessao = login(nome, getpass("Senha: "))
+        except PermissionError as e:
+            print(f"❌ {e}")
+            continue
+        _sessao.ativar()
+        print(f"✅ Bem-vindo, {_sessao.operador} ({_sessao.papel}).")
+        return _sessao
+    return None
+
+def criar_operador_interativo():
+    """Cria uma conta. Havendo contas, exige login de um admin; a primeira conta é sempre admin."""
+    if existem_operadores():
+        if _sessao is None and login_interativo() is None:
+            return
+        if not _sessao.pode("operadores"):
+            print("❌ Apenas administradores podem criar operadores.")
+            return
+        papel = input(f"Papel ({'/'.join(PAPEIS)}): ").strip()
+        senha_estado = _sessao.senha_estado
+    else:
+        print("Nenhum operador cadastrado: criando o administrador.")
+        papel = "admin"
+        senha_estado = getpass("Senha do estado: ")
+        if STATE_FILE.exists() and decrypt_state(senha_estado) is None:
+            print("❌ Senha do estado incorreta.")
+            return
+
+    senha_chave = None
+    if "emitir" in PAPEIS.get(papel, ()):
+        senha_chave = getpass("Senha da chave privada: ")
+        try:
+            carregar_chave_privada(senha_chave)
+        except (ValueError, FileNotFoundError):
+            print("❌ Não foi possível desbloquear a chave privada com essa senha.")
+            return
+
+    nome = input("Nome do novo operador: ").strip()
+    senha = getpass("Senha do novo operador: ")
+    if senha != getpass("Repita a senha: "):
+        print("❌ As senhas não conferem.")
+        return
+    try:
+        print("Calibrando custo da senha...")
+        criar_operador(nome, senha, papel, senha_estado, senha_chave)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    print(f"✅ Operador '{nome}' criado ({papel}).")
+
 # Menu principal
-def menu_loop():
-    state = load_state_interactive()
+def menu_loop(backend: str = "json", arrendar_inventario: bool = False, feed_disponibilidade: bool = False,
+              contadores_mmap: bool = False):
+    global _ponto_venda
+    if existem_operadores() and _sessao is None and login_interativo() is None:
+        print("❌ Login não realizado.")
+        return
+    state, senha = _abrir_sqlite_e_senha() if backend == "sqlite" else _load_state_e_senha()
+    # No SQLite o log é só auditoria: o estado do banco não é sobrescrito
+    log, state = abrir_log_eventos(state, senha, recuperar=backend != "sqlite")
+    if arrendar_inventario:
+        _ponto_venda = PontoDeVenda()
+        # Cancelamentos (revoke_ticket) devolvem o ingresso ao inventário arrendado
+        eventos.registrar_ouvinte(_ponto_venda.ouvinte)
+    contadores = None
+    if contadores_mmap and backend == "json":
+        try:
+            contadores = ContadoresInventario.abrir()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Contadores de ingressos indisponíveis: {e}")
+        else:
+            if contadores is None:
+                print("⚠️ Contadores de ingressos em uso por outra instância: vendas só ficam gravadas ao salvar o estado.")
+        if contadores is not None:
+            # O que o log já recuperou não é reaplicado pelos contadores
+            recuperadas = log.sessoes_recuperadas if log else ()
+            for sala in contadores.aplicar(state, log.sessao if log else None, recuperadas):
+                print(f"↺ Sala {sala.numero}: saldo de vendas não salvas reaplicado ({sala.filme.ingressos} ingresso(s)).")
+            eventos.registrar_ouvinte(contadores.ouvinte)
+
+    def salvar(st):
+        trocadas = save_state_interactive(st)
+        for sala in trocadas or []:
+            varredor.agendar(sala)
+            indice.adicionar(sala)
+        if contadores is not None and trocadas is not None:
+            contadores.consolidar(st)
+        if log and trocadas is not None and _backend is None:
+            log.marcar_salvo(_leitura[1])
+        # Com a chave da sessão ou do agente, os quiosques recebem o saldo salvo sem prompt extra
+        chave = chave_sem_senha()
+        if chave is not None:
+            publicar_catalogo(st, chave)
+
+    def resetar_e_registrar(st):
+        nonlocal agenda, varredor
+        if not resetar(st):
+            return
+        for sala in st:
+            indice.adicionar(sala)
+        # Agenda e varredor guardam as salas antigas: reconstrói sobre as novas
+        agenda = AgendaReservas.from_state(st)
+        eventos.remover_ouvinte(varredor.ouvinte)
+        varredor = VarredorExpiracao.from_state(st)
+        eventos.registrar_ouvinte(varredor.ouvinte)
+
+    agenda = AgendaReservas.from_state(state)
+    varredor = VarredorExpiracao.from_state(state)
+    eventos.registrar_ouvinte(varredor.ouvinte)
+    indice = IndiceBusca.from_state(state)
+    eventos.registrar_ouvinte(indice.ouvinte)
+    feed = None
+    if feed_disponibilidade:
+        feed = FeedDisponibilidade.from_state(state)
+        eventos.registrar_ouvinte(feed.ouvinte)
+        try:
+            feed.rodar_em_segundo_plano()
+            print(f"📡 Feed de disponibilidade em {FEED_SOCKET}")
+        except OSError as e:
+            print(f"⚠️ Feed de disponibilidade indisponível: {e}")
+            eventos.remover_ouvinte(feed.ouvinte)
+            feed = None
+    relatar_expirados(varredor.varrer())
     opcoes = {
         "1": listar,
         "2": adicionar_filme,
@@ -276,8 +749,16 @@ def menu_loop():
         "4": emitir,
         "5": filtrar,
         "6": verificar_ticket,
-        "7": save_state_interactive,
-        "8": resetar,
+        "7": salvar,
+        "8": resetar_e_registrar,
+        "9": lambda st: reservar(st, agenda),
+        "10": confirmar,
+        "11": cancelar_ticket,
+        "12": importar,
+        "13": exportar,
+        "14": consultar_ticket,
+        "15": lambda st: buscar_filme(indice),
+        "16": publicar_catalogo,
     }
 
     while True:
@@ -290,12 +771,48 @@ def menu_loop():
         print("6 Verificar ticket")
         print("7 Salvar estado")
         print("8 Resetar estado")
+        print("9 Reservar ingressos")
+        print("10 Confirmar reserva")
+        print("11 Cancelar ticket")
+        print("12 Importar catálogo (CSV/JSONL)")
+        print("13 Exportar catálogo")
+        print("14 Consultar ticket (sem consumir)")
+        print("15 Buscar filme (nome ou gênero)")
+        print("16 Publicar catálogo público")
         print("0 Sair")
         op = input("Opção: ").strip()
 
+        # Heap: sem custo quando nada venceu
+        relatar_expirados(varredor.varrer())
+        for r in agenda.liberar_expiradas():
+            print(f"⌛ Reserva {r['id']} expirou: {r['quantidade']} ingresso(s) devolvido(s) à Sala {r['sala']}.")
+            if _ponto_venda is not None:
+                _ponto_venda.estornar(find_sala(state, r["sala"]), r["quantidade"], _ponto_venda.origem(r["id"]))
+        if _ponto_venda is not None:
+            _ponto_venda.devolver_vencidos()
+
         if op == "0":
             break
         elif op in opcoes:
+            if _sessao is not None and op in PERMISSOES_MENU and not _sessao.pode(PERMISSOES_MENU[op]):
+                print(f"❌ Operação não permitida para o papel '{_sessao.papel}'.")
+                continue
             opcoes[op](state)
         else:
             print("Opção inválida.")
+        if feed is not None:
+            # Reservas, reset e merge ao salvar não emitem eventos
+            feed.marcar_todas(state)
+        if contadores is not None:
+            contadores.gravar_todas(state)
+
+    if _ponto_venda is not None:
+        eventos.remover_ouvinte(_ponto_venda.ouvinte)
+        _ponto_venda.devolver_todos()
+    if contadores is not None:
+        eventos.remover_ouvinte(contadores.ouvinte)
+        contadores.fechar()
+    if log:
+        log.desanexar()
+    if _sessao is not None:
+        _sessao.encerrar()
@@ -0,0 +1,234 @@
+# src/contadores.py
+"""
+Contadores quentes de ingressos fora do estado criptografado.
+
+Sem eles, o saldo de uma venda só fica em disco depois de salvar o state.enc
+inteiro (PBKDF2 + AES de todo o catálogo). Aqui cada sala tem um slot de largura
+fixa num arquivo mapeado em memória (data/contadores.bin). A venda altera o slot no
+lugar: alguns microssegundos, sem reescrever o catálogo.
+
+Cada slot guarda o saldo atual e a base (o saldo que está no state.enc salvo). Ao
+abrir a CLI, a diferença atual - base é reaplicada sobre o estado lido (vendas que
+não chegaram a ser salvas). Ao salvar, o saldo entra no state.enc e a base passa
+a ser o atual. Como é uma diferença, saves de outras instâncias não são desfeitos.
+
+Cada slot tem duas cópias com número de sequência e CRC32. A gravação vai para a
+cópia mais antiga, então uma escrita interrompida nunca estraga a cópia válida.
+A escrita no mapa sobrevive a uma queda do processo. Já o msync (fsync), que cobre
+queda do sistema, é feito em lotes: a cada LOTE_FSYNC vendas ou INTERVALO_FSYNC
+segundos. Numa queda de energia, até um lote de vendas pode voltar ao saldo
+(--reconciliar aponta o excesso).
+
+O cabeçalho guarda a sessão do log de eventos (event_log.py) da CLI dona dos
+contadores. Se o log já recuperou essa sessão, as vendas não salvas dela já estão
+no estado lido: aplicar a diferença de novo as contaria duas vezes (o estado
+pode ter sido salvo por outra instância no meio, então comparar saldos não basta).
+
+Só uma CLI por vez usa o arquivo (lock em contadores.lock).
+"""
+import hashlib
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Collection, Dict, List, Optional
+
+from . import eventos
+from .arrendamento import identidade_filme
+from .locks import try_lock_file
+from .models import Sala
+
+CONTADORES_FILE = Path(__file__).resolve().parent.parent / "data" / "contadores.bin"
+
+LOTE_FSYNC = 64
+INTERVALO_FSYNC = 0.2
+
+_MAGICO = b"BILHCNT2"
+_CABECALHO = struct.Struct("<8sI8sI")   # mágico, nº de slots, sessão do log, crc
+_COPIA = struct.Struct("<IiiI12sI")   # sala, atual, base, seq, filme, crc
+_SLOT = 2 * _COPIA.size
+
+_EVENTOS_SALDO = {eventos.TICKET_EMITIDO, eventos.TICKET_REVOGADO, eventos.FILME_ADICIONADO, eventos.FILME_REMOVIDO}
+
+def _digest_filme(filme) -> bytes:
+    return hashlib.blake2b(identidade_filme(filme).encode(), digest_size=12).digest()
+
+
+class ContadoresInventario:
+    def __init__(self, f, lote_fsync: int = LOTE_FSYNC, intervalo_fsync: float = INTERVALO_FSYNC, trava=None):
+        self._f = f
+        self._trava = trava
+        self.lote_fsync = lote_fsync
+        self.intervalo_fsync = intervalo_fsync
+        self._mapa: Optional[mmap.mmap] = None
+        # numero -> [indice, seq, atual, base, filme]
+        self._slots: Dict[int, list] = {}
+        self._n = 0
+        self.sessao: Optional[str] = None
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+        self._mapear()
+
+    @classmethod
+    def abrir(cls, path: Path = None, **kw) -> Optional["ContadoresInventario"]:
+        """None se outra instância já usa o arquivo."""
+        path = Path(path or CONTADORES_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        trava = open(path.with_name(path.name + ".lock"), "a+b")
+        if not try_lock_file(trava):
+            trava.close()
+            return None
+        f = open(path, "r+b" if path.exists() else "w+b")
+        try:
+            return cls(f, trava=trava, **kw)
+        except Exception:
+            f.close()
+            trava.close()
+            raise
+
+    # Arquivo
+    def _mapear(self):
+        if os.fstat(self._f.fileno()).st_size < _CABECALHO.size:
+            self._f.truncate(_CABECALHO.size)
+            self._f.seek(0)
+            self._f.write(self._cabecalho(0, None))
+            self._f.flush()
+        self._mapa = mmap.mmap(self._f.fileno(), 0)
+        magico, n, sessao, crc = _CABECALHO.unpack_from(self._mapa, 0)
+        if magico != _MAGICO or crc != zlib.crc32(self._mapa[:_CABECALHO.size - 4]):
+            raise ValueError("Arquivo de contadores inválido.")
+        self.sessao = sessao.hex() if any(sessao) else None
+        self._n = min(n, (len(self._mapa) - _CABECALHO.size) // _SLOT)
+        self._slots = {}
+        for i in range(self._n):
+            copia = self._ler_slot(i)
+            if copia is not None:
+                self._slots[copia[0]] = [i, *copia[1:]]
+
+    @staticmethod
+    def _cabecalho(n: int, sessao: Optional[str]) -> bytes:
+        parcial = struct.pack("<8sI8s", _MAGICO, n, bytes.fromhex(sessao) if sessao else b"")
+        return parcial + struct.pack("<I", zlib.crc32(parcial))
+
+    def _ler_slot(self, i: int) -> Optional[tuple]:
+        """Cópia válida mais recente do slot: (sala, seq, atual, base, filme)."""
+        melhor = None
+        for k in range(2):
+            off = _CABECALHO.size + i * _SLOT + k * _COPIA.size
+            numero, atual, base, seq, filme, crc = _COPIA.unpack_from(self._mapa, off)
+            if crc != zlib.crc32(self._mapa[off:off + _COPIA.size - 4]) or seq == 0:
+                continue
+            if melhor is None or seq > melhor[1]:
+                melhor = (numero, seq, atual, base, filme)
+        return melhor
+
+    def _escrever(self, numero: int, atual: int, base: int, filme: bytes):
+        slot = self._slots.get(numero)
+        if slot is None:
+            # Slot novo no fim do arquivo; só entra no cabeçalho depois de gravado
+            tamanho = _CABECALHO.size + (self._n + 1) * _SLOT
+            if len(self._mapa) < tamanho:
+                self._mapa.close()
+                self._f.truncate(tamanho)
+                self._mapa = mmap.mmap(self._f.fileno(), 0)
+            slot = [self._n, 0]
+        i, seq = slot[0], slot[1] + 1
+        off = _CABECALHO.size + i * _SLOT + (seq % 2) * _COPIA.size
+        parcial = _COPIA.pack(numero, atual, base, seq, filme, 0)[:-4]
+        self._mapa[off:off + _COPIA.size] = parcial + struct.pack("<I", zlib.crc32(parcial))
+        self._slots[numero] = [i, seq, atual, base, filme]
+        if i == self._n:
+            self._n += 1
+            self._mapa[:_CABECALHO.size] = self._cabecalho(self._n, self.sessao)
+        self._pendentes += 1
+        if self._pendentes >= self.lote_fsync or time.monotonic() - self._ultimo_fsync >= self.intervalo_fsync:
+            self.sincronizar()
+
+    def sincronizar(self):
+        if self._pendentes:
+            self._mapa.flush()
+            self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def fechar(self):
+        self.sincronizar()
+        self._mapa.close()
+        self._f.close()
+        if self._trava:
+            self._trava.close()
+
+    # Saldo
+    def ler(self, numero: int) -> Optional[dict]:
+        slot = self._slots.get(numero)
+        if slot is None:
+            return None
+        return {"sala": numero, "atual": slot[2], "base": slot[3], "seq": slot[1]}
+
+    def gravar(self, sala: Sala):
+        """Grava o saldo atual da sala (no lugar; nada acontece se não mudou)."""
+        if sala.filme is None:
+            return
+        filme = _digest_filme(sala.filme)
+        slot = self._slots.get(sala.numero)
+        if slot is None or slot[4] != filme:
+            # Filme novo na sala: ainda não há saldo salvo para servir de base
+            self._escrever(sala.numero, sala.filme.ingressos, sala.filme.ingressos, filme)
+        elif slot[2] != sala.filme.ingressos:
+            self._escrever(sala.numero, sala.filme.ingressos, slot[3], filme)
+
+    def gravar_todas(self, state: List[Sala]):
+        for sala in state:
+            self.gravar(sala)
+
+    def aplicar(self, state: List[Sala], sessao: Optional[str] = None,
+                recuperadas: Collection[str] = ()) -> List[Sala]:
+        """
+        Na abertura: reaplica sobre o estado lido as vendas/cancelamentos não salvos
+        (atual - base) de cada filme. Retorna as salas cujo saldo mudou.
+
+        `recuperadas` são as sessões cujos eventos o log já aplicou ao estado; se a
+        dona dos contadores está entre elas, nada é reaplicado e o saldo lido vira a
+        nova base. `sessao` (a sessão do log desta CLI) passa a ser a dona.
+        """
+        ja_recuperada = self.sessao is not None and self.sessao in recuperadas
+        alteradas = []
+        for sala in state:
+            if sala.filme is None:
+                continue
+            filme = _digest_filme(sala.filme)
+            slot = self._slots.get(sala.numero)
+            lido = sala.filme.ingressos
+            if slot is None or slot[4] != filme or ja_recuperada:
+                if slot is None or slot[2] != lido or slot[3] != lido or slot[4] != filme:
+                    self._escrever(sala.numero, lido, lido, filme)
+            elif slot[2] != slot[3]:
+                sala.filme.ingressos = max(0, lido + slot[2] - slot[3])
+                self._escrever(sala.numero, sala.filme.ingressos, lido, filme)
+                alteradas.append(sala)
+        self._definir_sessao(sessao)
+        self.sincronizar()
+        return alteradas
+
+    def _definir_sessao(self, sessao: Optional[str]):
+        if sessao != self.sessao:
+            self.sessao = sessao
+            self._mapa[:_CABECALHO.size] = self._cabecalho(self._n, sessao)
+            self._pendentes += 1
+
+    def consolidar(self, state: List[Sala]):
+        """Depois de salvar o state.enc: o saldo salvo passa a ser a base."""
+        for sala in state:
+            if sala.filme is None:
+                continue
+            slot = self._slots.get(sala.numero)
+            if slot is None or slot[2] != sala.filme.ingressos or slot[3] != sala.filme.ingressos \
+                    or slot[4] != _digest_filme(sala.filme):
+                self._escrever(sala.numero, sala.filme.ingressos, sala.filme.ingressos, _digest_filme(sala.filme))
+        self.sincronizar()
+
+    def ouvinte(self, tipo: str, dados: dict):
+        """Para `eventos.registrar_ouvinte`."""
+        if tipo in _EVENTOS_SALDO and isinstance(dados.get("sala"), Sala):
+            self.gravar(dados["sala"])
@@ -4,6 +4,14 @@ from cryptography.hazmat.primitives import serialization, hashes
 from pathlib import Path
 import getpass
 
+# Chave privada já desbloqueada pela sessão do operador (auth.py); evita o prompt de senha
+_chave_sessao = None
+
+def definir_chave_sessao(private_key):
+    """Usada por auth.Sessao: None limpa a chave ao encerrar a sessão."""
+    global _chave_sessao
+    _chave_sessao = private_key
+
 def _rsa_dir() -> Path:
     # sobe de src/ para a raiz do projeto e usa data/rsa_keys
     root = Path(__file__).resolve().parents[1]
@@ -44,7 +52,23 @@ def generate_keys():
 
     print(f"Chaves geradas com sucesso! Arquivos: {priv_path} e {pub_path}")
 
+def carregar_chave_privada(senha: str):
+    """Desbloqueia a chave privada com `senha`. ValueError se a senha não confere."""
+    with open(_private_path(), "rb") as f:
+        return serialization.load_pem_private_key(f.read(), password=senha.encode())
+
+def chave_sem_senha():
+    """Chave da sessão ou do agente de assinatura; None se só daria para pedir a senha."""
+    if _chave_sessao is not None:
+        return _chave_sessao
+    # Agente de assinatura rodando no host: assina por ele, sem senha nem chave em memória
+    from .signing_agent import conectar_agente
+    return conectar_agente()
+
 def load_private_key():
+    chave = chave_sem_senha()
+    if chave is not None:
+        return chave
     priv_path = _private_path()
     try:
         with open(priv_path, "rb") as f:
@@ -0,0 +1,207 @@
+# src/disponibilidade.py
+"""
+Feed ao vivo da disponibilidade por sala (telões do saguão, outros vendedores).
+
+O feed é ouvinte de eventos.py: emissão, cancelamento e troca de filme gravam o
+saldo atual da sala num "pendente por sala" (o último valor vence). Um despachante
+asyncio espera uma janela curta (JANELA) depois da primeira mudança e envia só o
+saldo mais recente de cada sala alterada: uma rajada de 200 vendas vira poucas
+atualizações.
+
+Cada assinante tem o seu próprio pendente por sala. Um assinante lento recebe
+menos atualizações (as intermediárias se fundem), mas nunca segura a emissão nem
+os outros assinantes.
+
+Protocolo (socket Unix local, uma linha JSON por atualização):
+  ao conectar: o saldo atual de cada sala;
+  depois: {"sala", "filme", "ingressos", "reservados", "versao"} a cada mudança.
+"""
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from . import eventos
+from .models import Sala
+
+SOCKET_PATH = Path(__file__).resolve().parent.parent / "data" / "disponibilidade.sock"
+
+# Segundos entre a primeira mudança e o envio (quanto maior, mais mudanças por atualização)
+JANELA = 0.1
+
+_EVENTOS_SALDO = {eventos.TICKET_EMITIDO, eventos.TICKET_REVOGADO, eventos.FILME_ADICIONADO, eventos.FILME_REMOVIDO}
+
+def saldo(sala: Sala) -> dict:
+    filme = sala.filme
+    return {
+        "sala": sala.numero,
+        "filme": filme.nome if filme else None,
+        "ingressos": filme.ingressos if filme else 0,
+        "reservados": sum(r["quantidade"] for r in sala.reservas.values()),
+    }
+
+
+class Assinante:
+    """Fila de um assinante: no máximo uma atualização pendente por sala."""
+
+    def __init__(self):
+        self._pendentes: Dict[int, dict] = {}
+        self._sinal = asyncio.Event()
+        self.recebidas = 0
+        self.fundidas = 0
+
+    def entregar(self, atualizacoes: List[dict]):
+        for a in atualizacoes:
+            if a["sala"] in self._pendentes:
+                self.fundidas += 1
+            self._pendentes[a["sala"]] = a
+        self.recebidas += len(atualizacoes)
+        if self._pendentes:
+            self._sinal.set()
+
+    async def proximas(self) -> List[dict]:
+        """Espera e devolve as atualizações pendentes, uma por sala."""
+        await self._sinal.wait()
+        self._sinal.clear()
+        pendentes, self._pendentes = self._pendentes, {}
+        return sorted(pendentes.values(), key=lambda a: a["versao"])
+
+
+class FeedDisponibilidade:
+    def __init__(self, janela: float = JANELA):
+        self.janela = janela
+        self.versao = 0
+        self._ultimo: Dict[int, dict] = {}
+        self._sujas: Dict[int, dict] = {}
+        self._mutex = threading.Lock()
+        self._assinantes: Set[Assinante] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._acordar: Optional[asyncio.Event] = None
+        self._tarefa = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_state(cls, state: List[Sala], janela: float = JANELA) -> "FeedDisponibilidade":
+        feed = cls(janela)
+        for sala in state:
+            feed.versao += 1
+            feed._ultimo[sala.numero] = dict(saldo(sala), versao=feed.versao)
+        return feed
+
+    # Lado de quem altera o estado (qualquer thread): O(1), não espera o loop
+    def marcar(self, sala: Sala):
+        with self._mutex:
+            acordar = not self._sujas
+            self._sujas[sala.numero] = saldo(sala)
+        if acordar and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._acordar.set)
+            except RuntimeError:
+                pass  # loop já encerrado
+
+    def marcar_todas(self, state: List[Sala]):
+        """Para mudanças sem evento (reservas, reset, merge ao salvar): só as salas que mudaram são enviadas."""
+        for sala in state:
+            self.marcar(sala)
+
+    def ouvinte(self, tipo: str, dados: dict):
+        """Para `eventos.registrar_ouvinte`."""
+        if tipo in _EVENTOS_SALDO and isinstance(dados.get("sala"), Sala):
+            self.marcar(dados["sala"])
+
+    # Lado asyncio
+    def assinar(self) -> Assinante:
+        """Novo assinante; recebe de imediato o saldo atual de todas as salas."""
+        a = Assinante()
+        a.entregar(sorted(self._ultimo.values(), key=lambda s: s["sala"]))
+        self._assinantes.add(a)
+        return a
+
+    def cancelar(self, assinante: Assinante):
+        self._assinantes.discard(assinante)
+
+    async def _despachar(self):
+        while True:
+            await self._acordar.wait()
+            await asyncio.sleep(self.janela)
+            with self._mutex:
+                self._acordar.clear()
+                sujas, self._sujas = self._sujas, {}
+            atualizacoes = []
+            for numero, atual in sorted(sujas.items()):
+                anterior = self._ultimo.get(numero)
+                if anterior is not None and all(anterior[k] == v for k, v in atual.items()):
+                    continue
+                self.versao += 1
+                self._ultimo[numero] = dict(atual, versao=self.versao)
+                atualizacoes.append(self._ultimo[numero])
+            if atualizacoes:
+                for a in list(self._assinantes):
+                    a.entregar(atualizacoes)
+
+    async def iniciar(self):
+        self._loop = asyncio.get_running_loop()
+        self._acordar = asyncio.Event()
+        self._tarefa = asyncio.create_task(self._despachar())
+        with self._mutex:
+            if self._sujas:
+                self._acordar.set()
+
+    async def _atender(self, reader, writer):
+        a = self.assinar()
+        try:
+            while True:
+                atualizacoes = await a.proximas()
+                writer.write(b"".join(json.dumps(u, ensure_ascii=False).encode() + b"\n" for u in atualizacoes))
+                # Só esta conexão espera o cliente; enquanto isso as mudanças se fundem em `a`
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.cancelar(a)
+            writer.close()
+
+    async def servir(self, socket_path: Path = None):
+        """Publica o feed num socket Unix. Retorna o objeto asyncio.Server."""
+        socket_path = Path(socket_path or SOCKET_PATH)
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            socket_path.unlink()
+        server = await asyncio.start_unix_server(self._atender, path=str(socket_path))
+        os.chmod(socket_path, 0o600)
+        return server
+
+    async def parar(self, server=None):
+        if server:
+            server.close()
+        if self._tarefa:
+            self._tarefa.cancel()
+        self._loop = None
+
+    # Para a CLI (síncrona): loop próprio numa thread
+    def rodar_em_segundo_plano(self, socket_path: Path = None):
+        pronto = threading.Event()
+        erro = []
+
+        def _rodar():
+            async def principal():
+                try:
+                    await self.iniciar()
+                    server = await self.servir(socket_path)
+                except Exception as e:
+                    erro.append(e)
+                    return
+                finally:
+                    pronto.set()
+                async with server:
+                    await server.serve_forever()
+
+            asyncio.run(principal())
+
+        self._thread = threading.Thread(target=_rodar, name="feed-disponibilidade", daemon=True)
+        self._thread.start()
+        pronto.wait()
+        if erro:
+            raise erro[0]
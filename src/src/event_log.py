@@ -0,0 +1,329 @@
+# src/event_log.py
+import getpass
+import json
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from .locks import lock_file, try_lock_file, unlock_file
+from .models import Sala, Filme
+from .storage import derive_key
+from . import eventos
+
+EVENTS_DIR = Path(__file__).resolve().parent.parent / "data" / "events"
+
+MAGIC = b"BEVT1\n"
+
+_TAMANHO = struct.Struct(">I")   # tamanho do registro (nonce + ciphertext)
+_SEQ = struct.Struct(">Q")       # número de sequência, usado como AAD
+_VERIFICADOR = b"bilheteria-eventos"
+
+ESTADO_SALVO = "estado_salvo"
+# Eventos que alteram o estado (os demais são só auditoria)
+_ALTERAM_ESTADO = {eventos.FILME_ADICIONADO, eventos.FILME_REMOVIDO, eventos.TICKET_EMITIDO, eventos.TICKET_REVOGADO}
+
+def _aad_evento(seq: int) -> bytes:
+    return b"evento" + _SEQ.pack(seq)
+
+class EventLog:
+    """
+    Log append-only de eventos do service (filme adicionado/removido, ticket
+    emitido/verificado/revogado), cada registro criptografado com AES-GCM.
+
+    Formato de events.log: MAGIC, salt (16), nonce+ct do verificador de senha (46),
+    e registros [tamanho u32][nonce 12][ciphertext]. O número de sequência entra como
+    AAD: registros trocados de lugar ou removidos do meio falham na decifragem.
+
+    Recuperação (várias CLIs no mesmo log): cada instância é uma sessão, e eventos
+    de ticket guardam a variação do saldo (-1/+1), não o saldo absoluto. O arquivo
+    sessoes/<sessão>.pendente fica travado enquanto a sessão vive e aponta para o
+    primeiro evento dela ainda não salvo no state.enc (vazio depois de
+    `marcar_salvo`). `recuperar` aplica ao estado lido só os eventos pendentes de
+    sessões encerradas e assume essas sessões até o próximo salvamento.
+
+    O state.enc faz o papel de snapshot: cada salvamento zera as marcas, então a
+    inicialização só decifra a cauda a partir da marca pendente mais antiga, e
+    nunca o log inteiro.
+    """
+
+    def __init__(self, chave: bytes, base_dir: Path, operador: Optional[str] = None, fsync: bool = True):
+        self._aes = AESGCM(chave)
+        self.base_dir = Path(base_dir)
+        self.path = self.base_dir / "events.log"
+        self.operador = operador or getpass.getuser()
+        self.fsync = fsync
+        self.seq = 0
+        self.offset = 0
+        self.sessao = os.urandom(8).hex()
+        self._pendente = None   # arquivo da sessão (travado)
+        self._pendente_desde: Optional[int] = None
+        self._assumidas: Dict[str, object] = {}
+
+    # Abertura / cabeçalho
+    @classmethod
+    def abrir(cls, senha: str, base_dir: Optional[Path] = None, **kwargs) -> "EventLog":
+        """Abre (ou cria) o log. ValueError se a senha não confere."""
+        base_dir = Path(base_dir or EVENTS_DIR)
+        path = base_dir / "events.log"
+        if path.exists():
+            with open(path, "rb") as f:
+                header = f.read(len(MAGIC) + 16 + 12 + len(_VERIFICADOR) + 16)
+            if not header.startswith(MAGIC):
+                raise ValueError("Arquivo de eventos inválido.")
+            salt = header[len(MAGIC):len(MAGIC) + 16]
+            log = cls(derive_key(senha, salt), base_dir, **kwargs)
+            verificador = header[len(MAGIC) + 16:]
+            try:
+                log._aes.decrypt(verificador[:12], verificador[12:], MAGIC)
+            except Exception:
+                raise ValueError("Senha incorreta para o log de eventos.") from None
+        else:
+            salt = os.urandom(16)
+            log = cls(derive_key(senha, salt), base_dir, **kwargs)
+            base_dir.mkdir(parents=True, exist_ok=True)
+            nonce = os.urandom(12)
+            header = MAGIC + salt + nonce + log._aes.encrypt(nonce, _VERIFICADOR, MAGIC)
+            with open(path, "xb") as f:
+                f.write(header)
+                f.flush()
+                os.fsync(f.fileno())
+        log.offset = len(header)
+        with open(path, "rb") as f:
+            log._contar_cauda(f)
+        return log
+
+    def _contar_cauda(self, f, truncar: bool = False):
+        """Avança seq/offset sobre registros gravados por outros processos (sem decifrar)."""
+        size = os.fstat(f.fileno()).st_size
+        pos = self.offset
+        while pos + _TAMANHO.size <= size:
+            f.seek(pos)
+            (n,) = _TAMANHO.unpack(f.read(_TAMANHO.size))
+            if pos + _TAMANHO.size + n > size:
+                break
+            pos += _TAMANHO.size + n
+            self.seq += 1
+        self.offset = pos
+        if truncar and pos < size:
+            # Registro incompleto (queda no meio da escrita): descarta
+            f.truncate(pos)
+
+    # Escrita
+    def append(self, tipo: str, dados: dict) -> int:
+        registro_base = {
+            "tipo": tipo,
+            "em": datetime.now(timezone.utc).isoformat(),
+            "operador": self.operador,
+            "sessao": self.sessao,
+            "dados": dados,
+        }
+        with open(self.path, "r+b") as f:
+            lock_file(f)
+            try:
+                self._contar_cauda(f, truncar=True)
+                seq = self.seq + 1
+                if tipo in _ALTERAM_ESTADO and self._pendente is not None and self._pendente_desde is None:
+                    # Antes do evento: numa queda logo depois, a recuperação já sabe de onde ler
+                    self._gravar_pendente({"seq": seq, "offset": self.offset})
+                    self._pendente_desde = seq
+                registro = json.dumps({"seq": seq, **registro_base}, ensure_ascii=False).encode()
+                nonce = os.urandom(12)
+                ct = self._aes.encrypt(nonce, registro, _aad_evento(seq))
+                frame = _TAMANHO.pack(len(nonce) + len(ct)) + nonce + ct
+                f.seek(self.offset)
+                f.write(frame)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+                self.seq = seq
+                self.offset += len(frame)
+            finally:
+                unlock_file(f)
+        return seq
+
+    # Sessão
+    def _sessoes_dir(self) -> Path:
+        return self.base_dir / "sessoes"
+
+    def _gravar_pendente(self, marca: Optional[dict]):
+        f = self._pendente
+        f.seek(0)
+        f.truncate()
+        if marca:
+            f.write(json.dumps(marca).encode())
+        f.flush()
+        os.fsync(f.fileno())
+
+    def iniciar_sessao(self):
+        """Trava o arquivo da sessão: enquanto ela vive, ninguém recupera seus eventos."""
+        if self._pendente is not None:
+            return
+        self._sessoes_dir().mkdir(parents=True, exist_ok=True)
+        f = open(self._sessoes_dir() / f"{self.sessao}.pendente", "a+b")
+        lock_file(f)
+        self._pendente = f
+
+    def encerrar_sessao(self):
+        """Solta as travas. Com eventos não salvos, o arquivo fica para a próxima recuperação."""
+        for f in self._assumidas.values():
+            f.close()
+        self._assumidas = {}
+        if self._pendente is not None:
+            if self._pendente_desde is None:
+                (self._sessoes_dir() / f"{self.sessao}.pendente").unlink(missing_ok=True)
+            self._pendente.close()
+            self._pendente = None
+
+    def recuperar(self, state: List[Sala]) -> int:
+        """
+        Aplica a `state` (o estado salvo recém-lido) os eventos não salvos de sessões
+        encerradas. Retorna quantos eventos foram aplicados.
+        """
+        self.iniciar_sessao()
+        inicio: Dict[str, dict] = {}
+        for path in sorted(self._sessoes_dir().glob("*.pendente")):
+            sessao = path.stem
+            if sessao == self.sessao or sessao in self._assumidas:
+                continue
+            f = open(path, "r+b")
+            if not try_lock_file(f):
+                f.close()   # sessão viva: ela mesma salva o que é dela
+                continue
+            f.seek(0)
+            conteudo = f.read()
+            if not conteudo:
+                path.unlink(missing_ok=True)
+                f.close()
+                continue
+            inicio[sessao] = json.loads(conteudo)
+            self._assumidas[sessao] = f
+        if not inicio:
+            return 0
+
+        primeiro = min(inicio.values(), key=lambda m: m["seq"])
+        salas = {s.numero: s for s in state}
+        confirmadas = set()
+        aplicados = 0
+        for ev in self.ler(primeiro["offset"], primeiro["seq"] - 1):
+            marca = inicio.get(ev.get("sessao"))
+            if marca is None or ev["seq"] < marca["seq"] or ev["tipo"] not in _ALTERAM_ESTADO:
+                continue
+            aplicar_evento(salas, ev, confirmadas)
+            aplicados += 1
+        return aplicados
+
+    @property
+    def sessoes_recuperadas(self) -> List[str]:
+        """Sessões assumidas em `recuperar` (seus eventos não salvos já estão no estado)."""
+        return list(self._assumidas)
+
+    def marcar_salvo(self, versao: int):
+        """
+        Depois de gravar o state.enc: registra o salvamento e zera os pendentes desta
+        sessão e das sessões assumidas em `recuperar` (agora incluídos no estado).
+        """
+        self.append(ESTADO_SALVO, {"versao": versao, "sessoes": [self.sessao, *self._assumidas]})
+        if self._pendente is not None:
+            self._gravar_pendente(None)
+            self._pendente_desde = None
+        for sessao, f in self._assumidas.items():
+            (self._sessoes_dir() / f"{sessao}.pendente").unlink(missing_ok=True)
+            f.close()
+        self._assumidas = {}
+
+    # Leitura
+    def ler(self, offset: Optional[int] = None, seq_inicial: int = 0) -> Iterator[dict]:
+        """Decifra os eventos a partir de `offset` (que deve estar logo após o evento `seq_inicial`)."""
+        seq = seq_inicial
+        with open(self.path, "rb") as f:
+            f.seek(offset if offset is not None else self._inicio_registros())
+            while True:
+                cab = f.read(_TAMANHO.size)
+                if len(cab) < _TAMANHO.size:
+                    return
+                (n,) = _TAMANHO.unpack(cab)
+                corpo = f.read(n)
+                if len(corpo) < n:
+                    return
+                seq += 1
+                try:
+                    pt = self._aes.decrypt(corpo[:12], corpo[12:], _aad_evento(seq))
+                except Exception:
+                    raise ValueError(f"Log de eventos corrompido no evento {seq}.") from None
+                yield json.loads(pt)
+
+    def _inicio_registros(self) -> int:
+        return len(MAGIC) + 16 + 12 + len(_VERIFICADOR) + 16
+
+    # Integração com eventos.py
+    def anexar(self):
+        """Passa a registrar os eventos do service."""
+        eventos.registrar_ouvinte(self.ouvinte)
+
+    def desanexar(self):
+        eventos.remover_ouvinte(self.ouvinte)
+        self.encerrar_sessao()
+
+    def ouvinte(self, tipo: str, dados: dict):
+        self.append(tipo, _serializar(tipo, dados))
+
+
+def _serializar(tipo: str, dados: dict) -> dict:
+    """Converte os objetos enviados pelo service em dados JSON do evento."""
+    sala = dados.get("sala")
+    if tipo == eventos.FILME_ADICIONADO:
+        return {"sala": sala.numero, "filme": dados["filme"].to_dict()}
+    if tipo == eventos.FILME_REMOVIDO:
+        return {"sala": sala.numero, "filme": dados["filme"].nome}
+    if tipo == eventos.TICKET_EMITIDO:
+        t = dados["ticket"]
+        out = {"sala": sala.numero, "ticket_id": t["id"], "filme": t["filme"], "ingressos": sala.filme.ingressos}
+        if dados.get("reserva"):
+            # O desconto foi feito pela reserva, que pode não estar no estado salvo
+            out.update(delta=-1, reserva=dados["reserva"])
+        else:
+            out["delta"] = 0 if dados.get("reservado") else -1
+        return out
+    if tipo == eventos.TICKET_VERIFICADO:
+        return {"sala": dados.get("sala_numero"), "ticket_id": dados["ticket_id"]}
+    if tipo == eventos.TICKET_REVOGADO:
+        out = {"ticket_id": dados["ticket_id"], "sala": None}
+        if sala is not None and sala.filme:
+            out.update(sala=sala.numero, filme=sala.filme.nome, ingressos=sala.filme.ingressos, delta=1)
+        return out
+    return {k: v for k, v in dados.items() if isinstance(v, (str, int, float, bool, type(None)))}
+
+def aplicar_evento(salas: Dict[int, Sala], ev: dict, confirmadas: Optional[set] = None):
+    """
+    Reaplica um evento ao estado. Eventos de ticket aplicam a variação do saldo
+    ("delta"), então eventos de várias sessões se somam. Ticket de reserva que
+    está no estado não desconta de novo: a reserva sai do estado e seu ID vai para
+    `confirmadas` (os demais tickets da mesma reserva). Eventos antigos, só com o
+    saldo absoluto ("ingressos"), ainda são aceitos.
+    """
+    tipo, d = ev["tipo"], ev["dados"]
+    sala = salas.get(d.get("sala"))
+    if sala is None:
+        return
+    if tipo == eventos.FILME_ADICIONADO:
+        sala.adicionar_filme(Filme.from_dict(d["filme"]))
+    elif tipo == eventos.FILME_REMOVIDO:
+        sala.remover_filme()
+    elif tipo in (eventos.TICKET_EMITIDO, eventos.TICKET_REVOGADO):
+        if not sala.filme or d.get("filme", sala.filme.nome) != sala.filme.nome:
+            return
+        if "delta" not in d:
+            if "ingressos" in d:
+                sala.filme.ingressos = d["ingressos"]
+            return
+        confirmadas = set() if confirmadas is None else confirmadas
+        reserva = d.get("reserva")
+        if reserva is not None and (reserva in sala.reservas or reserva in confirmadas):
+            sala.reservas.pop(reserva, None)
+            confirmadas.add(reserva)
+            return
+        sala.filme.ingressos = max(0, sala.filme.ingressos + d["delta"])
@@ -0,0 +1,30 @@
+# src/eventos.py
+from typing import Callable, List
+
+# Tipos de evento emitidos pelo service
+FILME_ADICIONADO = "filme_adicionado"
+FILME_REMOVIDO = "filme_removido"
+TICKET_EMITIDO = "ticket_emitido"
+TICKET_VERIFICADO = "ticket_verificado"
+TICKET_REVOGADO = "ticket_revogado"
+
+Ouvinte = Callable[[str, dict], None]
+
+_ouvintes: List[Ouvinte] = []
+
+def registrar_ouvinte(fn: Ouvinte):
+    """Registra `fn(tipo, dados)` para ser chamado a cada evento do service."""
+    if fn not in _ouvintes:
+        _ouvintes.append(fn)
+
+def remover_ouvinte(fn: Ouvinte):
+    if fn in _ouvintes:
+        _ouvintes.remove(fn)
+
+def emitir(tipo: str, **dados):
+    """Notifica os ouvintes. Falha de um ouvinte não interrompe a operação que emitiu o evento."""
+    for fn in list(_ouvintes):
+        try:
+            fn(tipo, dados)
+        except Exception as e:
+            print(f"⚠️ Falha ao processar evento '{tipo}': {e}")
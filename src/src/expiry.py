@@ -0,0 +1,89 @@
+# src/expiry.py
+import heapq
+import itertools
+import threading
+from datetime import date, datetime
+from typing import Callable, List, Dict, Any, Optional
+
+from .models import Sala
+from .service import remove_filme_from_sala
+from . import eventos
+
+# Intervalo padrão da varredura em processos de longa duração (segundos)
+INTERVALO_PADRAO = 60 * 60
+
+class VarredorExpiracao:
+    """
+    Remove das salas os filmes cuja data de saída já passou.
+
+    Mantém um min-heap de (data_saida, seq, sala, filme). Cada varredura retira
+    só as entradas vencidas: O(k log n) para k filmes expirados, sem percorrer
+    as salas. Entradas de filmes substituídos/removidos são descartadas ao sair
+    do heap (o filme da sala deixou de ser o mesmo objeto).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_state(cls, state: List[Sala]) -> "VarredorExpiracao":
+        v = cls()
+        v._heap = [(s.filme.data_saida, next(v._seq), s, s.filme) for s in state if s.filme]
+        heapq.heapify(v._heap)
+        return v
+
+    def __len__(self):
+        return len(self._heap)
+
+    def agendar(self, sala: Sala):
+        if sala.filme:
+            heapq.heappush(self._heap, (sala.filme.data_saida, next(self._seq), sala, sala.filme))
+
+    def ouvinte(self, tipo: str, dados: dict):
+        """Para `eventos.registrar_ouvinte`: agenda cada filme adicionado."""
+        if tipo == eventos.FILME_ADICIONADO:
+            self.agendar(dados["sala"])
+
+    def proxima_saida(self) -> Optional[str]:
+        return self._heap[0][0] if self._heap else None
+
+    def varrer(self, hoje: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Remove os filmes com data de saída anterior a `hoje` e retorna o que foi removido."""
+        hoje_iso = (hoje or datetime.now().date()).isoformat()
+        removidos = []
+        while self._heap and self._heap[0][0] < hoje_iso:
+            data_saida, _, sala, filme = heapq.heappop(self._heap)
+            if sala.filme is not filme:
+                continue
+            remove_filme_from_sala(sala)
+            removidos.append({"sala": sala.numero, "filme": filme.nome, "data_saida": data_saida})
+        return removidos
+
+
+def varrer_estado(state: List[Sala], hoje: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Varredura avulsa (comando único / inicialização)."""
+    return VarredorExpiracao.from_state(state).varrer(hoje)
+
+def iniciar_varredura_periodica(
+    varredor: VarredorExpiracao,
+    lock: threading.Lock,
+    intervalo: float = INTERVALO_PADRAO,
+    ao_remover: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> threading.Event:
+    """
+    Roda `varredor.varrer()` a cada `intervalo` segundos numa thread daemon,
+    segurando `lock` (o mesmo que protege o estado no processo).
+    Retorna um Event: `set()` encerra a thread.
+    """
+    parar = threading.Event()
+
+    def _loop():
+        while not parar.wait(intervalo):
+            with lock:
+                removidos = varredor.varrer()
+            if removidos and ao_remover:
+                ao_remover(removidos)
+
+    threading.Thread(target=_loop, name="varredura-expiracao", daemon=True).start()
+    return parar
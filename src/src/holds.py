@@ -0,0 +1,117 @@
+# src/holds.py
+import heapq
+import time
+import uuid
+from typing import List, Optional, Dict, Any, Tuple
+
+from .models import Sala
+from .service import issue_tickets_lote
+
+# Tempo padrão de uma reserva enquanto o cliente paga (segundos)
+TTL_PADRAO = 10 * 60
+
+class AgendaReservas:
+    """
+    Índice de expiração das reservas: min-heap de (expira_em, reserva_id, sala).
+    As reservas em si ficam em `Sala.reservas` (e portanto no estado salvo);
+    a agenda é só um índice e pode ser reconstruída com `from_state`.
+    Entradas de reservas já confirmadas/canceladas são descartadas ao sair do heap.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str, Sala]] = []
+
+    @classmethod
+    def from_state(cls, state: List[Sala]) -> "AgendaReservas":
+        agenda = cls()
+        agenda._heap = [
+            (r["expira_em"], rid, sala)
+            for sala in state
+            for rid, r in sala.reservas.items()
+        ]
+        heapq.heapify(agenda._heap)
+        return agenda
+
+    def agendar(self, sala: Sala, reserva_id: str, expira_em: float):
+        heapq.heappush(self._heap, (expira_em, reserva_id, sala))
+
+    def proxima_expiracao(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def liberar_expiradas(self, agora: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Devolve ao filme os ingressos das reservas vencidas.
+        Custa O(log n) por entrada retirada do heap; nada é varrido se nada venceu.
+        """
+        agora = time.time() if agora is None else agora
+        liberadas = []
+        while self._heap and self._heap[0][0] <= agora:
+            expira_em, rid, sala = heapq.heappop(self._heap)
+            reserva = sala.reservas.get(rid)
+            # Já confirmada/cancelada, ou reagendada com outro prazo
+            if reserva is None or reserva["expira_em"] != expira_em:
+                continue
+            del sala.reservas[rid]
+            if sala.filme:
+                sala.filme.ingressos += reserva["quantidade"]
+            liberadas.append({"id": rid, "sala": sala.numero, "quantidade": reserva["quantidade"]})
+        return liberadas
+
+
+def criar_reserva(
+    sala: Sala,
+    quantidade: int = 1,
+    ttl: float = TTL_PADRAO,
+    agenda: Optional[AgendaReservas] = None,
+    agora: Optional[float] = None,
+) -> str:
+    """Segura `quantidade` ingressos por `ttl` segundos. Retorna o ID da reserva."""
+    if sala.esta_vazia():
+        raise ValueError("Sala vazia ou inexistente.")
+    if quantidade <= 0:
+        raise ValueError("Quantidade inválida.")
+    if sala.filme.ingressos < quantidade:
+        raise ValueError("Ingressos insuficientes.")
+
+    agora = time.time() if agora is None else agora
+    reserva_id = uuid.uuid4().hex
+    expira_em = agora + ttl
+
+    sala.filme.ingressos -= quantidade
+    sala.reservas[reserva_id] = {"quantidade": quantidade, "expira_em": expira_em}
+    if agenda is not None:
+        agenda.agendar(sala, reserva_id, expira_em)
+    return reserva_id
+
+def cancelar_reserva(sala: Sala, reserva_id: str):
+    """Desiste da reserva e devolve os ingressos ao filme."""
+    reserva = sala.reservas.pop(reserva_id, None)
+    if reserva is None:
+        raise ValueError("Reserva inexistente ou expirada.")
+    if sala.filme:
+        sala.filme.ingressos += reserva["quantidade"]
+
+def confirmar_reserva(sala: Sala, reserva_id: str, agora: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Converte a reserva em tickets assinados (sem descontar o inventário de novo).
+    Os tickets da reserva saem num lote com uma única assinatura (ver merkle.py).
+    Se a emissão falhar, os ingressos voltam ao filme.
+    """
+    agora = time.time() if agora is None else agora
+    reserva = sala.reservas.get(reserva_id)
+    if reserva is None:
+        raise ValueError("Reserva inexistente ou expirada.")
+    if reserva["expira_em"] <= agora:
+        cancelar_reserva(sala, reserva_id)
+        raise ValueError("Reserva expirada.")
+
+    del sala.reservas[reserva_id]
+    try:
+        return issue_tickets_lote(sala, reserva["quantidade"], reservado=True, reserva=reserva_id)
+    except Exception:
+        if sala.filme:
+            sala.filme.ingressos += reserva["quantidade"]
+        raise
@@ -0,0 +1,165 @@
+# src/ids.py
+"""
+IDs de ticket compactos e ordenáveis por tempo (no estilo Snowflake).
+
+64 bits: | 0 | instante 41 bits (ms desde EPOCA) | nó 10 bits | sequência 12 bits |
+Texto: 13 caracteres em base32 Crockford, de largura fixa, então a ordem das
+strings é a ordem numérica (e cronológica). Ex.: "01J5Z3K7M2Q0G".
+
+O nó é | host 5 bits | processo 5 bits |. O host vem de data/ids/host (0 se não
+existe; cada máquina que emite tickets precisa de um número diferente) e o
+processo é um slot reservado com flock em data/ids/, mantido enquanto o processo
+vive: várias instâncias da CLI no mesmo host nunca geram o mesmo ID.
+
+Dentro do nó os IDs são estritamente crescentes: com o relógio voltando para
+trás, ou mais de 4096 IDs no mesmo milissegundo, o gerador segue a partir do
+último instante usado.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .locks import try_lock_file
+
+IDS_DIR = Path(__file__).resolve().parent.parent / "data" / "ids"
+
+EPOCA = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_EPOCA_MS = int(EPOCA.timestamp() * 1000)
+
+BITS_INSTANTE = 41
+BITS_HOST = 5
+BITS_PROCESSO = 5
+BITS_NO = BITS_HOST + BITS_PROCESSO
+BITS_SEQUENCIA = 12
+MAX_NO = (1 << BITS_NO) - 1
+MAX_SEQUENCIA = (1 << BITS_SEQUENCIA) - 1
+
+TAMANHO_TEXTO = 13
+_ALFABETO = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Só a grafia canônica: o registro de usados compara o ID como texto
+_VALOR = {c: i for i, c in enumerate(_ALFABETO)}
+
+def codificar(n: int) -> str:
+    chars = []
+    for _ in range(TAMANHO_TEXTO):
+        chars.append(_ALFABETO[n & 31])
+        n >>= 5
+    return "".join(reversed(chars))
+
+def decodificar(texto: str) -> int:
+    """ValueError se `texto` não é um ID compacto."""
+    if not isinstance(texto, str) or len(texto) != TAMANHO_TEXTO:
+        raise ValueError("ID compacto inválido.")
+    n = 0
+    for c in texto:
+        v = _VALOR.get(c)
+        if v is None:
+            raise ValueError("ID compacto inválido.")
+        n = (n << 5) | v
+    if n >> 63:
+        raise ValueError("ID compacto inválido.")
+    return n
+
+def eh_id_compacto(texto) -> bool:
+    try:
+        decodificar(texto)
+        return True
+    except ValueError:
+        return False
+
+def decompor(texto: str) -> Tuple[datetime, int, int]:
+    """(instante UTC, nó, sequência) de um ID compacto."""
+    n = decodificar(texto)
+    ms = n >> (BITS_NO + BITS_SEQUENCIA)
+    no = (n >> BITS_SEQUENCIA) & MAX_NO
+    return EPOCA + timedelta(milliseconds=ms), no, n & MAX_SEQUENCIA
+
+def instante(texto: str) -> datetime:
+    return decompor(texto)[0]
+
+def limite_inferior(quando: datetime) -> str:
+    """Menor ID possível no instante `quando`: limite para buscas por intervalo."""
+    ms = max(0, (quando - EPOCA) // timedelta(milliseconds=1))
+    return codificar(ms << (BITS_NO + BITS_SEQUENCIA))
+
+
+class GeradorIds:
+    def __init__(self, no: int):
+        if not 0 <= no <= MAX_NO:
+            raise ValueError(f"Nó deve estar entre 0 e {MAX_NO}.")
+        self.no = no
+        self._ultimo_ms = -1
+        self._sequencia = 0
+        self._mutex = threading.Lock()
+
+    def _agora_ms(self) -> int:
+        return int(time.time() * 1000) - _EPOCA_MS
+
+    def proximo(self) -> int:
+        with self._mutex:
+            ms = max(self._agora_ms(), self._ultimo_ms)
+            if ms == self._ultimo_ms:
+                self._sequencia += 1
+                if self._sequencia > MAX_SEQUENCIA:
+                    # Sequência esgotada: usa o próximo milissegundo
+                    ms += 1
+                    self._sequencia = 0
+            else:
+                self._sequencia = 0
+            self._ultimo_ms = ms
+            return (ms << (BITS_NO + BITS_SEQUENCIA)) | (self.no << BITS_SEQUENCIA) | self._sequencia
+
+    def novo_id(self) -> str:
+        return codificar(self.proximo())
+
+
+def _host_id(base_dir: Path) -> int:
+    path = base_dir / "host"
+    if not path.exists():
+        return 0
+    host = int(path.read_text(encoding="utf-8").strip())
+    if not 0 <= host < (1 << BITS_HOST):
+        raise ValueError(f"ID do host em {path} deve estar entre 0 e {(1 << BITS_HOST) - 1}.")
+    return host
+
+def reservar_no(base_dir: Path = None):
+    """
+    (nó, arquivo de lock aberto). O slot fica reservado enquanto o arquivo
+    estiver aberto; o SO libera o lock quando o processo termina.
+    """
+    base_dir = Path(base_dir or IDS_DIR)
+    base_dir.mkdir(parents=True, exist_ok=True)
+    host = _host_id(base_dir)
+    for slot in range(1 << BITS_PROCESSO):
+        f = open(base_dir / f"processo_{slot:02d}.lock", "a+b")
+        if try_lock_file(f):
+            return (host << BITS_PROCESSO) | slot, f
+        f.close()
+    raise ValueError(f"Todos os {1 << BITS_PROCESSO} slots de processo do host {host} estão em uso.")
+
+
+_gerador: Optional[GeradorIds] = None
+_reserva = None
+_mutex = threading.Lock()
+
+def gerador_padrao() -> GeradorIds:
+    global _gerador, _reserva
+    with _mutex:
+        if _gerador is None:
+            no, _reserva = reservar_no()
+            _gerador = GeradorIds(no)
+        return _gerador
+
+def _apos_fork():
+    # Processo filho herda o gerador, mas não o lock do slot: reserva o seu
+    global _gerador, _reserva, _mutex
+    _gerador, _reserva, _mutex = None, None, threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+def novo_id() -> str:
+    return gerador_padrao().novo_id()
@@ -0,0 +1,61 @@
+# src/locks.py
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_file(f, shared: bool = False):
+    """Bloqueia (de forma bloqueante) o arquivo aberto `f` entre processos."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    else:
+        # msvcrt só tem lock exclusivo; trava o primeiro byte do arquivo
+        pos = f.tell()
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        f.seek(pos)
+
+
+def try_lock_file(f) -> bool:
+    """Lock exclusivo sem esperar: False se outro processo já tem o lock."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        pos = f.tell()
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        f.seek(pos)
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False):
+    """
+    Lock consultivo entre processos usando um arquivo auxiliar (ex.: state.enc.lock).
+    O arquivo de lock nunca é apagado, para não criar corrida entre quem cria e quem trava.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        lock_file(f, shared=shared)
+        try:
+            yield f
+        finally:
+            unlock_file(f)
+
@@ -1,14 +1,37 @@
 import argparse
-from .cli import init_app, menu_loop
+from .cli import (
+    init_app, menu_loop, varrer_expirados_uma_vez, migrar_para_sqlite, criar_operador_interativo,
+    reconciliar_interativo,
+)
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--init", action="store_true", help="Inicializar app (gerar chaves e senha)")
+    parser.add_argument("--varrer-expirados", action="store_true", help="Remover filmes com data de saída vencida e sair")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json", help="Armazenamento do estado e dos tickets")
+    parser.add_argument("--migrar-sqlite", action="store_true", help="Copiar estado, tickets e usados atuais para o SQLite e sair")
+    parser.add_argument("--reconciliar", action="store_true", help="Conferir tickets, saldo dos filmes e usados e sair")
+    parser.add_argument("--arrendar-inventario", action="store_true", help="Vender por blocos arrendados do coordenador (vários pontos de venda)")
+    parser.add_argument("--feed-disponibilidade", action="store_true", help="Publicar o saldo das salas ao vivo em data/disponibilidade.sock")
+    parser.add_argument("--contadores", action="store_true", help="Gravar o saldo de ingressos a cada venda em data/contadores.bin (sem reescrever o state.enc)")
+    parser.add_argument("--criar-operador", action="store_true", help="Cadastrar operador (o primeiro é o administrador)")
     args = parser.parse_args()
     if args.init:
         init_app()
         return
-    menu_loop()
+    if args.varrer_expirados:
+        varrer_expirados_uma_vez()
+        return
+    if args.reconciliar:
+        reconciliar_interativo()
+        return
+    if args.criar_operador:
+        criar_operador_interativo()
+        return
+    if args.migrar_sqlite:
+        migrar_para_sqlite()
+        return
+    menu_loop(args.backend, args.arrendar_inventario, args.feed_disponibilidade, args.contadores)
 
 if __name__=="__main__":
     main()
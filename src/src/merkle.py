@@ -0,0 +1,102 @@
+# src/merkle.py
+"""
+Assinatura em lote: os payloads de um grupo de tickets viram folhas de uma
+árvore de Merkle (SHA-256) e só a raiz recebe a assinatura RSA. Cada ticket
+leva a raiz e a prova de inclusão; o verificador recalcula a raiz a partir da
+prova e só confere a assinatura RSA na primeira vez que vê aquela raiz.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+# Prefixos distintos para folha e nó interno: uma folha nunca se passa por nó
+_FOLHA = b"\x00"
+_NO = b"\x01"
+# A assinatura cobre este prefixo + raiz, nunca um payload JSON de ticket avulso
+PREFIXO_RAIZ = b"bilheteria-lote-v1:"
+
+# Raízes já verificadas mantidas em memória
+CACHE_RAIZES_MAX = 4096
+
+def hash_folha(payload: bytes) -> bytes:
+    return hashlib.sha256(_FOLHA + payload).digest()
+
+def _hash_no(esq: bytes, dir: bytes) -> bytes:
+    return hashlib.sha256(_NO + esq + dir).digest()
+
+def construir(folhas: List[bytes]) -> Tuple[bytes, List[List[List[str]]]]:
+    """
+    Retorna (raiz, provas). A prova de cada folha é uma lista de [lado, hash hex],
+    da folha para a raiz; lado "E" = irmão à esquerda, "D" = à direita.
+    Nó sem par sobe sem ser duplicado.
+    """
+    if not folhas:
+        raise ValueError("Lote vazio.")
+    provas = [[] for _ in folhas]
+    # posicoes[i] = índices das folhas que estão sob o nó i do nível atual
+    nivel = list(folhas)
+    posicoes = [[i] for i in range(len(folhas))]
+    while len(nivel) > 1:
+        prox, prox_pos = [], []
+        for i in range(0, len(nivel) - 1, 2):
+            esq, dir = nivel[i], nivel[i + 1]
+            for f in posicoes[i]:
+                provas[f].append(["D", dir.hex()])
+            for f in posicoes[i + 1]:
+                provas[f].append(["E", esq.hex()])
+            prox.append(_hash_no(esq, dir))
+            prox_pos.append(posicoes[i] + posicoes[i + 1])
+        if len(nivel) % 2:
+            prox.append(nivel[-1])
+            prox_pos.append(posicoes[-1])
+        nivel, posicoes = prox, prox_pos
+    return nivel[0], provas
+
+def raiz_da_prova(folha: bytes, prova: List[List[str]]) -> bytes:
+    atual = folha
+    try:
+        for lado, irmao_hex in prova:
+            irmao = bytes.fromhex(irmao_hex)
+            if lado == "E":
+                atual = _hash_no(irmao, atual)
+            elif lado == "D":
+                atual = _hash_no(atual, irmao)
+            else:
+                raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError("Prova de inclusão malformada.") from None
+    return atual
+
+
+class CacheRaizes:
+    """LRU de (chave pública, raiz, assinatura) já verificados. Seguro entre threads."""
+
+    def __init__(self, maximo: int = CACHE_RAIZES_MAX):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._mutex = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def contem(self, chave) -> bool:
+        with self._mutex:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return True
+            self.falhas += 1
+            return False
+
+    def adicionar(self, chave):
+        with self._mutex:
+            self._itens[chave] = True
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._mutex:
+            self._itens.clear()
+
+cache_raizes = CacheRaizes()
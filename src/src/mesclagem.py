@@ -0,0 +1,108 @@
+# src/mesclagem.py
+"""
+Mesclagem de três vias do estado (formato de salas_to_dict_state), usada quando
+outra instância da CLI salvou o state.enc depois da nossa leitura.
+
+Por sala, comparando com a versão lida (base):
+  - só um lado mudou           -> fica a mudança desse lado
+  - mesmo filme nos dois lados -> ingressos somam as duas variações (vendas e
+                                  devoluções das duas instâncias) e reservas são
+                                  unidas por ID
+                                  (se a soma passa do que havia, o saldo fica em 0:
+                                  os tickets já foram assinados; o oversell é
+                                  relatado como conflito)
+  - filme trocado/alterado dos dois lados de formas diferentes -> conflito:
+                                  fica a versão já salva (remoto) e o conflito é relatado
+"""
+from typing import Dict, List, Optional, Tuple
+
+from .models import Sala, Filme
+
+def _por_numero(estado: Optional[dict]) -> Dict[int, dict]:
+    return {s["numero"]: s for s in (estado or {}).get("salas", [])}
+
+def _sem_ingressos(filme: Optional[dict]) -> Optional[dict]:
+    if filme is None:
+        return None
+    return {k: v for k, v in filme.items() if k != "ingressos"}
+
+def _mesclar_reservas(base: dict, local: dict, remoto: dict) -> dict:
+    out = dict(remoto)
+    for rid, r in local.items():
+        if rid not in base:
+            out[rid] = r              # criada aqui
+    for rid in base:
+        if rid not in local:
+            out.pop(rid, None)        # confirmada/cancelada/expirada aqui
+    return out
+
+def _mesclar_sala(numero: int, base: dict, local: dict, remoto: dict, conflitos: List[str]) -> dict:
+    if local == base or local == remoto:
+        return remoto
+    if remoto == base:
+        return local
+
+    fb, fl, fr = base.get("filme"), local.get("filme"), remoto.get("filme")
+    if fb is not None and _sem_ingressos(fb) == _sem_ingressos(fl) == _sem_ingressos(fr):
+        ingressos = fr["ingressos"] + (fl["ingressos"] - fb["ingressos"])
+        if ingressos < 0:
+            # Os dois lados já emitiram: manter só um faria os assentos do outro serem vendidos de novo
+            conflitos.append(
+                f"Sala {numero}: vendas simultâneas excedem em {-ingressos} os ingressos de '{fb['nome']}'."
+            )
+            ingressos = 0
+        out = {"numero": numero, "filme": dict(fr, ingressos=ingressos)}
+        reservas = _mesclar_reservas(base.get("reservas") or {}, local.get("reservas") or {}, remoto.get("reservas") or {})
+        if reservas:
+            out["reservas"] = reservas
+        return out
+
+    nome_local = fl["nome"] if fl else "sem filme"
+    nome_remoto = fr["nome"] if fr else "sem filme"
+    conflitos.append(
+        f"Sala {numero}: alterada nas duas instâncias ('{nome_local}' aqui, '{nome_remoto}' na outra); mantida a versão já salva."
+    )
+    return remoto
+
+def mesclar_estados(base: Optional[dict], local: dict, remoto: dict) -> Tuple[dict, List[str]]:
+    """Retorna (estado mesclado, conflitos). Sem base, toda sala divergente é conflito."""
+    b, l, r = _por_numero(base), _por_numero(local), _por_numero(remoto)
+    conflitos: List[str] = []
+    salas = []
+    for numero in sorted(set(l) | set(r)):
+        if numero not in r:
+            salas.append(l[numero])
+        elif numero not in l:
+            salas.append(r[numero])
+        else:
+            vazia = {"numero": numero, "filme": None}
+            salas.append(_mesclar_sala(numero, b.get(numero, vazia), l[numero], r[numero], conflitos))
+    return {"salas": salas}, conflitos
+
+def aplicar_estado(state: List[Sala], estado: dict) -> List[Sala]:
+    """
+    Atualiza `state` no lugar (mesmos objetos Sala, e o mesmo Filme quando só o
+    saldo mudou), para não invalidar referências de reservas/varredura.
+    Retorna as salas cujo filme foi trocado.
+    """
+    atual = {s.numero: s for s in state}
+    trocadas = []
+    for d in estado["salas"]:
+        sala = atual.get(d["numero"])
+        if sala is None:
+            sala = Sala.from_dict(d)
+            state.append(sala)
+            trocadas.append(sala)
+            continue
+        fd = d.get("filme")
+        if fd is None:
+            if sala.filme is not None:
+                sala.remover_filme()
+        elif sala.filme is not None and sala.filme.to_dict() | {"ingressos": 0} == fd | {"ingressos": 0}:
+            sala.filme.ingressos = fd["ingressos"]
+        else:
+            sala.adicionar_filme(Filme.from_dict(fd))
+            trocadas.append(sala)
+        sala.reservas.clear()
+        sala.reservas.update(d.get("reservas") or {})
+    return trocadas
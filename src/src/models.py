@@ -1,10 +1,12 @@
 from __future__ import annotations
-from dataclasses import dataclass, asdict
-from typing import Optional
-from uuid import uuid4
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+import sys
 
-@dataclass
+from .ids import instante, novo_id
+
+# slots=True: sem __dict__ por instância (catálogos com centenas de milhares de filmes)
+@dataclass(slots=True)
 class Filme:
     nome: str
     genero: str
@@ -12,27 +14,44 @@ class Filme:
     ingressos: int
     data_saida: str # Formato ISO YYYY-MM-DD
 
+    def __post_init__(self):
+        # Campos categóricos se repetem entre registros: uma única cópia de cada string
+        self.genero = sys.intern(self.genero)
+        self.data_saida = sys.intern(self.data_saida)
+
     def to_dict(self):
-        return asdict(self)
+        # Dicionário raso (strings são imutáveis); asdict faria deepcopy campo a campo
+        return {
+            "nome": self.nome,
+            "genero": self.genero,
+            "idade_minima": self.idade_minima,
+            "ingressos": self.ingressos,
+            "data_saida": self.data_saida,
+        }
 
     @staticmethod
     def from_dict(data: dict) -> 'Filme':
         """Cria um objeto Filme a partir de um dicionário."""
         return Filme(**data)
 
-@dataclass
+@dataclass(slots=True)
 class Sala:
     numero: int
     filme: Optional[Filme] = None
+    # Reservas temporárias: id -> {"quantidade": int, "expira_em": timestamp UTC}
+    reservas: Dict[str, dict] = field(default_factory=dict)
 
     def esta_vazia(self) -> bool:
         return self.filme is None
 
     def adicionar_filme(self, filme: Filme):
         self.filme = filme
+        # Reservas do filme anterior não valem para o novo
+        self.reservas.clear()
 
     def remover_filme(self):
         self.filme = None
+        self.reservas.clear()
 
     def emitir_ingresso(self):
         if self.esta_vazia():
@@ -42,11 +61,12 @@ class Sala:
         
         self.filme.ingressos -= 1
         
+        ticket_id = novo_id()
         ticket = {
-            "id": str(uuid4()),
+            "id": ticket_id,
             "sala": self.numero,
             "filme": self.filme.nome,
-            "emissao": datetime.now(timezone.utc).isoformat(),
+            "emissao": instante(ticket_id).isoformat(),
             "assento": None
         }
         return ticket
@@ -56,6 +76,8 @@ class Sala:
         data = {"numero": self.numero, "filme": None}
         if self.filme:
             data["filme"] = self.filme.to_dict()
+        if self.reservas:
+            data["reservas"] = dict(self.reservas)
         return data
 
     @staticmethod
@@ -63,4 +85,4 @@ class Sala:
         """Cria um objeto Sala a partir de um dicionário."""
         filme_data = data.get("filme")
         filme = Filme.from_dict(filme_data) if filme_data else None
-        return Sala(numero=data["numero"], filme=filme)
\ No newline at end of file
+        return Sala(numero=data["numero"], filme=filme, reservas=dict(data.get("reservas") or {}))
\ No newline at end of file
@@ -0,0 +1,83 @@
+# src/peek.py
+"""
+Cache de resultados da checagem de assinatura, usado por check_ticket.
+
+Leitores que releem o mesmo QR code e consultas "só olhar" (peek_ticket) repetem
+a checagem do mesmo ticket; com o cache, só a primeira paga a operação RSA.
+Chave: (chave pública, ID do ticket, SHA-256 da assinatura); como em
+merkle.CacheRaizes, um veredito dado com uma chave não vale para outra (rotação
+da chave, chamador com outra `pub`). O valor guarda também o digest do
+payload, então um ticket adulterado com o mesmo ID e assinatura não aproveita o
+resultado. Entradas de tickets usados ou revogados são descartadas via eventos.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from . import eventos
+
+# Resultados mantidos em memória
+CACHE_MAX = 10_000
+
+class CacheVerificacao:
+    def __init__(self, maximo: int = CACHE_MAX):
+        self.maximo = maximo
+        self._itens: "OrderedDict[Tuple[str, bytes, int], Tuple[bytes, Optional[str]]]" = OrderedDict()
+        self._por_id: Dict[str, Set[Tuple[str, bytes, int]]] = {}
+        self._mutex = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(ticket_id: str, sig_hex: str, pub) -> Tuple[str, bytes, int]:
+        return str(ticket_id), hashlib.sha256(str(sig_hex).encode()).digest(), pub.public_numbers().n
+
+    def consultar(self, chave, digest_payload: bytes) -> Tuple[bool, Optional[str]]:
+        """(encontrado, erro): erro None = assinatura válida."""
+        with self._mutex:
+            item = self._itens.get(chave)
+            if item is None or item[0] != digest_payload:
+                self.falhas += 1
+                return False, None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return True, item[1]
+
+    def guardar(self, chave, digest_payload: bytes, erro: Optional[str] = None):
+        with self._mutex:
+            self._itens[chave] = (digest_payload, erro)
+            self._itens.move_to_end(chave)
+            self._por_id.setdefault(chave[0], set()).add(chave)
+            while len(self._itens) > self.maximo:
+                antiga, _ = self._itens.popitem(last=False)
+                self._descartar_indice(antiga)
+
+    def _descartar_indice(self, chave):
+        chaves = self._por_id.get(chave[0])
+        if chaves is not None:
+            chaves.discard(chave)
+            if not chaves:
+                del self._por_id[chave[0]]
+
+    def invalidar(self, ticket_id: str):
+        with self._mutex:
+            for chave in self._por_id.pop(str(ticket_id), ()):
+                self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._mutex:
+            self._itens.clear()
+            self._por_id.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def ouvinte(self, tipo: str, dados: dict):
+        """Para `eventos.registrar_ouvinte`: ticket usado ou revogado sai do cache."""
+        if tipo in (eventos.TICKET_VERIFICADO, eventos.TICKET_REVOGADO):
+            self.invalidar(dados["ticket_id"])
+
+
+cache_verificacao = CacheVerificacao()
+eventos.registrar_ouvinte(cache_verificacao.ouvinte)
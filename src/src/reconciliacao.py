@@ -0,0 +1,231 @@
+# src/reconciliacao.py
+"""
+Reconciliação: confere se tickets emitidos, saldo dos filmes e registro de usados
+concordam (após queda, sobrescrita concorrente do state.enc etc.).
+
+1. Varre data/tickets/ e reconfere cada assinatura num pool de processos, em lotes.
+2. Cruza com o estado: por sala/filme, emitidos (não cancelados) + restantes +
+   reservados não pode passar da capacidade (a do coordenador de inventário, se a
+   sala é vendida por arrendamento; senão o máximo de INGRESSOS_POR_FILME).
+3. Cruza com usados e cancelados: IDs sem ticket (órfãos), ticket usado e
+   cancelado, o mesmo ID em mais de um arquivo (duplicados) e assinaturas inválidas.
+
+Checkpoint incremental (data/reconciliacao.ckpt, JSONL): o resultado de cada lote
+é anexado assim que termina. Arquivos de ticket não mudam depois de gravados, então
+na próxima execução (ou depois de uma interrupção) só arquivos novos ou com outro
+tamanho/mtime são reverificados. O checkpoint vale só para a mesma chave pública.
+"""
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+
+from .arrendamento import CoordenadorInventario, identidade_filme
+from .crypto_keys import load_public_key
+from .models import Sala
+from .revocation import RevocationList, default_revocations
+from .service import INGRESSOS_POR_FILME, check_ticket
+from .storage import TICKET_DIR
+from .used_tickets import UsedTicketStore, default_store
+
+CHECKPOINT_FILE = Path(__file__).resolve().parent.parent / "data" / "reconciliacao.ckpt"
+
+# Arquivos de ticket por tarefa enviada ao pool
+LOTE = 500
+
+_pub_worker = None
+
+def _iniciar_worker(pub_pem: bytes):
+    global _pub_worker
+    _pub_worker = serialization.load_pem_public_key(pub_pem)
+
+def _conferir_lote(ticket_dir: str, arquivos: List[tuple]) -> List[dict]:
+    """Roda no processo do pool: lê e confere a assinatura de cada arquivo."""
+    registros = []
+    for nome, tamanho, mtime_ns in arquivos:
+        reg = {"arquivo": nome, "tamanho": tamanho, "mtime_ns": mtime_ns, "id": None, "erro": None}
+        try:
+            ticket = json.loads(Path(ticket_dir, nome).read_text(encoding="utf-8"))
+            if not isinstance(ticket, dict):
+                raise ValueError("Ticket inválido.")
+            reg.update(id=ticket.get("id"), sala=ticket.get("sala"), filme=ticket.get("filme"))
+            check_ticket(ticket, _pub_worker)
+        except (OSError, ValueError) as e:
+            reg["erro"] = str(e) or "Ticket inválido."
+        registros.append(reg)
+    return registros
+
+def _digest_chave(pub) -> str:
+    pem = pub.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(pem).hexdigest()
+
+
+class Checkpoint:
+    def __init__(self, path: Path, chave: str):
+        self.path = Path(path)
+        self.chave = chave
+        self.registros: Dict[str, dict] = {}
+
+    def carregar(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cabecalho = json.loads(f.readline() or "{}")
+                if cabecalho.get("chave") != self.chave:
+                    return
+                for linha in f:
+                    # Última linha pode estar incompleta (interrupção no meio da escrita)
+                    try:
+                        reg = json.loads(linha)
+                    except json.JSONDecodeError:
+                        break
+                    self.registros[reg["arquivo"]] = reg
+        except FileNotFoundError:
+            pass
+
+    def anexar(self, registros: List[dict]):
+        novo = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            if novo:
+                f.write(json.dumps({"chave": self.chave}) + "\n")
+            for reg in registros:
+                f.write(json.dumps(reg, ensure_ascii=False) + "\n")
+                self.registros[reg["arquivo"]] = reg
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compactar(self, vigentes: Dict[str, dict]):
+        """Reescreve só com os registros dos arquivos que ainda existem."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"chave": self.chave}) + "\n")
+            for reg in vigentes.values():
+                f.write(json.dumps(reg, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self.registros = dict(vigentes)
+
+
+def _listar_arquivos(ticket_dir: Path) -> List[tuple]:
+    if not ticket_dir.exists():
+        return []
+    with os.scandir(ticket_dir) as it:
+        return sorted(
+            (e.name, st.st_size, st.st_mtime_ns)
+            for e in it
+            if e.name.startswith("ticket_") and e.name.endswith(".json") and e.is_file()
+            for st in [e.stat()]
+        )
+
+def conferir_tickets(ticket_dir: Path = None, pub=None, processos: int = 0,
+                     checkpoint: Optional[Path] = CHECKPOINT_FILE) -> tuple:
+    """
+    Resultado por arquivo de ticket e estatísticas da varredura:
+    ({arquivo: registro}, {"arquivos", "verificados", "do_checkpoint"}).
+    """
+    ticket_dir = Path(ticket_dir or TICKET_DIR)
+    pub = pub or load_public_key()
+    ckpt = Checkpoint(checkpoint, _digest_chave(pub)) if checkpoint else None
+    if ckpt:
+        ckpt.carregar()
+
+    arquivos = _listar_arquivos(ticket_dir)
+    registros: Dict[str, dict] = {}
+    pendentes = []
+    alterados = 0
+    for nome, tamanho, mtime_ns in arquivos:
+        reg = ckpt.registros.get(nome) if ckpt else None
+        if reg is not None and reg["tamanho"] == tamanho and reg["mtime_ns"] == mtime_ns:
+            registros[nome] = reg
+        else:
+            pendentes.append((nome, tamanho, mtime_ns))
+            alterados += reg is not None
+
+    if pendentes:
+        pem = pub.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        with ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1,
+                                 initializer=_iniciar_worker, initargs=(pem,)) as pool:
+            tarefas = [pool.submit(_conferir_lote, str(ticket_dir), pendentes[i:i + LOTE])
+                       for i in range(0, len(pendentes), LOTE)]
+            for tarefa in as_completed(tarefas):
+                lote = tarefa.result()
+                if ckpt:
+                    ckpt.anexar(lote)
+                for reg in lote:
+                    registros[reg["arquivo"]] = reg
+
+    # Arquivos apagados ou regravados deixam linhas obsoletas no checkpoint
+    if ckpt and (alterados or len(ckpt.registros) != len(registros)):
+        ckpt.compactar(registros)
+    stats = {"arquivos": len(arquivos), "verificados": len(pendentes), "do_checkpoint": len(arquivos) - len(pendentes)}
+    return registros, stats
+
+def reconciliar(
+    state: List[Sala],
+    ticket_dir: Path = None,
+    pub=None,
+    store: Optional[UsedTicketStore] = None,
+    revocations: Optional[RevocationList] = None,
+    coordenador: Optional[CoordenadorInventario] = None,
+    processos: int = 0,
+    checkpoint: Optional[Path] = CHECKPOINT_FILE,
+) -> dict:
+    """Relatório de divergências entre tickets, inventário e usados/cancelados."""
+    registros, stats = conferir_tickets(ticket_dir, pub, processos, checkpoint)
+    store = store or default_store()
+    revocations = revocations or default_revocations()
+    coordenador = coordenador or CoordenadorInventario()
+
+    invalidos = [{"arquivo": r["arquivo"], "id": r["id"], "erro": r["erro"]} for r in registros.values() if r["erro"]]
+    validos = [r for r in registros.values() if not r["erro"]]
+    por_id = defaultdict(list)
+    for r in validos:
+        por_id[r["id"]].append(r["arquivo"])
+    duplicados = [{"id": i, "arquivos": sorted(arqs)} for i, arqs in sorted(por_id.items()) if len(arqs) > 1]
+
+    usados = store.load_all()
+    cancelados = set(revocations.delta_since(0)["ids"])
+    emitidos = set(por_id)
+
+    ativos = Counter()
+    unicos = {r["id"]: r for r in validos}
+    for r in unicos.values():
+        if r["id"] not in cancelados:
+            ativos[(r["sala"], r["filme"])] += 1
+
+    salas = []
+    em_cartaz = set()
+    for sala in state:
+        if sala.filme is None:
+            continue
+        chave = (sala.numero, sala.filme.nome)
+        em_cartaz.add(chave)
+        situacao = coordenador.situacao(sala.numero)
+        arrendado = situacao is not None and situacao["filme"] == identidade_filme(sala.filme)
+        reservados = sum(r["quantidade"] for r in sala.reservas.values())
+        if arrendado:
+            # O livre do coordenador é a referência: o saldo do estado local não vê os outros pontos de venda
+            capacidade, restantes = situacao["capacidade"], situacao["livres"]
+        else:
+            capacidade, restantes = INGRESSOS_POR_FILME, sala.filme.ingressos
+        salas.append({
+            "sala": sala.numero, "filme": sala.filme.nome, "capacidade": capacidade,
+            "emitidos": ativos[chave], "restantes": restantes, "reservados": reservados,
+            "excesso": max(0, ativos[chave] + restantes + reservados - capacidade),
+        })
+
+    return {
+        **stats,
+        "invalidos": invalidos,
+        "duplicados": duplicados,
+        "usados_orfaos": sorted(usados - emitidos),
+        "cancelados_orfaos": sorted(cancelados - emitidos),
+        "usados_e_cancelados": sorted(usados & cancelados),
+        "salas": salas,
+        "excessos": [s for s in salas if s["excesso"]],
+        "fora_de_cartaz": sum(n for chave, n in ativos.items() if chave not in em_cartaz),
+    }
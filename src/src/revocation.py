@@ -0,0 +1,126 @@
+# src/revocation.py
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from .locks import lock_file, unlock_file
+
+REVOKED_FILE = Path(__file__).resolve().parent.parent / "data" / "revoked_tickets.log"
+
+class RevocationList:
+    """
+    Lista de tickets cancelados (revogados).
+
+    No disco é um log append-only "seq<TAB>id" protegido por flock; em memória é um
+    `set` (consulta O(1) na verificação) mais a ordem de revogação, que permite
+    publicar para as catracas apenas o delta desde a última versão que elas têm.
+    Sem `path` funciona como réplica em memória, alimentada por `apply_delta`.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._ids = set()
+        self._ordem: List[str] = []
+        self._offset = 0
+        self._mutex = threading.Lock()
+
+    @property
+    def seq(self) -> int:
+        """Versão atual: número de revogações conhecidas."""
+        return len(self._ordem)
+
+    def _add(self, seq: int, ticket_id: str):
+        if seq != len(self._ordem) + 1:
+            raise ValueError("Log de revogações fora de ordem.")
+        self._ordem.append(ticket_id)
+        self._ids.add(ticket_id)
+
+    def _read_tail(self, f):
+        size = os.fstat(f.fileno()).st_size
+        if size < self._offset:
+            raise ValueError("Log de revogações truncado.")
+        if size == self._offset:
+            return
+        f.seek(self._offset)
+        chunk = f.read(size - self._offset)
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            seq, ticket_id = line.decode("utf-8").split("\t", 1)
+            self._add(int(seq), ticket_id)
+        self._offset += end
+
+    def refresh(self):
+        """Incorpora revogações feitas por outros processos (lê só o final do log)."""
+        if self.path is None:
+            return
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == self._offset:
+            return
+        with self._mutex, open(self.path, "rb") as f:
+            lock_file(f, shared=True)
+            try:
+                self._read_tail(f)
+            finally:
+                unlock_file(f)
+
+    def is_revoked(self, ticket_id: str) -> bool:
+        self.refresh()
+        return str(ticket_id) in self._ids
+
+    def revoke(self, ticket_id: str) -> int:
+        """Revoga o ticket e retorna a nova versão. ValueError se já revogado."""
+        ticket_id = str(ticket_id)
+        if "\n" in ticket_id or "\t" in ticket_id:
+            raise ValueError("ID de ticket inválido.")
+        if self.path is None:
+            raise ValueError("Réplica somente leitura: use apply_delta.")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._mutex, open(self.path, "a+b") as f:
+            lock_file(f)
+            try:
+                self._read_tail(f)
+                if ticket_id in self._ids:
+                    raise ValueError("Ticket já cancelado.")
+                seq = len(self._ordem) + 1
+                line = f"{seq}\t{ticket_id}\n".encode("utf-8")
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                self._add(seq, ticket_id)
+                self._offset += len(line)
+                return seq
+            finally:
+                unlock_file(f)
+
+    def delta_since(self, seq: int) -> Dict[str, Any]:
+        """Atualização incremental para uma catraca que está na versão `seq`."""
+        self.refresh()
+        if seq < 0 or seq > self.seq:
+            raise ValueError("Versão de revogações desconhecida.")
+        return {"desde": seq, "ate": self.seq, "ids": self._ordem[seq:]}
+
+    def apply_delta(self, delta: Dict[str, Any]):
+        """Aplica um delta gerado por `delta_since`; deltas já vistos são ignorados."""
+        desde, ate = delta["desde"], delta["ate"]
+        if ate <= self.seq:
+            return
+        if desde > self.seq:
+            raise ValueError("Delta de revogações fora de ordem; peça desde a versão atual.")
+        with self._mutex:
+            for seq, ticket_id in enumerate(delta["ids"], start=desde + 1):
+                if seq > self.seq:
+                    self._add(seq, ticket_id)
+
+
+_lists = {}
+
+def default_revocations() -> RevocationList:
+    """Lista de revogações padrão (data/revoked_tickets.log), compartilhada no processo."""
+    rl = _lists.get(REVOKED_FILE)
+    if rl is None:
+        rl = _lists[REVOKED_FILE] = RevocationList(REVOKED_FILE)
+    return rl
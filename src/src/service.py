@@ -1,11 +1,18 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timezone
+from datetime import datetime, date
+from functools import lru_cache
+import hashlib
 import json
-import uuid
 
-from src.used_tickets import load_used_tickets, save_used_tickets
+from src.used_tickets import default_store, UsedTicketStore
+from src.revocation import default_revocations, RevocationList
 
 from .models import Sala, Filme
+from . import eventos
+from .peek import cache_verificacao
+from .busca import normalizar
+from .ids import instante, novo_id
+from .merkle import PREFIXO_RAIZ, cache_raizes, construir, hash_folha, raiz_da_prova
 from .crypto_keys import load_private_key, load_public_key, sign_payload, verify_signature
 
 # Inicialização do estado padrão com 5 salas vazias
@@ -27,13 +34,28 @@ def find_sala(state: List[Sala], numero: int) -> Optional[Sala]:
             return sala
     return None
 
-def add_filme_to_sala(sala: Sala, nome: str, genero: str, idade_minima: int, data_saida: str):
-    """Adiciona ou atualiza um filme em uma sala, garantindo 50 ingressos iniciais e validações.
-    Aceita datas no formato ISO (YYYY-MM-DD) ou BR (DD/MM/YYYY) e converte internamente para ISO."""
+# Ingressos de um filme recém-adicionado
+INGRESSOS_POR_FILME = 50
 
-    if not isinstance(sala, Sala):
-        raise TypeError("O objeto passado deve ser do tipo Sala.")
+@lru_cache(maxsize=4096)
+def parse_data_saida(data_saida: str) -> date:
+    """
+    Interpreta a data de saída em ISO (YYYY-MM-DD) ou BR (DD/MM/YYYY).
+    Com cache: importações em lote repetem as mesmas poucas datas.
+    """
+    try:
+        # Tenta interpretar como ISO
+        return datetime.strptime(data_saida, "%Y-%m-%d").date()
+    except ValueError:
+        try:
+            # Tenta interpretar como BR e converte para ISO
+            return datetime.strptime(data_saida, "%d/%m/%Y").date()
+        except ValueError:
+            raise ValueError("Data de saída inválida. Use formato YYYY-MM-DD ou DD/MM/YYYY.") from None
 
+def build_filme(nome: str, genero: str, idade_minima: int, data_saida: str,
+                ingressos: int = INGRESSOS_POR_FILME, hoje: Optional[date] = None) -> Filme:
+    """Valida os dados e cria o Filme (sem alterar nenhuma sala)."""
     # Valida nome e gênero
     if not nome.strip():
         raise ValueError("Nome do filme não pode ser vazio.")
@@ -44,103 +66,293 @@ def add_filme_to_sala(sala: Sala, nome: str, genero: str, idade_minima: int, dat
     if idade_minima < 0:
         raise ValueError("Idade mínima inválida.")
 
+    if not 0 <= ingressos <= INGRESSOS_POR_FILME:
+        raise ValueError("Quantidade de ingressos inválida.")
+
     # Converte data de saída para ISO
-    try:
-        # Tenta interpretar como ISO
-        d = datetime.strptime(data_saida, "%Y-%m-%d")
-    except ValueError:
-        try:
-            # Tenta interpretar como BR e converte para ISO
-            d = datetime.strptime(data_saida, "%d/%m/%Y")
-        except ValueError:
-            raise ValueError("Data de saída inválida. Use formato YYYY-MM-DD ou DD/MM/YYYY.")
+    d = parse_data_saida(data_saida)
 
     # Valida data futura
-    if d.date() <= datetime.now().date():
+    if d <= (hoje or datetime.now().date()):
         raise ValueError("Data de saída deve ser futura.")
 
-    data_iso = d.strftime("%Y-%m-%d")
-
-    filme = Filme(
+    return Filme(
         nome=nome,
         genero=genero,
         idade_minima=idade_minima,
-        ingressos=50,
-        data_saida=data_iso
+        ingressos=ingressos,
+        data_saida=d.isoformat()
     )
+
+def add_filme_to_sala(sala: Sala, nome: str, genero: str, idade_minima: int, data_saida: str):
+    """Adiciona ou atualiza um filme em uma sala, garantindo 50 ingressos iniciais e validações.
+    Aceita datas no formato ISO (YYYY-MM-DD) ou BR (DD/MM/YYYY) e converte internamente para ISO."""
+
+    if not isinstance(sala, Sala):
+        raise TypeError("O objeto passado deve ser do tipo Sala.")
+
+    filme = build_filme(nome, genero, idade_minima, data_saida)
     sala.adicionar_filme(filme)
+    eventos.emitir(eventos.FILME_ADICIONADO, sala=sala, filme=filme)
 
 def remove_filme_from_sala(sala: Sala):
     """Remove um filme de uma sala."""
     if not isinstance(sala, Sala):
         raise TypeError("O objeto passado deve ser do tipo Sala.")
+    filme = sala.filme
     sala.remover_filme()
+    if filme:
+        eventos.emitir(eventos.FILME_REMOVIDO, sala=sala, filme=filme)
 
-def verify_ticket_payload(ticket: dict) -> bool:
+def _check_signature(ticket: dict, sig_hex: str, pub=None):
+    """Confere a assinatura RSA do payload (ticket sem o campo 'assinatura')."""
+    if "lote" in ticket:
+        return _check_signature_lote(ticket, sig_hex, pub)
+    payload = json.dumps(ticket, sort_keys=True, ensure_ascii=False).encode()
+    pub = pub or load_public_key()
+    if not verify_signature(pub, payload, bytes.fromhex(sig_hex)):
+        raise ValueError("Assinatura inválida.")
+
+def _check_signature_lote(ticket: dict, sig_hex: str, pub=None):
+    """Ticket emitido em lote: prova de inclusão + assinatura da raiz (conferida uma vez por raiz)."""
+    lote = ticket["lote"]
+    if not isinstance(lote, dict) or not isinstance(lote.get("prova"), list):
+        raise ValueError("Ticket inválido: dados do lote ausentes.")
+    base = {k: v for k, v in ticket.items() if k != "lote"}
+    folha = hash_folha(json.dumps(base, sort_keys=True, ensure_ascii=False).encode())
+    raiz = raiz_da_prova(folha, lote["prova"])
+    if raiz.hex() != lote.get("raiz"):
+        raise ValueError("Prova de inclusão inválida.")
+
+    pub = pub or load_public_key()
+    chave = (pub.public_numbers().n, raiz, sig_hex)
+    if cache_raizes.contem(chave):
+        return
+    if not verify_signature(pub, PREFIXO_RAIZ + raiz, bytes.fromhex(sig_hex)):
+        raise ValueError("Assinatura inválida.")
+    cache_raizes.adicionar(chave)
+
+def check_ticket(ticket: dict, pub=None) -> dict:
     """
-    Verifica um ticket previamente carregado (sem input interativo).
-    Lança ValueError se inválido ou já usado.
+    Etapa sem estado da verificação: campos obrigatórios e assinatura.
+    Não altera `ticket`; retorna o payload sem a assinatura.
+    Pode rodar em paralelo (threads/processos) sem coordenação.
     """
     obrigatorios = {"id", "sala", "filme", "emissao", "assinatura"}
     if not obrigatorios.issubset(ticket.keys()):
         raise ValueError("Ticket inválido: campos obrigatórios ausentes.")
 
-    sig_hex = ticket.pop("assinatura", None)
+    payload = dict(ticket)
+    sig_hex = payload.pop("assinatura", None)
     if not sig_hex:
         raise ValueError("Ticket sem assinatura.")
 
-    payload = json.dumps(ticket, sort_keys=True, ensure_ascii=False).encode()
-    pub = load_public_key()
-    if not verify_signature(pub, payload, bytes.fromhex(sig_hex)):
-        raise ValueError("Assinatura inválida.")
-
-    used = load_used_tickets()
-    ticket_id = ticket["id"]
-    if ticket_id in used:
-        raise ValueError("Ticket já utilizado.")
+    # Releitura do mesmo ticket: resultado em cache, sem nova operação RSA
+    pub = pub or load_public_key()
+    chave = cache_verificacao.chave(payload["id"], sig_hex, pub)
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).digest()
+    encontrado, erro = cache_verificacao.consultar(chave, digest)
+    if not encontrado:
+        try:
+            _check_signature(payload, sig_hex, pub)
+        except ValueError as e:
+            erro = str(e)
+        cache_verificacao.guardar(chave, digest, erro)
+    if erro:
+        raise ValueError(erro)
+    return payload
+
+def peek_ticket(
+    ticket: dict,
+    store: Optional[UsedTicketStore] = None,
+    revocations: Optional[RevocationList] = None,
+    pub=None,
+) -> Dict[str, Any]:
+    """
+    Consulta sem consumir: diz se o ticket é autêntico e se já foi usado ou cancelado,
+    sem registrar o uso. Nunca lança por ticket inválido; o motivo vem em "erro".
+    """
+    if not isinstance(ticket, dict):
+        return {"valido": False, "erro": "Ticket inválido."}
+    try:
+        payload = check_ticket(ticket, pub)
+    except ValueError as e:
+        return {"valido": False, "id": ticket.get("id"), "erro": str(e)}
+    store = store or default_store()
+    revocations = revocations or default_revocations()
+    try:
+        usado = store.is_used(payload["id"], payload.get("emissao"))
+    except ValueError as e:
+        # Anterior ao horizonte dos usados: não dá para afirmar que não foi usado
+        return {"valido": False, "id": payload["id"], "erro": str(e)}
+    return {
+        "valido": True,
+        "id": payload["id"],
+        "filme": payload["filme"],
+        "sala": payload["sala"],
+        "usado": usado,
+        "cancelado": revocations.is_revoked(payload["id"]),
+    }
 
-    used.add(ticket_id)
-    save_used_tickets(used)
+def commit_ticket_use(
+    ticket: dict,
+    store: Optional[UsedTicketStore] = None,
+    revocations: Optional[RevocationList] = None,
+):
+    """
+    Etapa com estado da verificação: recusa tickets cancelados e registra o uso.
+    Deve ser chamada só depois de `check_ticket`.
+    """
+    revocations = revocations or default_revocations()
+    store = store or default_store()
+    # Mesmo lock que revoke_ticket: usar e cancelar o mesmo ticket nunca se cruzam
+    with store.trava(ticket["id"]):
+        if revocations.is_revoked(ticket["id"]):
+            raise ValueError("Ticket cancelado.")
+        if not store.mark_used(ticket["id"], ticket.get("emissao")):
+            raise ValueError("Ticket já utilizado.")
+    eventos.emitir(eventos.TICKET_VERIFICADO, ticket_id=ticket["id"], sala_numero=ticket["sala"])
+
+def verify_ticket_payload(
+    ticket: dict,
+    store: Optional[UsedTicketStore] = None,
+    revocations: Optional[RevocationList] = None,
+    pub=None,
+) -> bool:
+    """
+    Verifica um ticket previamente carregado (sem input interativo).
+    Lança ValueError se inválido, cancelado ou já usado.
+    O registro de uso é atômico mesmo com vários verificadores em processos diferentes.
+    """
+    payload = check_ticket(ticket, pub)
+    ticket.pop("assinatura", None)
+    commit_ticket_use(payload, store, revocations)
     return True
 
-def issue_ticket(sala: Sala) -> Dict[str, Any]:
+def revoke_ticket(
+    state: List[Sala],
+    ticket: dict,
+    store: Optional[UsedTicketStore] = None,
+    revocations: Optional[RevocationList] = None,
+) -> int:
+    """
+    Cancela (reembolsa) um ticket ainda não utilizado e devolve o ingresso ao filme.
+    Retorna a versão da lista de revogações após o cancelamento.
+    """
+    ticket = dict(ticket)
+    sig_hex = ticket.pop("assinatura", None)
+    if not sig_hex or "id" not in ticket:
+        raise ValueError("Ticket inválido.")
+    _check_signature(ticket, sig_hex)
+
+    store = store or default_store()
+    revocations = revocations or default_revocations()
+    # Mesmo lock que commit_ticket_use: ou entrou no cinema, ou é reembolsado
+    with store.trava(ticket["id"]):
+        if store.is_used(ticket["id"], ticket.get("emissao")):
+            raise ValueError("Ticket já utilizado; não pode ser cancelado.")
+        seq = revocations.revoke(ticket["id"])
+
+    sala = find_sala(state, ticket.get("sala"))
+    if sala and sala.filme and sala.filme.nome == ticket.get("filme"):
+        sala.filme.ingressos += 1
+    else:
+        sala = None
+    eventos.emitir(eventos.TICKET_REVOGADO, ticket_id=ticket["id"], sala=sala)
+    return seq
+
+def issue_ticket(sala: Sala, reservado: bool = False, priv_key=None) -> Dict[str, Any]:
     """
     Emite um ticket e assina o payload.
     Retorna o ticket com a assinatura.
+    Com reservado=True o ingresso já foi descontado por uma reserva (ver holds.py).
+    `priv_key` evita o prompt de senha quando a chave já está carregada.
     """
     if sala.esta_vazia():
         raise ValueError("Sala vazia ou inexistente.")
     
-    if sala.filme.ingressos <= 0:
+    if not reservado and sala.filme.ingressos <= 0:
         raise ValueError("Ingressos esgotados.")
 
+    # A chave vem antes do desconto: sem chave, o inventário fica intacto
+    priv_key = priv_key or load_private_key()
+    if not priv_key:
+        raise PermissionError("Chave privada indisponível. Emissão cancelada.")
+
     # 1. Decrementa o ingresso
-    sala.filme.ingressos -= 1
+    if not reservado:
+        sala.filme.ingressos -= 1
     
     # 2. Gera o ticket (payload)
-    ticket_payload = {
-        "id": uuid.uuid4().hex,
-        "sala": sala.numero,
-        "filme": sala.filme.nome,
-        "emissao": datetime.now(timezone.utc).isoformat(),
-        "assento": None
-    }
+    ticket_payload = _novo_payload(sala)
     
     # 3. Assina o ticket
-    priv_key = load_private_key()
-    if not priv_key:
-        raise PermissionError("Chave privada indisponível. Emissão cancelada.")
-
     # Serializa o payload, garantindo ordem das chaves para consistência da assinatura
     payload_to_sign = json.dumps(ticket_payload, sort_keys=True, ensure_ascii=False).encode()
     
-    signature = sign_payload(priv_key, payload_to_sign)
+    try:
+        signature = sign_payload(priv_key, payload_to_sign)
+    except Exception:
+        # Assinatura recusada (ex.: limite do agente, agente fora do ar): o assento volta
+        if not reservado:
+            sala.filme.ingressos += 1
+        raise
     
     # 4. Adiciona a assinatura ao ticket
     ticket_payload["assinatura"] = signature.hex() # Converte para hex para serialização JSON
 
+    eventos.emitir(eventos.TICKET_EMITIDO, sala=sala, ticket=ticket_payload, reservado=reservado)
     return ticket_payload
 
+def _novo_payload(sala: Sala) -> Dict[str, Any]:
+    ticket_id = novo_id()
+    return {
+        "id": ticket_id,
+        "sala": sala.numero,
+        "filme": sala.filme.nome,
+        # Mesmo instante do ID: partição de usados pelo ID ou pela emissão é a mesma
+        "emissao": instante(ticket_id).isoformat(),
+        "assento": None
+    }
+
+def issue_tickets_lote(sala: Sala, quantidade: int, reservado: bool = False, priv_key=None,
+                       reserva: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Emite `quantidade` tickets com uma única assinatura RSA: os payloads formam uma
+    árvore de Merkle e a assinatura cobre a raiz (ver merkle.py). Cada ticket leva
+    "lote" = {"indice", "raiz", "prova"}. Com reservado=True não desconta o inventário;
+    `reserva` (ID da reserva confirmada) vai no evento, para o replay do log.
+    """
+    if sala.esta_vazia():
+        raise ValueError("Sala vazia ou inexistente.")
+    if quantidade <= 0:
+        raise ValueError("Quantidade inválida.")
+    if not reservado and sala.filme.ingressos < quantidade:
+        raise ValueError("Ingressos esgotados.")
+
+    # A chave vem antes do desconto: sem chave, o inventário fica intacto
+    priv_key = priv_key or load_private_key()
+    if not priv_key:
+        raise PermissionError("Chave privada indisponível. Emissão cancelada.")
+    if not reservado:
+        sala.filme.ingressos -= quantidade
+
+    tickets = [_novo_payload(sala) for _ in range(quantidade)]
+    folhas = [hash_folha(json.dumps(t, sort_keys=True, ensure_ascii=False).encode()) for t in tickets]
+    raiz, provas = construir(folhas)
+    try:
+        assinatura = sign_payload(priv_key, PREFIXO_RAIZ + raiz).hex()
+    except Exception:
+        if not reservado:
+            sala.filme.ingressos += quantidade
+        raise
+
+    for i, (ticket, prova) in enumerate(zip(tickets, provas)):
+        ticket["lote"] = {"indice": i, "raiz": raiz.hex(), "prova": prova}
+        ticket["assinatura"] = assinatura
+        eventos.emitir(eventos.TICKET_EMITIDO, sala=sala, ticket=ticket, reservado=reservado, reserva=reserva)
+    return tickets
+
 def filter_salas(
     state: List[Sala],
     nome_parcial: str = "",
@@ -149,7 +361,8 @@ def filter_salas(
 ) -> List[Sala]:
 
     resultados = []
-    nome_lower = nome_parcial.strip().lower()
+    # Sem acentos e sem diferença de caixa: "acao" encontra "Ação" (ranking: ver busca.py)
+    nome_norm = normalizar(nome_parcial)
 
     for sala in state:
         f = sala.filme
@@ -157,7 +370,7 @@ def filter_salas(
             continue
 
         # Filtro por nome
-        if nome_lower and nome_lower not in f.nome.lower():
+        if nome_norm and nome_norm not in normalizar(f.nome):
             continue
 
         # Filtro por Data "De"
@@ -0,0 +1,289 @@
+# src/signing_agent.py
+"""
+Agente de assinatura (no estilo do ssh-agent): desbloqueia a chave privada uma
+vez e assina para os processos da bilheteria no mesmo host, via socket Unix 0600.
+
+Protocolo: uma linha JSON por requisição.
+  - {"op": "assinar", "payloads": ["<base64>", ...]} -> {"ok": true, "assinaturas": ["<hex>", ...]}
+  - {"op": "ping"}                                   -> {"ok": true}
+
+Cada cliente (identificado por (uid, pid) via SO_PEERCRED) tem um balde de
+tokens: TAXA_POR_CLIENTE assinaturas/s com rajada de RAJADA. O balde é do
+processo, não da conexão: reconectar não devolve a rajada. Ele só é descartado
+depois de ocioso o bastante para ter enchido de novo. Só processos do mesmo
+usuário são atendidos. Sem requisições por `inatividade` segundos o agente
+apaga a chave da memória e termina.
+
+Uso (na pasta src):
+    python -m src.signing_agent [--socket caminho] [--inatividade segundos]
+
+Com o agente rodando, crypto_keys.load_private_key() devolve um ChaveAgente e
+issue_ticket assina por ele sem pedir senha.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from getpass import getpass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .crypto_keys import carregar_chave_privada, load_public_key, sign_payload
+
+AGENTE_SOCKET = Path(__file__).resolve().parent.parent / "data" / "assinador.sock"
+
+# Limites por cliente
+TAXA_POR_CLIENTE = 50.0
+RAJADA = 200
+LOTE_MAX = 256
+# Encerramento automático após este tempo sem requisições (segundos)
+INATIVIDADE_PADRAO = 15 * 60
+
+class _Balde:
+    """Balde de tokens de um cliente."""
+
+    def __init__(self, taxa: float, rajada: int):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.tokens = float(rajada)
+        self.em = time.monotonic()
+
+    def ocioso(self, agora: float) -> bool:
+        """Sem uso há tempo suficiente para estar cheio: descartá-lo não dá tokens a mais."""
+        return (agora - self.em) * self.taxa >= self.rajada
+
+    def consumir(self, n: int) -> bool:
+        agora = time.monotonic()
+        self.tokens = min(self.rajada, self.tokens + (agora - self.em) * self.taxa)
+        self.em = agora
+        if n > self.tokens:
+            return False
+        self.tokens -= n
+        return True
+
+def _credenciais(writer):
+    """(pid, uid) do processo do outro lado do socket, ou (None, None) fora do Linux."""
+    sock = writer.get_extra_info("socket")
+    try:
+        dados = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        pid, uid, _ = struct.unpack("3i", dados)
+        return pid, uid
+    except (AttributeError, OSError):
+        return None, None
+
+
+class AgenteAssinatura:
+    def __init__(
+        self,
+        chave,
+        taxa: float = TAXA_POR_CLIENTE,
+        rajada: int = RAJADA,
+        inatividade: float = INATIVIDADE_PADRAO,
+    ):
+        self._chave = chave
+        self.taxa = taxa
+        self.rajada = rajada
+        self.inatividade = inatividade
+        self._pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+        self._baldes: Dict[object, _Balde] = {}
+        self._ultimo_uso = time.monotonic()
+        self._encerrado: Optional[asyncio.Event] = None
+        self.assinadas = 0
+        self.recusadas = 0
+
+    def _assinar(self, payloads: List[bytes]) -> List[str]:
+        return [sign_payload(self._chave, p).hex() for p in payloads]
+
+    def _podar_baldes(self):
+        agora = time.monotonic()
+        for cliente in [c for c, b in self._baldes.items() if b.ocioso(agora)]:
+            del self._baldes[cliente]
+
+    async def _processar(self, req, cliente) -> dict:
+        if not isinstance(req, dict):
+            return {"ok": False, "erro": "Requisição inválida."}
+        if req.get("op") == "ping":
+            return {"ok": True}
+        if req.get("op") != "assinar":
+            return {"ok": False, "erro": "Operação desconhecida."}
+        try:
+            payloads = [base64.b64decode(p, validate=True) for p in req.get("payloads") or []]
+        except (TypeError, ValueError):
+            return {"ok": False, "erro": "Payload inválido."}
+        if not payloads or len(payloads) > LOTE_MAX:
+            return {"ok": False, "erro": f"Lote deve ter de 1 a {LOTE_MAX} payloads."}
+
+        self._podar_baldes()
+        balde = self._baldes.get(cliente)
+        if balde is None:
+            balde = self._baldes[cliente] = _Balde(self.taxa, self.rajada)
+        if not balde.consumir(len(payloads)):
+            self.recusadas += len(payloads)
+            return {"ok": False, "erro": "Limite de assinaturas excedido."}
+        loop = asyncio.get_running_loop()
+        assinaturas = await loop.run_in_executor(self._pool, self._assinar, payloads)
+        self.assinadas += len(assinaturas)
+        return {"ok": True, "assinaturas": assinaturas}
+
+    async def _atender(self, reader, writer):
+        pid, uid = _credenciais(writer)
+        if uid is not None and uid != os.getuid():
+            writer.close()
+            return
+        # Chave estável entre conexões do mesmo processo; fora do Linux, por conexão
+        cliente = (uid, pid) if pid is not None else id(writer)
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                self._ultimo_uso = time.monotonic()
+                try:
+                    resp = await self._processar(json.loads(linha), cliente)
+                except json.JSONDecodeError:
+                    resp = {"ok": False, "erro": "JSON inválido."}
+                writer.write(json.dumps(resp).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _vigiar_inatividade(self):
+        while True:
+            restante = self._ultimo_uso + self.inatividade - time.monotonic()
+            if restante <= 0:
+                self._encerrado.set()
+                return
+            await asyncio.sleep(min(restante, 1.0))
+
+    async def iniciar(self, socket_path: Path = None):
+        """Sobe o servidor. Retorna o asyncio.Server; `aguardar()` termina por inatividade."""
+        socket_path = Path(socket_path or AGENTE_SOCKET)
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            socket_path.unlink()
+        self.socket_path = socket_path
+        self._encerrado = asyncio.Event()
+        # umask antes do bind: o socket nunca existe com permissão mais aberta
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._atender, path=str(socket_path))
+        finally:
+            os.umask(umask)
+        self._vigia = asyncio.create_task(self._vigiar_inatividade())
+        return server
+
+    async def aguardar(self):
+        await self._encerrado.wait()
+
+    async def parar(self, server=None):
+        if server:
+            server.close()
+            await server.wait_closed()
+            self.socket_path.unlink(missing_ok=True)
+        self._vigia.cancel()
+        self._pool.shutdown(wait=True)
+        # Sem referências à chave desbloqueada depois de parar
+        self._chave = None
+        self._baldes.clear()
+
+
+class ChaveAgente:
+    """
+    Cliente do agente com a interface de chave usada por sign_payload (`sign`)
+    e `public_key()`. Uma conexão por processo, protegida por lock.
+    """
+
+    def __init__(self, socket_path: Path = None):
+        self.socket_path = Path(socket_path or AGENTE_SOCKET)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(str(self.socket_path))
+        self._arq = self._sock.makefile("rwb")
+        self._mutex = threading.Lock()
+
+    def _pedir(self, req: dict) -> dict:
+        with self._mutex:
+            self._arq.write(json.dumps(req).encode() + b"\n")
+            self._arq.flush()
+            linha = self._arq.readline()
+        if not linha:
+            raise PermissionError("Agente de assinatura encerrou a conexão.")
+        return json.loads(linha)
+
+    def assinar_lote(self, payloads: List[bytes]) -> List[bytes]:
+        resp = self._pedir({"op": "assinar", "payloads": [base64.b64encode(p).decode() for p in payloads]})
+        if not resp.get("ok"):
+            raise PermissionError(resp.get("erro") or "Agente recusou a assinatura.")
+        return [bytes.fromhex(a) for a in resp["assinaturas"]]
+
+    def sign(self, data: bytes, *_args) -> bytes:
+        """Mesma assinatura que sign_payload faria localmente (RSA-PSS/SHA-256)."""
+        return self.assinar_lote([data])[0]
+
+    def public_key(self):
+        return load_public_key()
+
+    def fechar(self):
+        self._arq.close()
+        self._sock.close()
+
+
+_conexoes: Dict[Path, ChaveAgente] = {}
+
+def conectar_agente(socket_path: Path = None) -> Optional[ChaveAgente]:
+    """ChaveAgente conectado ao agente, ou None se não há agente rodando."""
+    socket_path = Path(socket_path or AGENTE_SOCKET)
+    cliente = _conexoes.get(socket_path)
+    if cliente is not None:
+        try:
+            if cliente._pedir({"op": "ping"}).get("ok"):
+                return cliente
+        except (OSError, ValueError, PermissionError):
+            pass
+        _conexoes.pop(socket_path, None)
+    if not socket_path.exists():
+        return None
+    try:
+        cliente = ChaveAgente(socket_path)
+    except OSError:
+        return None
+    _conexoes[socket_path] = cliente
+    return cliente
+
+
+async def _rodar(args, chave):
+    agente = AgenteAssinatura(chave, taxa=args.taxa, rajada=args.rajada, inatividade=args.inatividade)
+    server = await agente.iniciar(args.socket)
+    print(f"Agente de assinatura ouvindo em {args.socket} (encerra após {args.inatividade:.0f}s sem uso)")
+    try:
+        await agente.aguardar()
+        print("Agente encerrado por inatividade.")
+    finally:
+        await agente.parar(server)
+
+def main():
+    parser = argparse.ArgumentParser(description="Agente de assinatura de tickets")
+    parser.add_argument("--socket", type=Path, default=AGENTE_SOCKET)
+    parser.add_argument("--inatividade", type=float, default=INATIVIDADE_PADRAO, help="Segundos sem uso até encerrar")
+    parser.add_argument("--taxa", type=float, default=TAXA_POR_CLIENTE, help="Assinaturas/s por cliente")
+    parser.add_argument("--rajada", type=int, default=RAJADA)
+    args = parser.parse_args()
+    try:
+        chave = carregar_chave_privada(getpass("Digite a senha da chave privada: "))
+    except (ValueError, FileNotFoundError):
+        print("❌ Não foi possível desbloquear a chave privada.")
+        return
+    try:
+        asyncio.run(_rodar(args, chave))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# src/simulador.py
+"""
+Simulador de carga de noite de estreia: compradores chegando em várias salas
+ao mesmo tempo (emissão) e catracas validando os tickets (verificação).
+
+Uso (na pasta src):
+    python -m src.simulador --compradores 2000 --taxa 500 --salas 5 --mix 5,3,1,1,1 --vendedores 3 --catracas 4
+    python -m src.simulador ... --servico data/verificador.sock   # valida via verification_server
+    python -m src.simulador ... --saida resultado.json            # para comparar entre versões
+
+A emissão roda sempre em processo: cada sala tem uma fila de compradores atendida por
+--vendedores guichês concorrentes (threads), então o oversell medido é o da emissão
+concorrente numa mesma sala. Em processo,
+a chave RSA é efêmera e o registro de usados/revogações fica num diretório temporário,
+então a simulação não toca em data/. Com --servico os tickets precisam ser aceitos pelo
+verificador real: a chave privada de data/rsa_keys é carregada (senha pedida uma vez).
+"""
+import argparse
+import json
+import queue
+import random
+import socket
+import tempfile
+import threading
+import time
+import tomllib
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .crypto_keys import load_private_key
+from .models import Sala
+from .revocation import RevocationList
+from .service import build_filme, issue_ticket, verify_ticket_payload
+from .used_tickets import UsedTicketStore
+from .utils import percentil
+
+PYPROJECT = Path(__file__).resolve().parent.parent / "pyproject.toml"
+
+@dataclass
+class ConfigSimulacao:
+    compradores: int = 1000
+    taxa: float = 200.0                 # chegadas por segundo (processo de Poisson)
+    salas: int = 5
+    capacidade: int = 200               # ingressos por sala
+    mix: List[float] = field(default_factory=list)  # peso de cada sala; vazio = uniforme
+    vendedores: int = 2                 # guichês por sala, na mesma fila
+    catracas: int = 2
+    releitura: float = 0.05             # fração de tickets apresentados duas vezes
+    servico: Optional[str] = None       # socket do verification_server; None = em processo
+    seed: int = 1
+
+_FIM = object()
+
+def _versao() -> str:
+    try:
+        with open(PYPROJECT, "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+    except Exception:
+        return "desconhecida"
+
+def _resumo_latencias(amostras):
+    return {
+        f"p{p}_ms": round(percentil(amostras, p) * 1000, 3) if amostras else None
+        for p in (50, 95, 99)
+    }
+
+class _ClienteServico:
+    """Conexão bloqueante de uma catraca com o verification_server."""
+
+    def __init__(self, caminho: str):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(caminho)
+        self._arq = self._sock.makefile("rwb")
+
+    def verificar(self, ticket: dict) -> bool:
+        self._arq.write(json.dumps(ticket).encode() + b"\n")
+        self._arq.flush()
+        return bool(json.loads(self._arq.readline()).get("ok"))
+
+    def fechar(self):
+        self._arq.close()
+        self._sock.close()
+
+def simular(cfg: ConfigSimulacao) -> dict:
+    rnd = random.Random(cfg.seed)
+    if cfg.servico:
+        chave = load_private_key()
+        if not chave:
+            raise PermissionError("Chave privada indisponível.")
+    else:
+        chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pub = chave.public_key()
+
+    salas = []
+    for i in range(cfg.salas):
+        sala = Sala(numero=i + 1)
+        sala.adicionar_filme(build_filme(f"Estreia {i + 1}", "Ação", 12, "2099-12-31"))
+        sala.filme.ingressos = cfg.capacidade
+        salas.append(sala)
+    pesos = cfg.mix or [1.0] * cfg.salas
+    if len(pesos) != cfg.salas:
+        raise ValueError("--mix deve ter um peso por sala.")
+    if cfg.vendedores < 1:
+        raise ValueError("--vendedores deve ser pelo menos 1.")
+
+    filas_venda = [queue.Queue() for _ in salas]
+    fila_catraca = queue.Queue()
+    mutex = threading.Lock()
+    lat_emissao, lat_validacao = [], []
+    emitidos = Counter()
+    esgotados = 0
+    admitidos = Counter()
+    recusados = 0
+
+    tmp = tempfile.TemporaryDirectory()
+    store = UsedTicketStore(Path(tmp.name) / "used")
+    revogados = RevocationList(Path(tmp.name) / "revoked.log")
+
+    def vendedor(i, k):
+        nonlocal esgotados
+        sala = salas[i]
+        rnd_local = random.Random((cfg.seed * 1000 + i) * 1000 + k)
+        while True:
+            item = filas_venda[i].get()
+            if item is _FIM:
+                return
+            try:
+                ticket = issue_ticket(sala, priv_key=chave)
+            except ValueError:
+                with mutex:
+                    esgotados += 1
+                continue
+            fim = time.perf_counter()
+            with mutex:
+                lat_emissao.append(fim - item)
+                emitidos[sala.numero] += 1
+            fila_catraca.put((ticket, time.perf_counter()))
+            if rnd_local.random() < cfg.releitura:
+                fila_catraca.put((dict(ticket), time.perf_counter()))
+
+    def catraca():
+        nonlocal recusados
+        cliente = _ClienteServico(cfg.servico) if cfg.servico else None
+        try:
+            while True:
+                item = fila_catraca.get()
+                if item is _FIM:
+                    return
+                ticket, t0 = item
+                if cliente:
+                    ok = cliente.verificar(ticket)
+                else:
+                    try:
+                        ok = verify_ticket_payload(dict(ticket), store=store, revocations=revogados, pub=pub)
+                    except ValueError:
+                        ok = False
+                fim = time.perf_counter()
+                with mutex:
+                    lat_validacao.append(fim - t0)
+                    if ok:
+                        admitidos[ticket["id"]] += 1
+                    else:
+                        recusados += 1
+        finally:
+            if cliente:
+                cliente.fechar()
+
+    vendedores = [
+        threading.Thread(target=vendedor, args=(i, k))
+        for i in range(len(salas)) for k in range(cfg.vendedores)
+    ]
+    catracas = [threading.Thread(target=catraca) for _ in range(cfg.catracas)]
+    for t in vendedores + catracas:
+        t.start()
+
+    inicio = time.perf_counter()
+    proxima = inicio
+    for _ in range(cfg.compradores):
+        proxima += rnd.expovariate(cfg.taxa)
+        espera = proxima - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        i = rnd.choices(range(len(salas)), weights=pesos)[0]
+        filas_venda[i].put(time.perf_counter())
+    for f in filas_venda:
+        for _ in range(cfg.vendedores):
+            f.put(_FIM)
+    for t in vendedores:
+        t.join()
+    fim_emissao = time.perf_counter()
+    for _ in catracas:
+        fila_catraca.put(_FIM)
+    for t in catracas:
+        t.join()
+    fim = time.perf_counter()
+    tmp.cleanup()
+
+    total_emitidos = sum(emitidos.values())
+    return {
+        "versao": _versao(),
+        "quando": datetime.now(timezone.utc).isoformat(),
+        "modo": "servico" if cfg.servico else "em_processo",
+        "config": asdict(cfg),
+        "emissao": {
+            "emitidos": total_emitidos,
+            "esgotados": esgotados,
+            "por_sala": {str(k): v for k, v in sorted(emitidos.items())},
+            "throughput_por_s": round(total_emitidos / (fim_emissao - inicio), 1),
+            **_resumo_latencias(lat_emissao),
+        },
+        "validacao": {
+            "apresentacoes": len(lat_validacao),
+            "admitidos": len(admitidos),
+            "recusados": recusados,
+            "throughput_por_s": round(len(lat_validacao) / (fim - inicio), 1),
+            **_resumo_latencias(lat_validacao),
+        },
+        "oversell": sum(max(0, emitidos[s.numero] - cfg.capacidade) for s in salas),
+        # Tickets emitidos que o inventário não registrou (ou vice-versa)
+        "divergencia_inventario": sum(abs(emitidos[s.numero] - (cfg.capacidade - s.filme.ingressos)) for s in salas),
+        "dupla_admissao": sum(n - 1 for n in admitidos.values() if n > 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de carga de estreia")
+    parser.add_argument("--compradores", type=int, default=1000)
+    parser.add_argument("--taxa", type=float, default=200.0, help="Chegadas por segundo")
+    parser.add_argument("--salas", type=int, default=5)
+    parser.add_argument("--capacidade", type=int, default=200)
+    parser.add_argument("--mix", type=str, default="", help="Pesos por sala, ex.: 5,3,1,1,1")
+    parser.add_argument("--vendedores", type=int, default=2, help="Guichês por sala")
+    parser.add_argument("--catracas", type=int, default=2)
+    parser.add_argument("--releitura", type=float, default=0.05)
+    parser.add_argument("--servico", type=str, default=None, help="Socket do verification_server")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--saida", type=Path, default=None, help="Arquivo JSON com o resultado")
+    args = parser.parse_args()
+
+    cfg = ConfigSimulacao(
+        compradores=args.compradores, taxa=args.taxa, salas=args.salas, capacidade=args.capacidade,
+        mix=[float(x) for x in args.mix.split(",")] if args.mix else [],
+        vendedores=args.vendedores, catracas=args.catracas, releitura=args.releitura, servico=args.servico, seed=args.seed,
+    )
+    resultado = simular(cfg)
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        args.saida.write_text(texto, encoding="utf-8")
+    print(texto)
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,209 @@
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import os, json, base64
+import os, json, base64, struct, zlib
 from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+
+from .locks import file_lock
 
 STATE_FILE = Path(__file__).resolve().parent.parent / "data" / "state.enc"
+TICKET_DIR = Path(__file__).resolve().parent.parent / "data" / "tickets"
 
 def derive_key(password: str, salt: bytes, iterations: int = 200000) -> bytes:
     kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations)
     return kdf.derive(password.encode())
 
-def encrypt_state(obj: dict, password: str):
-    data = json.dumps(obj, ensure_ascii=False).encode()
+class ConflitoVersao(ValueError):
+    """O arquivo de estado mudou desde a versão lida (outro processo salvou antes)."""
+
+    def __init__(self, esperada: int, atual: int):
+        super().__init__(f"Estado alterado por outra instância (versão {atual}, esperada {esperada}).")
+        self.esperada = esperada
+        self.atual = atual
+
+# Formato binário (v2): cabeçalho + fluxo de blocos AES-GCM sobre JSON comprimido.
+#   MAGIC | versão u64 | salt 16 | prefixo de nonce 7 | tamanho do bloco u32
+#   blocos: [tamanho u32][ciphertext + tag]
+# Nonce de cada bloco = prefixo + contador u32 + flag de último bloco (construção STREAM):
+# blocos reordenados, repetidos ou cortados no fim falham na autenticação. O cabeçalho
+# inteiro (inclusive a versão) entra como AAD de todos os blocos.
+# Texto claro: uma linha JSON com os campos de topo exceto "salas", depois uma sala por linha;
+# assim a leitura monta as salas bloco a bloco, sem materializar o texto inteiro.
+MAGIC = b"BEST2\n"
+TAMANHO_BLOCO = 64 * 1024
+_CABECALHO = struct.Struct(">Q16s7sI")
+_TAMANHO = struct.Struct(">I")
+
+def _aad_versao(versao: int):
+    # Arquivos JSON antigos sem versão foram cifrados sem AAD
+    return f"versao:{versao}".encode() if versao else None
+
+def _nonce(prefixo: bytes, contador: int, ultimo: bool) -> bytes:
+    return prefixo + struct.pack(">I", contador) + (b"\x01" if ultimo else b"\x00")
+
+def _ler_cabecalho_binario(f):
+    inicio = f.read(len(MAGIC) + _CABECALHO.size)
+    if not inicio.startswith(MAGIC) or len(inicio) < len(MAGIC) + _CABECALHO.size:
+        return None
+    versao, salt, prefixo, _ = _CABECALHO.unpack(inicio[len(MAGIC):])
+    return versao, salt, prefixo, inicio
+
+def versao_estado(path: Path = None) -> int:
+    """Versão gravada no cabeçalho do arquivo de estado (0 se não existe ou é antigo sem versão)."""
+    path = path or STATE_FILE
+    if not path.exists():
+        return 0
+    with open(path, "rb") as f:
+        cab = _ler_cabecalho_binario(f)
+    if cab is not None:
+        return cab[0]
+    return json.loads(path.read_text(encoding="utf-8")).get("versao", 0)
+
+def _linhas_texto(obj: dict):
+    topo = {k: v for k, v in obj.items() if k != "salas"}
+    yield json.dumps(topo, ensure_ascii=False).encode() + b"\n"
+    for sala in obj.get("salas", []):
+        yield json.dumps(sala, ensure_ascii=False).encode() + b"\n"
+
+def _nova_chave(password: str):
     salt = os.urandom(16)
-    key = derive_key(password, salt)
+    return salt, derive_key(password, salt)
+
+def _gravar(obj: dict, salt: bytes, key: bytes, path: Path, versao: int):
+    """Comprime e cifra em fluxo direto para o disco (memória limitada a ~1 bloco)."""
     aesgcm = AESGCM(key)
-    nonce = os.urandom(12)
-    ct = aesgcm.encrypt(nonce, data, None)
-    payload = {
-        "salt": base64.b64encode(salt).decode("utf-8"),
-        "nonce": base64.b64encode(nonce).decode("utf-8"),
-        "ciphertext": base64.b64encode(ct).decode("utf-8")
-    }
-    STATE_FILE.write_text(
-    json.dumps(payload, ensure_ascii=False),
-    encoding="utf-8"
-)
-    os.chmod(STATE_FILE, 0o600)
-    return True
+    prefixo = os.urandom(7)
+    cabecalho = MAGIC + _CABECALHO.pack(versao, salt, prefixo, TAMANHO_BLOCO)
+    compressor = zlib.compressobj(6)
+    contador = 0
+    pendente = b""
+    # Escrita atômica: leitores sem lock nunca veem arquivo pela metade
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        os.chmod(tmp, 0o600)
+        f.write(cabecalho)
 
-def decrypt_state(password: str):
-    if not STATE_FILE.exists():
-        return None
-    
-    payload = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+        def selar(bloco: bytes, ultimo: bool):
+            nonlocal contador
+            ct = aesgcm.encrypt(_nonce(prefixo, contador, ultimo), bloco, cabecalho)
+            f.write(_TAMANHO.pack(len(ct)) + ct)
+            contador += 1
+
+        for linha in _linhas_texto(obj):
+            pendente += compressor.compress(linha)
+            while len(pendente) > TAMANHO_BLOCO:
+                selar(pendente[:TAMANHO_BLOCO], False)
+                pendente = pendente[TAMANHO_BLOCO:]
+        pendente += compressor.flush()
+        while len(pendente) > TAMANHO_BLOCO:
+            selar(pendente[:TAMANHO_BLOCO], False)
+            pendente = pendente[TAMANHO_BLOCO:]
+        selar(pendente, True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _blocos_decifrados(f, aesgcm: AESGCM, prefixo: bytes, cabecalho: bytes):
+    contador = 0
+    while True:
+        cab = f.read(_TAMANHO.size)
+        if len(cab) < _TAMANHO.size:
+            raise ValueError("Arquivo de estado truncado.")
+        ct = f.read(_TAMANHO.unpack(cab)[0])
+        try:
+            yield aesgcm.decrypt(_nonce(prefixo, contador, False), ct, cabecalho)
+        except InvalidTag:
+            # Só o último bloco decifra com a flag ligada
+            yield aesgcm.decrypt(_nonce(prefixo, contador, True), ct, cabecalho)
+            if f.read(1):
+                raise ValueError("Dados após o último bloco do estado.")
+            return
+        contador += 1
+
+def iterar_estado(password: str, path: Path = None) -> Iterator[dict]:
+    """
+    Lê o estado binário em fluxo: primeiro os campos de topo, depois uma sala (dict)
+    por vez. Lança InvalidTag (senha errada/adulteração) ou ValueError (arquivo inválido).
+    """
+    path = path or STATE_FILE
+    with open(path, "rb") as f:
+        cab = _ler_cabecalho_binario(f)
+        if cab is None:
+            raise ValueError("Arquivo de estado não está no formato binário.")
+        _, salt, prefixo, cabecalho = cab
+        aesgcm = AESGCM(derive_key(password, salt))
+        descompressor = zlib.decompressobj()
+        resto = b""
+        for bloco in _blocos_decifrados(f, aesgcm, prefixo, cabecalho):
+            resto += descompressor.decompress(bloco)
+            *linhas, resto = resto.split(b"\n")
+            for linha in linhas:
+                yield json.loads(linha)
+        resto += descompressor.flush()
+        if resto.strip():
+            yield json.loads(resto)
+
+def _ler_legado(payload: dict, password: str) -> Optional[dict]:
+    """Formato antigo: JSON com salt/nonce/ciphertext em base64, um único bloco."""
     salt = base64.b64decode(payload["salt"])
     nonce = base64.b64decode(payload["nonce"])
     ct = base64.b64decode(payload["ciphertext"])
-
     try:
         key = derive_key(password, salt)
         aesgcm = AESGCM(key)
-        pt = aesgcm.decrypt(nonce, ct, None)
+        pt = aesgcm.decrypt(nonce, ct, _aad_versao(payload.get("versao", 0)))
         return json.loads(pt.decode())
     except Exception:
         return None
+
+def _lock_path(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+def encrypt_state(obj: dict, password: str, path: Path = None):
+    """Grava incondicionalmente (incrementa a versão). Para gravar sem sobrescrever outra instância, use salvar_estado_cas."""
+    path = path or STATE_FILE
+    salt, key = _nova_chave(password)
+    with file_lock(_lock_path(path)):
+        _gravar(obj, salt, key, path, versao_estado(path) + 1)
+    return True
+
+def salvar_estado_cas(obj: dict, password: str, versao_esperada: int, path: Path = None) -> int:
+    """
+    Compare-and-swap: grava só se o arquivo ainda está em `versao_esperada`.
+    Retorna a nova versão ou lança ConflitoVersao.
+    """
+    path = path or STATE_FILE
+    # KDF fora do lock: a seção crítica fica só com a comparação e a escrita
+    salt, key = _nova_chave(password)
+    with file_lock(_lock_path(path)):
+        atual = versao_estado(path)
+        if atual != versao_esperada:
+            raise ConflitoVersao(versao_esperada, atual)
+        _gravar(obj, salt, key, path, atual + 1)
+    return atual + 1
+
+def ler_estado_versionado(password: str, path: Path = None) -> Tuple[Optional[dict], int]:
+    """(estado, versão). Estado None se o arquivo não existe ou a senha não confere."""
+    path = path or STATE_FILE
+    if not path.exists():
+        return None, 0
+    with open(path, "rb") as f:
+        binario = f.read(len(MAGIC)) == MAGIC
+    if not binario:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        return _ler_legado(payload, password), payload.get("versao", 0)
+
+    versao = versao_estado(path)
+    try:
+        itens = iterar_estado(password, path)
+        estado = next(itens)
+        estado["salas"] = list(itens)
+        return estado, versao
+    except Exception:
+        return None, versao
+
+def decrypt_state(password: str, path: Path = None):
+    return ler_estado_versionado(password, path)[0]
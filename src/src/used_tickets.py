@@ -1,14 +1,55 @@
 import json
+import hashlib
+import os
+import shutil
+import threading
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import List, Optional
+
+from .ids import eh_id_compacto, instante
+from .locks import file_lock, lock_file, unlock_file
 
 USED_TICKETS_FILE = Path(__file__).resolve().parent.parent / "data" / "used_tickets.json"
 
+# Quantidade de shards do registro de tickets usados (prefixo de 2 hex do hash do ID)
+NUM_SHARDS = 256
+
+# Partições por data de emissão mais antigas que isto são arquivadas e os tickets
+# delas passam a ser recusados como expirados (maior que qualquer temporada de filme)
+RETENCAO_DIAS = 120
+
+def dia_emissao(emissao: Optional[str]) -> Optional[str]:
+    """Data (AAAA-MM-DD) do campo 'emissao' do ticket, ou None se ausente."""
+    if emissao is None:
+        return None
+    try:
+        return datetime.fromisoformat(str(emissao)).date().isoformat()
+    except ValueError:
+        raise ValueError("Ticket inválido: data de emissão inválida.") from None
+
+def dia_do_ticket(ticket_id: str, emissao: Optional[str] = None) -> Optional[str]:
+    """Dia da emissão; sem o campo, IDs compactos (ids.py) trazem o instante no próprio ID."""
+    dia = dia_emissao(emissao)
+    if dia is None and eh_id_compacto(ticket_id):
+        dia = instante(ticket_id).date().isoformat()
+    return dia
+
+def _eh_dia(nome: str) -> bool:
+    try:
+        return date.fromisoformat(nome).isoformat() == nome
+    except ValueError:
+        return False
+
 def load_used_tickets() -> set:
-    """Carrega o conjunto de tickets já utilizados (IDs) do arquivo data/used_tickets.json."""
+    """Carrega o conjunto de tickets já utilizados (IDs) do arquivo legado e dos shards."""
+    return _load_legacy_file(USED_TICKETS_FILE) | default_store().load_all(include_legacy=False)
+
+def _load_legacy_file(path: Path) -> set:
     try:
-        if not USED_TICKETS_FILE.exists():
+        if not path.exists():
             return set()
-        data = json.loads(USED_TICKETS_FILE.read_text(encoding="utf-8") or "[]")
+        data = json.loads(path.read_text(encoding="utf-8") or "[]")
         return set(data)
     except Exception:
         # Em caso de arquivo corrompido ou outra falha, retorna vazio (evita quebrar a CLI)
@@ -21,4 +62,237 @@ def save_used_tickets(used: set):
         USED_TICKETS_FILE.write_text(json.dumps(list(used), ensure_ascii=False, indent=2), encoding="utf-8")
     except Exception as e:
         # Não interrompe a validação, mas registra no stdout
-        print(f"⚠️ Falha ao salvar registro de tickets usados: {e}")
\ No newline at end of file
+        print(f"⚠️ Falha ao salvar registro de tickets usados: {e}")
+
+
+class _ShardCache:
+    """IDs já lidos de um shard e até que byte o arquivo foi consumido."""
+    __slots__ = ("offset", "ids")
+
+    def __init__(self):
+        self.offset = 0
+        self.ids = set()
+
+
+class UsedTicketStore:
+    """
+    Registro de tickets usados, seguro para vários processos.
+
+    Os IDs são distribuídos em NUM_SHARDS arquivos append-only (um ID por linha),
+    escolhidos pelo prefixo do hash do ID. Cada `mark_used` trava apenas o seu shard
+    (flock), lê somente o que outros processos anexaram desde a última leitura,
+    e anexa o ID com fsync antes de liberar o lock. Verificadores em processos
+    diferentes só disputam o mesmo lock quando caem no mesmo shard.
+
+    Com a data de emissão do ticket, os shards ficam numa partição por dia
+    (base_dir/AAAA-MM-DD/). Partições com mais de `retencao` dias são arquivadas
+    (`podar`, automática uma vez por dia) e o arquivo `horizonte` registra a data
+    de corte: tickets emitidos antes dela são recusados, pois seu registro de uso
+    já não está carregado. Shards na raiz (sem data) são o histórico anterior às
+    partições e continuam consultados.
+    """
+
+    def __init__(self, base_dir: Path, legacy_file: Path | None = None,
+                 retencao: int = RETENCAO_DIAS, poda_automatica: bool = True):
+        self.base_dir = Path(base_dir)
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self.retencao = retencao
+        self.poda_automatica = poda_automatica
+        self._cache = {}
+        self._legacy = (None, set())
+        self._horizonte = (None, "")
+        self._ultima_poda: Optional[date] = None
+        self._mutex = threading.Lock()
+
+    @staticmethod
+    def shard_of(ticket_id: str) -> str:
+        # Hash em vez do prefixo cru do ID: IDs não aleatórios também ficam bem distribuídos
+        return hashlib.blake2b(str(ticket_id).encode(), digest_size=1).hexdigest()
+
+    def _shard_path(self, shard: str, dia: Optional[str] = None) -> Path:
+        return (self.base_dir / dia if dia else self.base_dir) / f"{shard}.ids"
+
+    def _ids_do_shard(self, path: Path) -> set:
+        """IDs de um shard (leitura com lock compartilhado); vazio se não existe."""
+        if not path.exists():
+            return set()
+        with self._mutex, open(path, "rb") as f:
+            lock_file(f, shared=True)
+            try:
+                return self._refresh(f, path).ids
+            finally:
+                unlock_file(f)
+
+    # Partições por dia
+    def particoes(self) -> List[str]:
+        """Dias com partição viva, em ordem."""
+        if not self.base_dir.exists():
+            return []
+        return sorted(p.name for p in self.base_dir.iterdir() if p.is_dir() and _eh_dia(p.name))
+
+    def horizonte(self) -> str:
+        """Data de corte (AAAA-MM-DD): tickets emitidos antes dela são recusados. "" = sem corte."""
+        path = self.base_dir / "horizonte"
+        try:
+            marca = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return ""
+        if self._horizonte[0] != marca:
+            self._horizonte = (marca, path.read_text(encoding="utf-8").strip())
+        return self._horizonte[1]
+
+    def _checar_horizonte(self, dia: str):
+        corte = self.horizonte()
+        if corte and dia < corte:
+            raise ValueError("Ticket expirado.")
+
+    def podar(self, hoje: Optional[date] = None, arquivar: bool = True) -> List[str]:
+        """
+        Arquiva (tar.gz em base_dir/arquivo/) e remove as partições anteriores a
+        hoje - retencao. O horizonte é gravado antes da remoção, então nenhum
+        verificador aceita um ticket cuja partição já sumiu.
+        """
+        hoje = hoje or datetime.now().date()
+        corte = (hoje - timedelta(days=self.retencao)).isoformat()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        podadas = []
+        with file_lock(self.base_dir / "poda.lock"):
+            if corte > self.horizonte():
+                tmp = self.base_dir / "horizonte.tmp"
+                tmp.write_text(corte, encoding="utf-8")
+                os.replace(tmp, self.base_dir / "horizonte")
+            for dia in self.particoes():
+                if dia >= corte:
+                    break
+                pasta = self.base_dir / dia
+                if arquivar:
+                    (self.base_dir / "arquivo").mkdir(exist_ok=True)
+                    shutil.make_archive(str(self.base_dir / "arquivo" / dia), "gztar", root_dir=pasta)
+                shutil.rmtree(pasta)
+                podadas.append(dia)
+        if podadas:
+            with self._mutex:
+                for path in [p for p in self._cache if p.parent.name in podadas]:
+                    del self._cache[path]
+        return podadas
+
+    def _podar_se_preciso(self):
+        hoje = datetime.now().date()
+        if self.poda_automatica and self._ultima_poda != hoje:
+            self._ultima_poda = hoje
+            self.podar(hoje)
+
+    def _refresh(self, f, path: Path) -> _ShardCache:
+        """Lê o final do shard ainda não visto por este processo (chamado com o lock em mãos)."""
+        cache = self._cache.setdefault(path, _ShardCache())
+        size = os.fstat(f.fileno()).st_size
+        if size < cache.offset:
+            # Shard foi truncado/recriado: relê do início
+            cache.offset = 0
+            cache.ids = set()
+        if size > cache.offset:
+            f.seek(cache.offset)
+            chunk = f.read(size - cache.offset)
+            # Ignora uma última linha incompleta (escrita interrompida)
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                if line:
+                    cache.ids.add(line.decode("utf-8"))
+            cache.offset += end
+        return cache
+
+    def _legacy_ids(self) -> set:
+        if not self.legacy_file:
+            return set()
+        try:
+            st = self.legacy_file.stat()
+        except FileNotFoundError:
+            return set()
+        marca = (st.st_mtime_ns, st.st_size)
+        if self._legacy[0] != marca:
+            self._legacy = (marca, _load_legacy_file(self.legacy_file))
+        return self._legacy[1]
+
+    def trava(self, ticket_id: str):
+        """
+        Lock exclusivo entre processos para o shard do ticket. Usado quando a decisão
+        envolve o registro de usados e outro arquivo (usar x cancelar, ver service).
+        """
+        return file_lock(self.base_dir / "travas" / f"{self.shard_of(ticket_id)}.lock")
+
+    def mark_used(self, ticket_id: str, emissao: Optional[str] = None) -> bool:
+        """
+        Registra o ticket como usado de forma atômica.
+        Retorna True se o ticket foi registrado agora, False se já estava usado.
+        Com `emissao` (campo do ticket) ou ID compacto, grava na partição do dia;
+        ValueError se expirado.
+        """
+        ticket_id = str(ticket_id)
+        if "\n" in ticket_id:
+            raise ValueError("ID de ticket inválido.")
+        dia = dia_do_ticket(ticket_id, emissao)
+        if dia:
+            self._podar_se_preciso()
+            self._checar_horizonte(dia)
+            # Usado antes das partições existirem?
+            if ticket_id in self._ids_do_shard(self._shard_path(self.shard_of(ticket_id))):
+                return False
+        path = self._shard_path(self.shard_of(ticket_id), dia)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._mutex, open(path, "a+b") as f:
+            lock_file(f)
+            try:
+                cache = self._refresh(f, path)
+                if ticket_id in cache.ids or ticket_id in self._legacy_ids():
+                    return False
+                line = ticket_id.encode("utf-8") + b"\n"
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                cache.ids.add(ticket_id)
+                cache.offset += len(line)
+                return True
+            finally:
+                unlock_file(f)
+
+    def is_used(self, ticket_id: str, emissao: Optional[str] = None) -> bool:
+        """
+        Sem `emissao` e com ID antigo (UUID), consulta todas as partições vivas.
+        ValueError se o ticket é anterior ao horizonte: sua partição pode já ter sido
+        podada, então "não usado" não pode ser afirmado (nem cancelado/reembolsado).
+        """
+        ticket_id = str(ticket_id)
+        shard = self.shard_of(ticket_id)
+        if ticket_id in self._legacy_ids() or ticket_id in self._ids_do_shard(self._shard_path(shard)):
+            return True
+        dia = dia_do_ticket(ticket_id, emissao)
+        if dia:
+            self._checar_horizonte(dia)
+        dias = [dia] if dia else self.particoes()
+        return any(ticket_id in self._ids_do_shard(self._shard_path(shard, d)) for d in dias)
+
+    def load_all(self, include_legacy: bool = True) -> set:
+        """Todos os IDs usados (todos os shards). Uso administrativo, não no caminho de verificação."""
+        ids = set(self._legacy_ids()) if include_legacy else set()
+        if not self.base_dir.exists():
+            return ids
+        for path in sorted(self.base_dir.glob("*.ids")) + sorted(self.base_dir.glob("????-??-??/*.ids")):
+            with self._mutex, open(path, "rb") as f:
+                lock_file(f, shared=True)
+                try:
+                    ids |= self._refresh(f, path).ids
+                finally:
+                    unlock_file(f)
+        return ids
+
+
+_stores = {}
+
+def default_store() -> UsedTicketStore:
+    """Store padrão em data/used_tickets.d/, que também consulta o arquivo legado used_tickets.json."""
+    base = USED_TICKETS_FILE.parent / "used_tickets.d"
+    key = (base, USED_TICKETS_FILE)
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = UsedTicketStore(base, legacy_file=USED_TICKETS_FILE)
+    return store
@@ -1,5 +1,6 @@
 # utils.py
 from datetime import datetime
+import statistics
 from typing import List
 from .models import Sala
 from .service import initialize_state
@@ -47,6 +48,15 @@ def dict_state_to_salas(data: dict) -> List[Sala]:
         print("⚠️ Erro ao carregar salas do estado. Inicializando padrão.")
     return initialize_state()
 
+# Estatística
+def percentil(amostras, p: float):
+    """Percentil `p` (1-99) de uma lista de amostras; None se vazia."""
+    if not amostras:
+        return None
+    if len(amostras) == 1:
+        return amostras[0]
+    return statistics.quantiles(amostras, n=100, method="inclusive")[int(p) - 1]
+
 # Helpers de input validados
 def input_numero_sala(prompt="Número da sala (1-5): ") -> int | None:
     try:
@@ -0,0 +1,241 @@
+# src/verification_server.py
+"""
+Serviço de verificação para várias catracas/leitores simultâneos.
+
+Protocolo: uma linha JSON por requisição num socket Unix local.
+  - ticket (objeto com "id", "assinatura", ...)  -> {"ok": true, "id": ...} ou {"ok": false, "erro": ...}
+  - {"op": "consultar", "ticket": {...}}           -> autenticidade e situação, sem consumir (peek_ticket)
+  - {"op": "catalogo", "desde": versão, "etag": ...} -> catálogo público (delta, snapshot ou inalterado)
+  - {"op": "stats"}                               -> latências p50/p99, profundidade da fila, totais
+
+Pipeline: leitores -> fila -> micro-lotes de checagem de assinatura num pool de
+threads -> um único escritor que consulta revogações e registra o uso. Só o
+escritor mexe no registro de usados, então não há corrida entre leitores.
+
+Uso (na pasta src):
+    python -m src.verification_server [--socket caminho] [--threads N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from .catalogo_publico import CatalogoPublico
+from .crypto_keys import load_public_key
+from .revocation import RevocationList, default_revocations
+from .service import check_ticket, commit_ticket_use, peek_ticket
+from .used_tickets import UsedTicketStore, default_store
+from .utils import percentil
+
+SOCKET_PATH = Path(__file__).resolve().parent.parent / "data" / "verificador.sock"
+
+# Micro-lote: até LOTE_MAX tickets ou JANELA_LOTE segundos após o primeiro
+LOTE_MAX = 64
+JANELA_LOTE = 0.002
+
+class VerificationService:
+    def __init__(
+        self,
+        pub=None,
+        store: Optional[UsedTicketStore] = None,
+        revocations: Optional[RevocationList] = None,
+        threads: int = 0,
+        catalogo: Optional[CatalogoPublico] = None,
+    ):
+        self.pub = pub or load_public_key()
+        self.store = store or default_store()
+        self.revocations = revocations or default_revocations()
+        self.catalogo = catalogo or CatalogoPublico()
+        self._pool = ThreadPoolExecutor(max_workers=threads or min(8, os.cpu_count() or 1))
+        # Um único thread para commits: fsync do registro fora do event loop, sem concorrência
+        self._escritor = ThreadPoolExecutor(max_workers=1)
+        self._fila: Optional[asyncio.Queue] = None
+        self._commits: Optional[asyncio.Queue] = None
+        self._tarefas = []
+        self._em_voo = set()
+        self.latencias = deque(maxlen=10_000)
+        self.total = 0
+        self.aceitos = 0
+        self.fila_max = 0
+
+    # Etapas do pipeline
+    def _checar_lote(self, tickets):
+        resultados = []
+        for t in tickets:
+            try:
+                resultados.append((check_ticket(t, self.pub), None))
+            except Exception as e:
+                resultados.append((None, str(e) or "Ticket inválido."))
+        return resultados
+
+    def _commit(self, payload) -> Optional[str]:
+        try:
+            commit_ticket_use(payload, self.store, self.revocations)
+            return None
+        except Exception as e:
+            return str(e)
+
+    async def _agrupador(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            limite = loop.time() + JANELA_LOTE
+            while len(lote) < LOTE_MAX:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            # O lote segue para o pool sem bloquear a montagem do próximo
+            tarefa = asyncio.create_task(self._checar(lote))
+            self._em_voo.add(tarefa)
+            tarefa.add_done_callback(self._em_voo.discard)
+
+    async def _checar(self, lote):
+        loop = asyncio.get_running_loop()
+        resultados = await loop.run_in_executor(self._pool, self._checar_lote, [t for t, _, _ in lote])
+        for (_, fut, t0), (payload, erro) in zip(lote, resultados):
+            if erro:
+                self._concluir(fut, t0, {"ok": False, "erro": erro})
+            else:
+                await self._commits.put((payload, fut, t0))
+
+    async def _escritor_unico(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            payload, fut, t0 = await self._commits.get()
+            erro = await loop.run_in_executor(self._escritor, self._commit, payload)
+            if erro:
+                self._concluir(fut, t0, {"ok": False, "id": payload["id"], "erro": erro})
+            else:
+                self.aceitos += 1
+                self._concluir(fut, t0, {"ok": True, "id": payload["id"], "filme": payload["filme"], "sala": payload["sala"]})
+
+    def _concluir(self, fut, t0, resposta):
+        self.latencias.append(time.perf_counter() - t0)
+        if not fut.done():
+            fut.set_result(resposta)
+
+    # API
+    async def verificar(self, ticket: dict) -> dict:
+        if not isinstance(ticket, dict):
+            return {"ok": False, "erro": "Ticket inválido."}
+        self.total += 1
+        fut = asyncio.get_running_loop().create_future()
+        await self._fila.put((ticket, fut, time.perf_counter()))
+        self.fila_max = max(self.fila_max, self._fila.qsize())
+        return await fut
+
+    async def consultar(self, ticket) -> dict:
+        """Peek: fora do pipeline de commit, não registra uso."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, peek_ticket, ticket, self.store, self.revocations, self.pub)
+
+    async def consultar_catalogo(self, desde=None, etag=None) -> dict:
+        """Para quiosques e site: lê os arquivos publicados, sem senha do estado."""
+        loop = asyncio.get_running_loop()
+        try:
+            resp = await loop.run_in_executor(self._pool, self.catalogo.consultar, desde, etag)
+        except (OSError, ValueError) as e:
+            return {"ok": False, "erro": str(e)}
+        return dict(resp, ok=True)
+
+    def stats(self) -> dict:
+        amostras = list(self.latencias)
+        p50, p99 = percentil(amostras, 50), percentil(amostras, 99)
+        return {
+            "total": self.total,
+            "aceitos": self.aceitos,
+            "fila": self._fila.qsize() if self._fila else 0,
+            "fila_max": self.fila_max,
+            "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+        }
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                try:
+                    req = json.loads(linha)
+                except json.JSONDecodeError:
+                    resp = {"ok": False, "erro": "JSON inválido."}
+                else:
+                    if isinstance(req, dict) and req.get("op") == "stats":
+                        resp = self.stats()
+                    elif isinstance(req, dict) and req.get("op") == "consultar":
+                        resp = await self.consultar(req.get("ticket"))
+                    elif isinstance(req, dict) and req.get("op") == "catalogo":
+                        resp = await self.consultar_catalogo(req.get("desde"), req.get("etag"))
+                    else:
+                        resp = await self.verificar(req)
+                writer.write(json.dumps(resp, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def iniciar(self, socket_path: Path = None):
+        """Sobe o pipeline e o servidor. Retorna o objeto asyncio.Server."""
+        self._fila = asyncio.Queue()
+        self._commits = asyncio.Queue()
+        self._tarefas = [asyncio.create_task(self._agrupador()), asyncio.create_task(self._escritor_unico())]
+        socket_path = Path(socket_path or SOCKET_PATH)
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            socket_path.unlink()
+        server = await asyncio.start_unix_server(self._atender, path=str(socket_path))
+        os.chmod(socket_path, 0o600)
+        return server
+
+    async def parar(self, server=None):
+        if server:
+            server.close()
+            await server.wait_closed()
+        for t in self._tarefas:
+            t.cancel()
+        self._pool.shutdown(wait=False)
+        self._escritor.shutdown(wait=True)
+
+
+async def _rodar(args):
+    svc = VerificationService(threads=args.threads)
+    server = await svc.iniciar(args.socket)
+    print(f"Verificador ouvindo em {args.socket}")
+
+    async def relatorio():
+        while True:
+            await asyncio.sleep(args.relatorio)
+            print(json.dumps(svc.stats()))
+
+    tarefa = asyncio.create_task(relatorio()) if args.relatorio else None
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if tarefa:
+            tarefa.cancel()
+        await svc.parar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço de verificação de tickets")
+    parser.add_argument("--socket", type=Path, default=SOCKET_PATH)
+    parser.add_argument("--threads", type=int, default=0, help="Threads para checagem de assinatura")
+    parser.add_argument("--relatorio", type=float, default=10.0, help="Intervalo (s) do relatório de latência; 0 desliga")
+    try:
+        asyncio.run(_rodar(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
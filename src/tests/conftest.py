@@ -0,0 +1,7 @@
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+@pytest.fixture(scope="module")
+def chave():
+    """Chave RSA efêmera de emissão, uma por módulo de teste (gerar custa caro)."""
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
@@ -0,0 +1,106 @@
+import multiprocessing
+import pytest
+from src import eventos
+from src.arrendamento import CoordenadorInventario, PontoDeVenda
+from src.models import Sala
+from src.service import build_filme
+
+def _sala(ingressos=50):
+    s = Sala(numero=1)
+    s.adicionar_filme(build_filme("Estreia", "Ação", 12, "2099-12-31", ingressos=ingressos))
+    return s
+
+def _conserva(situacao):
+    return situacao["livres"] + situacao["arrendados"] + situacao["vencidos"] + situacao["vendidos"] == situacao["capacidade"]
+
+# CT28 - Blocos saem do saldo livre; o último bloco é parcial e depois esgota
+def test_arrendar_e_devolver(tmp_path):
+    coord = CoordenadorInventario(tmp_path)
+    sala = _sala(25)
+    a = coord.arrendar(sala, 10)
+    b = coord.arrendar(sala, 10)
+    c = coord.arrendar(sala, 10)
+    assert (a["quantidade"], b["quantidade"], c["quantidade"]) == (10, 10, 5)
+    with pytest.raises(ValueError):
+        coord.arrendar(sala, 1)
+    assert coord.devolver(a, 4) == 6
+    sit = coord.situacao(1)
+    assert sit["livres"] == 6 and sit["vendidos"] == 4 and _conserva(sit)
+    with pytest.raises(ValueError):
+        coord.devolver(b, 11)
+
+# CT28a - Bloco vencido (dono travado) conta como vendido; devolução tardia recupera a sobra
+def test_bloco_vencido(tmp_path):
+    coord = CoordenadorInventario(tmp_path, margem=30)
+    sala = _sala(10)
+    travado = coord.arrendar(sala, 10, ttl=60, agora=1000)
+    # Vencido para o dono, mas ainda dentro da margem: nada é liberado
+    with pytest.raises(ValueError):
+        coord.arrendar(sala, 1, agora=1061)
+    sit = coord.situacao(1, agora=1100)
+    assert sit["vencidos"] == 10 and sit["livres"] == 0 and _conserva(sit)
+    assert coord.devolver(travado, 1) == 9
+
+    # Ponto de venda devolve sozinho o bloco vencido ao precisar de outro
+    pv = PontoDeVenda(coord, bloco=5, ttl=60)
+    pv.consumir(sala, agora=2000)
+    pv.consumir(sala, agora=2061)
+    sit = coord.situacao(1, agora=2061)
+    assert sit["vendidos"] == 2 and sit["arrendados"] == 5 and sit["livres"] == 3 and _conserva(sit)
+
+# CT28c - Estorno volta ao bloco de onde saiu; de bloco encerrado, ao coordenador; cancelamento chega ao livro
+def test_estorno_no_bloco_de_origem(tmp_path):
+    coord = CoordenadorInventario(tmp_path)
+    sala = _sala(20)
+    pv = PontoDeVenda(coord, bloco=5)
+    pv.vincular("r1", pv.consumir(sala, 2))
+    pv.consumir(sala, 4)  # não cabe no primeiro bloco: ele é encerrado com 2 vendidos
+    assert pv.estornar(sala, 2, pv.origem("r1")) == 2
+    # O bloco novo não é creditado pela reserva do bloco anterior
+    assert pv.disponiveis()[0]["restantes"] == 1
+    sit = coord.situacao(1)
+    assert sit["vendidos"] == 0 and sit["livres"] == 15 and _conserva(sit)
+
+    eventos.registrar_ouvinte(pv.ouvinte)
+    try:
+        pv.vincular("t1", pv.consumir(sala))
+        eventos.emitir(eventos.TICKET_REVOGADO, ticket_id="t1", sala=sala)
+        assert pv.disponiveis()[0]["restantes"] == 1
+        pv.devolver_todos()
+        # Ticket de um bloco já encerrado: de vendidos para livres
+        eventos.emitir(eventos.TICKET_REVOGADO, ticket_id="antigo", sala=sala)
+        # Sem reembolso (filme trocado) não há evento com sala
+        eventos.emitir(eventos.TICKET_REVOGADO, ticket_id="outro", sala=None)
+    finally:
+        eventos.remover_ouvinte(pv.ouvinte)
+    sit = coord.situacao(1)
+    assert sit["vendidos"] == 3 and sit["livres"] == 17 and _conserva(sit)
+
+def _vender(base_dir, fila):
+    pv = PontoDeVenda(CoordenadorInventario(base_dir), bloco=3)
+    sala = _sala(50)
+    vendidos = 0
+    while True:
+        try:
+            pv.consumir(sala)
+        except ValueError:
+            break
+        vendidos += 1
+        if vendidos % 4 == 0:
+            pv.devolver_todos()
+    pv.devolver_todos()
+    fila.put(vendidos)
+
+# CT28b - Vários pontos de venda em processos separados nunca passam da capacidade
+def test_pontos_de_venda_concorrentes(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    fila = ctx.Queue()
+    procs = [ctx.Process(target=_vender, args=(tmp_path, fila)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    vendidos = [fila.get(timeout=30) for _ in procs]
+    for p in procs:
+        p.join(timeout=30)
+    assert sum(vendidos) == 50
+    sit = CoordenadorInventario(tmp_path).situacao(1)
+    assert sit["vendidos"] == 50 and sit["livres"] == 0 and _conserva(sit)
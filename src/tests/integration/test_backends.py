@@ -0,0 +1,91 @@
+import json
+import pytest
+from src.backends import JsonBackend, SqliteBackend, migrar_json_para_sqlite
+from src.service import initialize_state, build_filme, verify_ticket_payload
+from src.used_tickets import UsedTicketStore
+
+def _ticket(i, sala=1):
+    return {"id": f"{i:032x}", "sala": sala, "filme": "Filme", "emissao": "2099-01-01T00:00:00+00:00", "assinatura": "ab"}
+
+@pytest.fixture
+def db(tmp_path):
+    b = SqliteBackend.abrir("senha", tmp_path / "b.db")
+    yield b
+    b.close()
+
+# CT17 - Estado, tickets e usados persistem no SQLite com campos sensíveis cifrados
+def test_sqlite_roundtrip(db, tmp_path):
+    state = initialize_state()
+    state[0].adicionar_filme(build_filme("Segredo", "Ação", 12, "2099-12-31"))
+    state[0].reservas["r1"] = {"quantidade": 2, "expira_em": 1.0}
+    db.save_state(state)
+    db.save_ticket(_ticket(1))
+
+    assert db.load_state()[0].filme.nome == "Segredo"
+    assert db.load_state()[0].reservas["r1"]["quantidade"] == 2
+    assert db.get_ticket(f"{1:032x}")["filme"] == "Filme"
+    assert db.get_ticket("inexistente") is None
+    assert db.mark_used("x") is True
+    assert db.mark_used("x") is False
+    assert db.is_used("x") and not db.is_used("y")
+
+    bruto = (tmp_path / "b.db").read_bytes()
+    assert f"{1:032x}".encode() not in bruto
+    assert b"expira_em" not in bruto
+
+# CT17a - Senha errada é recusada
+def test_sqlite_senha_errada(db, tmp_path):
+    with pytest.raises(ValueError):
+        SqliteBackend.abrir("outra", tmp_path / "b.db")
+
+# CT17b - Busca por prefixo do nome e intervalo de datas usa as colunas indexadas
+def test_sqlite_busca(db):
+    state = initialize_state()
+    state[0].adicionar_filme(build_filme("Matrix", "Ficção", 14, "2099-01-10"))
+    state[1].adicionar_filme(build_filme("matrix 2", "Ficção", 14, "2099-03-10"))
+    state[2].adicionar_filme(build_filme("Duna_", "Ficção", 12, "2099-02-10"))
+    db.save_state(state)
+
+    assert [s.numero for s in db.buscar_filmes("MAT")] == [1, 2]
+    assert [s.numero for s in db.buscar_filmes(data_de="2099-02-01", data_ate="2099-02-28")] == [3]
+    assert db.buscar_filmes("Duna%") == []
+    plano = db.conn.execute("EXPLAIN QUERY PLAN SELECT * FROM salas WHERE data_saida >= '2099'").fetchall()
+    assert "idx_salas_data_saida" in str(plano)
+
+# CT17c - Migração dos arquivos atuais é completa e idempotente
+def test_migracao(tmp_path):
+    origem = JsonBackend("senha", tmp_path / "state.enc", tmp_path / "tickets", UsedTicketStore(tmp_path / "used"))
+    state = initialize_state()
+    state[3].adicionar_filme(build_filme("Migrado", "Drama", 10, "2099-12-31"))
+    origem.save_state(state)
+    for i in range(3):
+        origem.save_ticket(_ticket(i))
+    origem.mark_used(f"{0:032x}")
+
+    resumo = migrar_json_para_sqlite("senha", tmp_path / "m.db", origem)
+    migrar_json_para_sqlite("senha", tmp_path / "m.db", origem)
+    assert resumo["tickets"] == 3
+
+    db = SqliteBackend.abrir("senha", tmp_path / "m.db")
+    assert db.load_state()[3].filme.nome == "Migrado"
+    assert db.conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 3
+    assert db.is_used(f"{0:032x}") and not db.is_used(f"{1:032x}")
+    db.close()
+
+    with pytest.raises(ValueError):
+        migrar_json_para_sqlite("errada", tmp_path / "outro.db", JsonBackend("errada", tmp_path / "state.enc", tmp_path / "tickets", UsedTicketStore(tmp_path / "used")))
+
+# CT17d - O backend serve de registro de usados para a verificação
+def test_backend_como_store(db, tmp_path, monkeypatch):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from src.revocation import RevocationList
+    from src.service import issue_ticket
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    state = initialize_state()
+    state[0].adicionar_filme(build_filme("Entrada", "Ação", 12, "2099-12-31"))
+    ticket = issue_ticket(state[0], priv_key=chave)
+    rev = RevocationList(tmp_path / "rev.log")
+
+    assert verify_ticket_payload(dict(ticket), store=db, revocations=rev, pub=chave.public_key())
+    with pytest.raises(ValueError):
+        verify_ticket_payload(dict(ticket), store=db, revocations=rev, pub=chave.public_key())
@@ -0,0 +1,90 @@
+import random
+import sqlite3
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.backup import RepositorioBackup
+
+def _arvore(base):
+    (base / "tickets").mkdir(parents=True)
+    for i in range(20):
+        (base / "tickets" / f"ticket_{i:03d}.json").write_text(f'{{"id": "{i:03d}", "sala": 1}}')
+    (base / "grande.bin").write_bytes(random.Random(0).randbytes(400_000))
+    (base / "state.enc.lock").write_bytes(b"")
+
+def _conteudo(base):
+    return {p.relative_to(base).as_posix(): p.read_bytes() for p in sorted(base.rglob("*")) if p.is_file()}
+
+def _pedacos(repo_path):
+    return {p.name for p in (repo_path / "chunks").rglob("*") if p.is_file()}
+
+# CT29 - Segundo backup só grava o que mudou; restauração por instante volta ao estado antigo
+def test_backup_incremental_e_restauracao(tmp_path):
+    dados = tmp_path / "data"
+    _arvore(dados)
+    repo = RepositorioBackup.abrir("segredo", tmp_path / "repo")
+    t0 = datetime(2025, 6, 1, 3, 0, tzinfo=timezone.utc)
+    r1 = repo.criar_snapshot(dados, agora=t0)
+    pedacos_r1 = _pedacos(tmp_path / "repo")
+    assert r1["arquivos"] == 21 and r1["reaproveitados"] == 0
+    original = _conteudo(dados)
+
+    grande = (dados / "grande.bin").read_bytes()
+    (dados / "grande.bin").write_bytes(grande[:200_000] + b"inserido" + grande[200_000:])
+    (dados / "tickets" / "ticket_020.json").write_text('{"id": "020", "sala": 2}')
+    r2 = repo.criar_snapshot(dados, agora=t0 + timedelta(days=1))
+    assert r2["reaproveitados"] == 20
+    # Inserção no meio: só os pedaços em volta são novos (mais o do ticket novo)
+    assert len(_pedacos(tmp_path / "repo") - pedacos_r1) <= 3
+    assert r2["bytes_gravados"] < 64 * 1024 + 1024
+
+    destino = tmp_path / "restaurado"
+    r = repo.restaurar(destino, quando=t0 + timedelta(hours=12), threads=4)
+    assert r["snapshot"] == r1["snapshot"]
+    esperado = {k: v for k, v in original.items() if not k.endswith(".lock")}
+    assert _conteudo(destino) == esperado
+
+    recente = repo.restaurar(tmp_path / "recente")
+    assert recente["snapshot"] == r2["snapshot"] and recente["arquivos"] == 22
+    with pytest.raises(ValueError):
+        repo.restaurar(tmp_path / "x", quando=t0 - timedelta(days=1))
+
+# CT29a - Senha errada e pedaço adulterado são detectados
+def test_backup_senha_e_adulteracao(tmp_path):
+    dados = tmp_path / "data"
+    _arvore(dados)
+    repo = RepositorioBackup.abrir("segredo", tmp_path / "repo")
+    repo.criar_snapshot(dados)
+    with pytest.raises(PermissionError):
+        RepositorioBackup.abrir("errada", tmp_path / "repo")
+
+    chunk = next(p for p in (tmp_path / "repo" / "chunks").rglob("*") if p.is_file())
+    blob = bytearray(chunk.read_bytes())
+    blob[-1] ^= 1
+    chunk.write_bytes(bytes(blob))
+    with pytest.raises(ValueError):
+        repo.restaurar(tmp_path / "restaurado")
+
+# CT29b - Banco SQLite em WAL entra consistente, com o que ainda não passou do -wal
+def test_backup_sqlite_wal(tmp_path):
+    dados = tmp_path / "data"
+    dados.mkdir()
+    conn = sqlite3.connect(dados / "bilheteria.db")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE usados (id TEXT PRIMARY KEY)")
+    conn.executemany("INSERT INTO usados VALUES (?)", [(f"{i:03d}",) for i in range(100)])
+    conn.commit()
+    assert (dados / "bilheteria.db-wal").stat().st_size > 0
+
+    repo = RepositorioBackup.abrir("segredo", tmp_path / "repo")
+    r = repo.criar_snapshot(dados)
+    conn.close()
+    assert r["arquivos"] == 1
+
+    destino = tmp_path / "restaurado"
+    repo.restaurar(destino)
+    assert [p.name for p in destino.iterdir()] == ["bilheteria.db"]
+    restaurado = sqlite3.connect(destino / "bilheteria.db")
+    assert restaurado.execute("SELECT COUNT(*) FROM usados").fetchone()[0] == 100
+    assert restaurado.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    restaurado.close()
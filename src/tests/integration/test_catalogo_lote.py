@@ -0,0 +1,60 @@
+import json
+import pytest
+from src.service import initialize_state, add_filme_to_sala, parse_data_saida
+from src.catalog_io import importar_catalogo, exportar_catalogo, ImportacaoError
+
+# CT12 - Importação CSV em lote
+def test_importar_csv(tmp_path):
+    arq = tmp_path / "semana.csv"
+    arq.write_text(
+        "sala,nome,genero,idade_minima,data_saida\n"
+        "1,Filme A,Ação,12,2099-12-31\n"
+        "3,Filme B,Drama,16,31/01/2099\n",
+        encoding="utf-8",
+    )
+    state = initialize_state()
+    assert importar_catalogo(state, arq) == 2
+    assert state[0].filme.nome == "Filme A"
+    assert state[2].filme.data_saida == "2099-01-31"
+    assert state[2].filme.ingressos == 50
+    assert state[1].filme is None
+
+# CT12a - Todos os erros reportados e nada aplicado
+def test_importar_com_erros_nao_altera_estado(tmp_path):
+    arq = tmp_path / "semana.jsonl"
+    linhas = [
+        {"sala": 1, "nome": "Ok", "genero": "Ação", "idade_minima": 10, "data_saida": "2099-12-31"},
+        {"sala": 9, "nome": "Sala errada", "genero": "Ação", "idade_minima": 10, "data_saida": "2099-12-31"},
+        {"sala": 2, "nome": "", "genero": "Ação", "idade_minima": 10, "data_saida": "2099-12-31"},
+        {"sala": 1, "nome": "Repetida", "genero": "Ação", "idade_minima": 10, "data_saida": "2099-12-31"},
+    ]
+    arq.write_text("\n".join(json.dumps(l) for l in linhas) + "\n{quebrado\n", encoding="utf-8")
+
+    state = initialize_state()
+    add_filme_to_sala(state[0], "Original", "Drama", 12, "2099-06-30")
+    with pytest.raises(ImportacaoError) as exc:
+        importar_catalogo(state, arq)
+
+    assert [linha for linha, _ in exc.value.erros] == [2, 3, 4, 5]
+    assert state[0].filme.nome == "Original"
+
+# CT12b - Exportar e reimportar preserva o catálogo
+@pytest.mark.parametrize("nome_arquivo", ["catalogo.csv", "catalogo.jsonl"])
+def test_exportar_reimportar(tmp_path, nome_arquivo):
+    state = initialize_state()
+    add_filme_to_sala(state[1], "Filme X", "Comédia", 10, "2099-05-01")
+    state[1].filme.ingressos = 30
+
+    arq = tmp_path / nome_arquivo
+    assert exportar_catalogo(state, arq) == 1
+
+    novo = initialize_state()
+    importar_catalogo(novo, arq)
+    assert novo[1].filme == state[1].filme
+
+# CT12c - Datas repetidas usam o cache de parsing
+def test_parse_data_com_cache():
+    parse_data_saida.cache_clear()
+    for _ in range(10):
+        parse_data_saida("2099-12-31")
+    assert parse_data_saida.cache_info().hits == 9
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import pytest
+from src.catalogo_publico import CatalogoPublico, aplicar_resposta
+from src.service import initialize_state, add_filme_to_sala, remove_filme_from_sala
+from src.revocation import RevocationList
+from src.used_tickets import UsedTicketStore
+from src.verification_server import VerificationService
+
+@pytest.fixture
+def state():
+    s = initialize_state()
+    add_filme_to_sala(s[0], "Estreia", "Ação", 12, "2099-12-31")
+    add_filme_to_sala(s[1], "Drama", "Drama", 14, "2099-12-31")
+    return s
+
+# CT26 - Publicação versionada: nada muda, nada publica; snapshot sem reservas e assinado
+def test_publicar_versoes(tmp_path, state, chave):
+    cat = CatalogoPublico(tmp_path)
+    assert cat.publicar(state, chave) == 1
+    assert cat.publicar(state, chave) is None
+    state[0].filme.ingressos -= 3
+    state[0].reservas["r1"] = {"quantidade": 2, "expira_em": "2099-01-01T00:00:00+00:00"}
+    assert cat.publicar(state, chave) == 2
+
+    doc = json.loads((tmp_path / "catalogo.json").read_text(encoding="utf-8"))
+    assert doc["versao"] == 2 and doc["salas"][0]["filme"]["ingressos"] == 47
+    assert "reservas" not in json.dumps(doc)
+    delta = json.loads((tmp_path / "deltas" / "0000000002.json").read_text(encoding="utf-8"))
+    assert [s["numero"] for s in delta["salas"]] == [1]
+
+# CT26a - Quiosque acompanha por deltas e confere assinatura/ETag
+def test_quiosque_por_deltas(tmp_path, state, chave):
+    pub = chave.public_key()
+    cat = CatalogoPublico(tmp_path)
+    cat.publicar(state, chave)
+    local = aplicar_resposta(None, cat.consultar(), pub)
+    assert cat.consultar(etag=local["etag"])["inalterado"]
+
+    state[0].filme.ingressos -= 1
+    cat.publicar(state, chave)
+    remove_filme_from_sala(state[1])
+    add_filme_to_sala(state[2], "Nova", "Ficção", 10, "2099-12-31")
+    cat.publicar(state, chave)
+
+    resp = cat.consultar(desde=local["versao"])
+    assert resp["de"] == 1 and [s["numero"] for s in resp["salas"]] == [1, 2, 3]
+    local = aplicar_resposta(local, resp, pub)
+    assert local == aplicar_resposta(None, cat.consultar(), pub)
+
+    adulterado = dict(resp, salas=[dict(resp["salas"][0], filme=dict(resp["salas"][0]["filme"], ingressos=999))])
+    with pytest.raises(ValueError):
+        aplicar_resposta(dict(local, versao=1), adulterado, pub)
+
+# CT26b - Cliente atrasado além dos deltas guardados recebe o snapshot completo
+def test_deltas_podados(tmp_path, state, chave):
+    cat = CatalogoPublico(tmp_path, max_deltas=2)
+    for _ in range(5):
+        state[0].filme.ingressos -= 1
+        cat.publicar(state, chave)
+    assert sorted(p.name for p in (tmp_path / "deltas").iterdir()) == ["0000000004.json", "0000000005.json"]
+    assert cat.consultar(desde=1)["completo"]
+    assert cat.consultar(desde=3)["de"] == 3
+
+# CT26c - Verificador responde consultas de catálogo pelo socket
+def test_catalogo_pelo_verificador(tmp_path, state, chave):
+    cat = CatalogoPublico(tmp_path / "catalogo")
+    cat.publicar(state, chave)
+    sock = tmp_path / "v.sock"
+
+    async def cenario():
+        svc = VerificationService(
+            pub=chave.public_key(),
+            store=UsedTicketStore(tmp_path / "used"),
+            revocations=RevocationList(tmp_path / "revoked.log"),
+            catalogo=cat,
+        )
+        server = await svc.iniciar(sock)
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(sock))
+            writer.write(json.dumps({"op": "catalogo", "desde": 1}).encode() + b"\n")
+            await writer.drain()
+            resp = json.loads(await reader.readline())
+            writer.close()
+            return resp
+        finally:
+            await svc.parar(server)
+
+    resp = asyncio.run(cenario())
+    assert resp["ok"] and resp["inalterado"] and resp["versao"] == 1
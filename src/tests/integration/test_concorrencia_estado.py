@@ -0,0 +1,111 @@
+import json
+import pytest
+from unittest.mock import patch
+import src.cli as cli
+from src import storage
+from src.mesclagem import mesclar_estados, aplicar_estado
+from src.service import initialize_state, build_filme
+from src.storage import ConflitoVersao, salvar_estado_cas, ler_estado_versionado, encrypt_state
+from src.utils import salas_to_dict_state, dict_state_to_salas
+
+SENHA = "teste123"
+
+@pytest.fixture
+def arquivo(tmp_path, monkeypatch):
+    path = tmp_path / "state.enc"
+    monkeypatch.setattr(storage, "STATE_FILE", path)
+    monkeypatch.setattr(cli, "STATE_FILE", path)
+    monkeypatch.setattr(cli, "_leitura", None)
+    return path
+
+def _com_filme(nome="Filme", ingressos=50):
+    state = initialize_state()
+    state[0].adicionar_filme(build_filme(nome, "Ação", 12, "2099-12-31", ingressos=ingressos))
+    return state
+
+# CT21 - Compare-and-swap recusa gravação sobre versão mais nova
+def test_cas_conflito(arquivo):
+    encrypt_state(salas_to_dict_state(_com_filme()), SENHA)
+    _, versao = ler_estado_versionado(SENHA)
+    assert versao == 1
+    assert salvar_estado_cas({"salas": []}, SENHA, versao) == 2
+    with pytest.raises(ConflitoVersao) as e:
+        salvar_estado_cas({"salas": []}, SENHA, versao)
+    assert e.value.atual == 2
+
+# CT21a - Arquivo antigo (sem versão) continua legível
+def test_formato_sem_versao(arquivo):
+    # Grava no formato antigo: sem "versao" e sem AAD
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    import base64, os
+    salt, nonce = os.urandom(16), os.urandom(12)
+    ct = AESGCM(storage.derive_key(SENHA, salt)).encrypt(nonce, b'{"salas": []}', None)
+    arquivo.write_text(json.dumps({k: base64.b64encode(v).decode() for k, v in
+                                   {"salt": salt, "nonce": nonce, "ciphertext": ct}.items()}))
+    assert ler_estado_versionado(SENHA) == ({"salas": []}, 0)
+
+# CT21b - Vendas em duas instâncias se somam; troca de filme dos dois lados é conflito
+def test_mesclagem_tres_vias():
+    base = salas_to_dict_state(_com_filme())
+    local = salas_to_dict_state(_com_filme(ingressos=47))
+    remoto = salas_to_dict_state(_com_filme(ingressos=45))
+    remoto["salas"][1]["filme"] = build_filme("Outra", "Drama", 10, "2099-12-31").to_dict()
+    mesclado, conflitos = mesclar_estados(base, local, remoto)
+    assert conflitos == []
+    assert mesclado["salas"][0]["filme"]["ingressos"] == 42
+    assert mesclado["salas"][1]["filme"]["nome"] == "Outra"
+
+    local = salas_to_dict_state(_com_filme("Aqui"))
+    remoto = salas_to_dict_state(_com_filme("Lá"))
+    mesclado, conflitos = mesclar_estados(base, local, remoto)
+    assert len(conflitos) == 1 and "Sala 1" in conflitos[0]
+    assert mesclado["salas"][0]["filme"]["nome"] == "Lá"
+
+# CT21e - As duas instâncias vendem os últimos ingressos: saldo 0, reservas das duas e oversell relatado
+def test_mesclagem_oversell():
+    base = salas_to_dict_state(_com_filme(ingressos=3))
+    local = salas_to_dict_state(_com_filme(ingressos=0))
+    local["salas"][0]["reservas"] = {"r-aqui": {"quantidade": 1, "expira_em": 9e9}}
+    remoto = salas_to_dict_state(_com_filme(ingressos=1))
+    remoto["salas"][0]["reservas"] = {"r-la": {"quantidade": 1, "expira_em": 9e9}}
+    mesclado, conflitos = mesclar_estados(base, local, remoto)
+    sala = mesclado["salas"][0]
+    assert sala["filme"]["ingressos"] == 0
+    assert set(sala["reservas"]) == {"r-aqui", "r-la"}
+    assert len(conflitos) == 1 and "excedem em 2" in conflitos[0]
+
+# CT21c - Duas instâncias da CLI: a segunda a salvar incorpora as vendas da primeira
+def test_duas_instancias(arquivo):
+    encrypt_state(salas_to_dict_state(_com_filme()), SENHA)
+    with patch.object(cli, "getpass", return_value=SENHA):
+        a, _ = cli._load_state_e_senha()
+        leitura_a = cli._leitura
+        b, _ = cli._load_state_e_senha()
+        leitura_b = cli._leitura
+
+        filme_b = b[0].filme
+        a[0].filme.ingressos -= 3
+        b[0].filme.ingressos -= 2
+        b[2].adicionar_filme(build_filme("Nova", "Drama", 10, "2099-12-31"))
+
+        cli._leitura = leitura_a
+        cli.save_state_interactive(a)
+        cli._leitura = leitura_b
+        cli.save_state_interactive(b)
+
+    assert b[0].filme is filme_b
+    assert b[0].filme.ingressos == 45
+    salvo = dict_state_to_salas(ler_estado_versionado(SENHA)[0])
+    assert salvo[0].filme.ingressos == 45
+    assert salvo[2].filme.nome == "Nova"
+    assert ler_estado_versionado(SENHA)[1] == 3
+
+# CT21d - aplicar_estado preserva objetos e devolve só salas com filme trocado
+def test_aplicar_estado_no_lugar():
+    state = _com_filme()
+    sala, filme = state[0], state[0].filme
+    novo = salas_to_dict_state(_com_filme(ingressos=10))
+    novo["salas"][1]["filme"] = build_filme("Outra", "Drama", 10, "2099-12-31").to_dict()
+    trocadas = aplicar_estado(state, novo)
+    assert state[0] is sala and sala.filme is filme and filme.ingressos == 10
+    assert trocadas == [state[1]]
@@ -0,0 +1,142 @@
+from src import eventos
+from src.contadores import ContadoresInventario, _SLOT, _CABECALHO
+from src.event_log import EventLog
+from src.models import Sala
+from src.service import build_filme, issue_ticket
+from src.utils import salas_to_dict_state, dict_state_to_salas
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+def _state(ingressos=50):
+    s = Sala(numero=1)
+    s.adicionar_filme(build_filme("Estreia", "Ação", 12, "2099-12-31", ingressos=ingressos))
+    return [s]
+
+# CT32 - Vendas não salvas voltam na abertura; depois de salvar não são reaplicadas
+def test_contadores_reaplicam_vendas(tmp_path):
+    path = tmp_path / "contadores.bin"
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    state = _state()
+    c = ContadoresInventario.abrir(path)
+    assert c.aplicar(state) == []
+    for _ in range(7):
+        issue_ticket(state[0], priv_key=chave)
+        c.gravar(state[0])
+    c.fechar()
+
+    # Queda sem salvar: o state.enc ainda tem 50
+    state = _state()
+    c = ContadoresInventario.abrir(path)
+    assert [s.numero for s in c.aplicar(state)] == [1] and state[0].filme.ingressos == 43
+    c.consolidar(state)
+    c.fechar()
+
+    c = ContadoresInventario.abrir(path)
+    state = _state(43)
+    assert c.aplicar(state) == [] and state[0].filme.ingressos == 43
+    # Outra instância salvou 40 (vendeu 3): as 2 vendas daqui somam em cima
+    state[0].filme.ingressos -= 2
+    c.gravar(state[0])
+    c.fechar()
+    c = ContadoresInventario.abrir(path)
+    state = _state(40)
+    c.aplicar(state)
+    assert state[0].filme.ingressos == 38
+    c.fechar()
+
+# CT32a - Cópia corrompida cai para a anterior; filme trocado e segunda instância são ignorados
+def test_contadores_corrupcao_e_trava(tmp_path):
+    path = tmp_path / "contadores.bin"
+    state = _state()
+    c = ContadoresInventario.abrir(path)
+    c.aplicar(state)
+    assert ContadoresInventario.abrir(path) is None
+    state[0].filme.ingressos = 45
+    c.gravar(state[0])
+    state[0].filme.ingressos = 44
+    c.gravar(state[0])
+    seq = c.ler(1)["seq"]
+    c.fechar()
+
+    # Escrita interrompida na cópia mais recente
+    dados = bytearray(path.read_bytes())
+    off = _CABECALHO.size + (seq % 2) * (_SLOT // 2)
+    dados[off + 4] ^= 0xFF
+    path.write_bytes(bytes(dados))
+    c = ContadoresInventario.abrir(path)
+    assert c.ler(1)["atual"] == 45
+    state = _state()
+    c.aplicar(state)
+    assert state[0].filme.ingressos == 45
+
+    outro = Sala(numero=1)
+    outro.adicionar_filme(build_filme("Outro", "Drama", 12, "2099-12-31"))
+    assert c.aplicar([outro]) == [] and outro.filme.ingressos == 50
+    c.fechar()
+
+def _abrir_cli(path, base, salvo):
+    """Uma CLI com log de eventos e contadores, como menu_loop: recupera e anexa os dois."""
+    state = dict_state_to_salas(salas_to_dict_state(salvo))
+    lg = EventLog.abrir("senha", base, fsync=False)
+    lg.recuperar(state)
+    c = ContadoresInventario.abrir(path)
+    alteradas = c.aplicar(state, lg.sessao, lg.sessoes_recuperadas) if c is not None else []
+    lg.anexar()
+    if c is not None:
+        eventos.registrar_ouvinte(c.ouvinte)
+    return state, lg, c, alteradas
+
+def _cair(lg, c):
+    """Sai sem salvar."""
+    if c is not None:
+        eventos.remover_ouvinte(c.ouvinte)
+        c.fechar()
+    lg.desanexar()
+
+# CT32b - Vendas recuperadas pelo log não são reaplicadas pelos contadores, mesmo com outro save no meio
+def test_contadores_e_log_juntos(tmp_path):
+    path, base = tmp_path / "contadores.bin", tmp_path / "events"
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    salvo = _state()
+
+    # A vende 3; B (sem os contadores, em uso por A) vende 2 e salva 48; depois A cai
+    state_a, lg_a, c_a, _ = _abrir_cli(path, base, salvo)
+    for _ in range(3):
+        issue_ticket(state_a[0], priv_key=chave)
+    # Os ouvintes são globais: A sai do ar (sem soltar as travas) enquanto B vende
+    eventos.remover_ouvinte(lg_a.ouvinte)
+    eventos.remover_ouvinte(c_a.ouvinte)
+    state_b, lg_b, c_b, _ = _abrir_cli(path, base, salvo)
+    assert c_b is None and lg_b.sessoes_recuperadas == []
+    for _ in range(2):
+        issue_ticket(state_b[0], priv_key=chave)
+    salvo = dict_state_to_salas(salas_to_dict_state(state_b))
+    lg_b.marcar_salvo(1)
+    _cair(lg_b, None)
+    _cair(lg_a, c_a)
+    assert salvo[0].filme.ingressos == 48
+
+    # C: o log recupera as 3 vendas de A; os contadores de A não descontam de novo
+    state_c, lg_c, c_c, alteradas = _abrir_cli(path, base, salvo)
+    assert state_c[0].filme.ingressos == 45 and alteradas == []
+    issue_ticket(state_c[0], priv_key=chave)
+    _cair(lg_c, c_c)
+
+    # D: C caiu depois de assumir A; log recupera A e C, contadores (de C) não somam nada
+    state_d, lg_d, c_d, alteradas = _abrir_cli(path, base, salvo)
+    assert state_d[0].filme.ingressos == 44 and alteradas == []
+    assert set(lg_d.sessoes_recuperadas) == {lg_a.sessao, lg_c.sessao}
+    c_d.consolidar(state_d)
+    lg_d.marcar_salvo(2)
+    _cair(lg_d, c_d)
+
+    # Sem o log (outra senha/pasta), os contadores sozinhos ainda reaplicam o não salvo
+    c = ContadoresInventario.abrir(path)
+    state = _state(44)
+    c.aplicar(state)
+    state[0].filme.ingressos -= 1
+    c.gravar(state[0])
+    c.fechar()
+    c = ContadoresInventario.abrir(path)
+    state = _state(44)
+    assert [s.numero for s in c.aplicar(state)] == [1] and state[0].filme.ingressos == 43
+    c.fechar()
@@ -0,0 +1,78 @@
+import asyncio
+import json
+from src import eventos
+from src.disponibilidade import FeedDisponibilidade
+from src.models import Sala
+from src.service import build_filme, issue_ticket, remove_filme_from_sala
+
+def _state():
+    state = []
+    for numero in (1, 2):
+        s = Sala(numero=numero)
+        s.adicionar_filme(build_filme(f"Filme {numero}", "Ação", 12, "2099-12-31"))
+        state.append(s)
+    return state
+
+async def _ler(reader, ate):
+    """Lê atualizações até `ate(atualizacao)` ser verdadeiro."""
+    lidas = []
+    while True:
+        a = json.loads(await asyncio.wait_for(reader.readline(), 5))
+        lidas.append(a)
+        if ate(a):
+            return lidas
+
+# CT31 - Rajada de vendas chega ao assinante do socket como poucas atualizações
+def test_feed_funde_rajada(tmp_path, chave):
+    state = _state()
+    feed = FeedDisponibilidade.from_state(state, janela=0.05)
+    eventos.registrar_ouvinte(feed.ouvinte)
+
+    async def cenario():
+        await feed.iniciar()
+        server = await feed.servir(tmp_path / "d.sock")
+        reader, writer = await asyncio.open_unix_connection(str(tmp_path / "d.sock"))
+        iniciais = [json.loads(await reader.readline()) for _ in state]
+        assert [(a["sala"], a["ingressos"]) for a in iniciais] == [(1, 50), (2, 50)]
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: [issue_ticket(state[0], priv_key=chave) for _ in range(50)])
+        lidas = await _ler(reader, lambda a: a["sala"] == 1 and a["ingressos"] == 0)
+        remove_filme_from_sala(state[1])
+        removida = await _ler(reader, lambda a: a["sala"] == 2)
+        writer.close()
+        await feed.parar(server)
+        return lidas, removida
+
+    try:
+        lidas, removida = asyncio.run(cenario())
+    finally:
+        eventos.remover_ouvinte(feed.ouvinte)
+    assert len(lidas) < 10 and all(a["sala"] == 1 for a in lidas)
+    assert removida[-1]["filme"] is None
+    versoes = [a["versao"] for a in lidas + removida]
+    assert versoes == sorted(versoes)
+
+# CT31a - Assinante que não lê não segura a emissão: fica com uma atualização por sala
+def test_feed_assinante_lento(chave):
+    state = _state()
+    feed = FeedDisponibilidade.from_state(state, janela=0.01)
+
+    async def cenario():
+        await feed.iniciar()
+        lento = feed.assinar()
+        rapido = feed.assinar()
+        await rapido.proximas()
+        for i in range(10):
+            for sala in state:
+                issue_ticket(sala, priv_key=chave)
+            feed.marcar_todas(state)
+            await asyncio.sleep(0.03)
+            assert [a["ingressos"] for a in await rapido.proximas()] == [49 - i, 49 - i]
+        pendentes = await lento.proximas()
+        await feed.parar()
+        return lento, pendentes
+
+    lento, pendentes = asyncio.run(cenario())
+    assert [(a["sala"], a["ingressos"]) for a in pendentes] == [(1, 40), (2, 40)]
+    assert lento.fundidas == lento.recebidas - 2
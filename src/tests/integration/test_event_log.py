@@ -0,0 +1,133 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.event_log import EventLog
+from src.holds import criar_reserva, confirmar_reserva
+from src.service import initialize_state, add_filme_to_sala, issue_ticket
+from src.utils import salas_to_dict_state, dict_state_to_salas
+
+@pytest.fixture
+def log(tmp_path):
+    lg = EventLog.abrir("senha", tmp_path / "events", fsync=False)
+    yield lg
+    lg.desanexar()
+
+def _emitir(sala, n):
+    with patch("src.service.load_private_key") as mock_key:
+        fake_key = MagicMock()
+        fake_key.sign.return_value = b"sig"
+        mock_key.return_value = fake_key
+        for _ in range(n):
+            issue_ticket(sala)
+
+# CT14 - Eventos do service são registrados criptografados, com operador
+def test_eventos_registrados(log):
+    state = initialize_state()
+    log.anexar()
+    add_filme_to_sala(state[0], "Filme Log", "Ação", 12, "2099-12-31")
+    _emitir(state[0], 2)
+
+    eventos = list(log.ler())
+    assert [e["tipo"] for e in eventos] == ["filme_adicionado", "ticket_emitido", "ticket_emitido"]
+    assert [e["seq"] for e in eventos] == [1, 2, 3]
+    assert eventos[2]["dados"]["ingressos"] == 48
+    assert eventos[0]["operador"]
+    assert b"Filme Log" not in log.path.read_bytes()
+
+# CT14a - Inicialização só decifra a cauda a partir da marca pendente mais antiga
+def test_recuperar_so_a_cauda(tmp_path):
+    base = tmp_path / "events"
+    state = initialize_state()
+    add_filme_to_sala(state[0], "Antes", "Ação", 12, "2099-12-31")
+    salva = EventLog.abrir("senha", base, fsync=False)
+    salva.recuperar(state)
+    salva.anexar()
+    _emitir(state[0], 20)
+    salva.marcar_salvo(1)
+    salvo = _copia(state)
+    salva.desanexar()
+
+    # Depois do salvamento: 3 vendas e queda
+    caiu = EventLog.abrir("senha", base, fsync=False)
+    caiu.recuperar(state)
+    caiu.anexar()
+    _emitir(state[0], 3)
+    caiu.desanexar()
+
+    reaberto = EventLog.abrir("senha", base, fsync=False)
+    assert reaberto.seq == 24
+    lidos = []
+    ler = reaberto.ler
+    with patch.object(reaberto, "ler", side_effect=lambda *a: (lidos.append(ev) or ev for ev in ler(*a))):
+        assert reaberto.recuperar(salvo) == 3
+    assert [e["seq"] for e in lidos] == [22, 23, 24]
+    assert [s.to_dict() for s in salvo] == [s.to_dict() for s in state]
+    reaberto.desanexar()
+
+# CT14c - Senha errada e registro adulterado
+def test_senha_errada_e_adulteracao(log, tmp_path):
+    log.append("teste", {"a": 1})
+    log.append("teste", {"a": 2})
+    with pytest.raises(ValueError):
+        EventLog.abrir("outra", tmp_path / "events")
+
+    dados = bytearray(log.path.read_bytes())
+    dados[-1] ^= 1
+    log.path.write_bytes(bytes(dados))
+    with pytest.raises(ValueError):
+        list(log.ler())
+
+def _copia(state):
+    return dict_state_to_salas(salas_to_dict_state(state))
+
+def _sessao(base, salvo, vender):
+    """Uma CLI: lê o estado salvo, recupera, vende e sai sem salvar."""
+    state = _copia(salvo)
+    lg = EventLog.abrir("senha", base, fsync=False)
+    recuperados = lg.recuperar(state)
+    lg.anexar()
+    vender(state)
+    lg.desanexar()
+    return recuperados, state
+
+# CT14d - Vendas não salvas de sessões encerradas se somam; depois de salvar não voltam
+def test_recuperar_sessoes_encerradas(tmp_path):
+    base = tmp_path / "events"
+    salvo = initialize_state()
+    add_filme_to_sala(salvo[0], "Estreia", "Ação", 12, "2099-12-31")
+
+    assert _sessao(base, salvo, lambda st: _emitir(st[0], 3))[0] == 0
+    # A segunda CLI assume as 3 vendas da primeira e vende mais 2
+    recuperados, state = _sessao(base, salvo, lambda st: _emitir(st[0], 2))
+    assert recuperados == 3 and state[0].filme.ingressos == 45
+
+    state = _copia(salvo)
+    lg = EventLog.abrir("senha", base, fsync=False)
+    assert lg.recuperar(state) == 5 and state[0].filme.ingressos == 45
+    # Sessão viva não é recuperada por outra
+    assert EventLog.abrir("senha", base, fsync=False).recuperar(_copia(salvo)) == 0
+    lg.marcar_salvo(1)
+    lg.desanexar()
+
+    state = _copia(state)
+    assert EventLog.abrir("senha", base, fsync=False).recuperar(state) == 0
+    assert state[0].filme.ingressos == 45
+
+# CT14e - Ticket de reserva já no estado salvo não desconta de novo; reserva não salva desconta
+def test_recuperar_reservas(tmp_path):
+    base = tmp_path / "events"
+    salvo = initialize_state()
+    add_filme_to_sala(salvo[0], "Estreia", "Ação", 12, "2099-12-31")
+    antiga = criar_reserva(salvo[0], 2)
+
+    def confirmar(st):
+        nova = criar_reserva(st[0], 3)
+        with patch("src.service.load_private_key") as mock_key:
+            mock_key.return_value.sign.return_value = b"sig"
+            confirmar_reserva(st[0], antiga)
+            confirmar_reserva(st[0], nova)
+
+    _, vivo = _sessao(base, salvo, confirmar)
+    state = _copia(salvo)
+    assert EventLog.abrir("senha", base, fsync=False).recuperar(state) == 5
+    assert state[0].filme.ingressos == vivo[0].filme.ingressos == 45
+    assert state[0].reservas == {}
@@ -0,0 +1,71 @@
+import json
+from cryptography.hazmat.primitives.asymmetric import rsa
+from src.arrendamento import CoordenadorInventario
+from src.ids import GeradorIds
+from src.models import Sala
+from src.reconciliacao import reconciliar
+from src.revocation import RevocationList
+from src.service import build_filme, issue_ticket
+from src.used_tickets import UsedTicketStore
+
+def _chave():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+def _gravar(ticket_dir, ticket, nome=None):
+    ticket_dir.mkdir(exist_ok=True)
+    path = ticket_dir / (nome or f"ticket_{ticket['id']}.json")
+    path.write_text(json.dumps(ticket, ensure_ascii=False), encoding="utf-8")
+    return path
+
+def _reconciliar(tmp_path, state, pub, **kw):
+    return reconciliar(
+        state, ticket_dir=tmp_path / "tickets", pub=pub,
+        store=UsedTicketStore(tmp_path / "used"),
+        revocations=RevocationList(tmp_path / "revoked.log"),
+        coordenador=CoordenadorInventario(tmp_path / "inventario"),
+        processos=2, checkpoint=tmp_path / "reconciliacao.ckpt", **kw,
+    )
+
+# CT30 - Adulterados, duplicados, órfãos e venda além da capacidade são relatados
+def test_reconciliacao_divergencias(tmp_path):
+    chave = _chave()
+    sala = Sala(numero=1)
+    sala.adicionar_filme(build_filme("Estreia", "Ação", 12, "2099-12-31"))
+    tickets = [issue_ticket(sala, priv_key=chave) for _ in range(3)]
+    for t in tickets:
+        _gravar(tmp_path / "tickets", t)
+    _gravar(tmp_path / "tickets", tickets[0], nome="ticket_copia.json")
+    adulterado = dict(tickets[1], sala=2)
+    _gravar(tmp_path / "tickets", adulterado, nome="ticket_adulterado.json")
+    orfao = GeradorIds(31).novo_id()
+    UsedTicketStore(tmp_path / "used").mark_used(orfao)
+
+    # Estado "antigo" sobrescrito por outra CLI: o saldo voltou para a capacidade cheia
+    sala.filme.ingressos = 50
+    r = _reconciliar(tmp_path, [sala], chave.public_key())
+    assert r["arquivos"] == 5 and r["verificados"] == 5
+    assert [i["arquivo"] for i in r["invalidos"]] == ["ticket_adulterado.json"]
+    assert r["duplicados"] == [{"id": tickets[0]["id"], "arquivos": sorted([f"ticket_{tickets[0]['id']}.json", "ticket_copia.json"])}]
+    assert r["usados_orfaos"] == [orfao]
+    assert [(s["sala"], s["emitidos"], s["excesso"]) for s in r["excessos"]] == [(1, 3, 3)]
+
+    sala.filme.ingressos = 47
+    r = _reconciliar(tmp_path, [sala], chave.public_key())
+    assert r["excessos"] == [] and r["verificados"] == 0 and r["do_checkpoint"] == 5
+
+# CT30a - Checkpoint só reverifica tickets novos e é descartado se a chave mudar
+def test_reconciliacao_checkpoint(tmp_path):
+    chave = _chave()
+    sala = Sala(numero=1)
+    sala.adicionar_filme(build_filme("Estreia", "Ação", 12, "2099-12-31", ingressos=10))
+    for _ in range(4):
+        _gravar(tmp_path / "tickets", issue_ticket(sala, priv_key=chave))
+    assert _reconciliar(tmp_path, [sala], chave.public_key())["verificados"] == 4
+
+    _gravar(tmp_path / "tickets", issue_ticket(sala, priv_key=chave))
+    r = _reconciliar(tmp_path, [sala], chave.public_key())
+    assert (r["verificados"], r["do_checkpoint"]) == (1, 4) and r["excessos"] == []
+
+    outra = _chave()
+    r = _reconciliar(tmp_path, [sala], outra.public_key())
+    assert r["verificados"] == 5 and len(r["invalidos"]) == 5
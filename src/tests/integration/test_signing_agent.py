@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from src import signing_agent
+from src.crypto_keys import load_private_key, verify_signature
+from src.models import Sala
+from src.service import build_filme, issue_ticket, check_ticket
+from src.signing_agent import AgenteAssinatura, ChaveAgente, conectar_agente
+
+@pytest.fixture
+def agente(tmp_path, chave):
+    """Agente rodando num event loop em thread separada."""
+    sock = tmp_path / "a.sock"
+    pronto, loop_pronto = threading.Event(), {}
+
+    def rodar(**kw):
+        async def principal():
+            ag = AgenteAssinatura(chave, **kw)
+            server = await ag.iniciar(sock)
+            loop_pronto.update(agente=ag, loop=asyncio.get_running_loop())
+            pronto.set()
+            await ag.aguardar()
+            await ag.parar(server)
+        t = threading.Thread(target=asyncio.run, args=(principal(),), daemon=True)
+        t.start()
+        pronto.wait(5)
+        loop_pronto["thread"] = t
+        return sock, loop_pronto["agente"], t
+
+    yield rodar
+    if "agente" in loop_pronto and loop_pronto["thread"].is_alive():
+        try:
+            loop_pronto["loop"].call_soon_threadsafe(loop_pronto["agente"]._encerrado.set)
+        except RuntimeError:
+            pass  # loop já encerrado
+    signing_agent._conexoes.clear()
+
+# CT23 - Socket 0600; issue_ticket assina pelo agente sem senha
+def test_issue_ticket_pelo_agente(agente, chave):
+    sock, ag, _ = agente()
+    assert sock.stat().st_mode & 0o777 == 0o600
+    sala = Sala(numero=1)
+    sala.adicionar_filme(build_filme("Agente", "Ação", 12, "2099-12-31"))
+    with patch.object(signing_agent, "AGENTE_SOCKET", sock), \
+         patch("src.crypto_keys.getpass.getpass", side_effect=AssertionError("não deve pedir senha")):
+        ticket = issue_ticket(sala, priv_key=load_private_key())
+    assert check_ticket(ticket, chave.public_key())["id"] == ticket["id"]
+    assert ag.assinadas == 1
+
+# CT23a - Lote numa única requisição
+def test_lote(agente, chave):
+    sock, ag, _ = agente()
+    cliente = ChaveAgente(sock)
+    payloads = [f"p{i}".encode() for i in range(10)]
+    assinaturas = cliente.assinar_lote(payloads)
+    cliente.fechar()
+    assert all(verify_signature(chave.public_key(), p, s) for p, s in zip(payloads, assinaturas))
+
+# CT23b - Limite por cliente
+def test_limite_por_cliente(agente):
+    sock, ag, _ = agente(taxa=0.001, rajada=3)
+    cliente = ChaveAgente(sock)
+    cliente.assinar_lote([b"a", b"b", b"c"])
+    with pytest.raises(PermissionError, match="Limite"):
+        cliente.sign(b"d")
+    cliente.fechar()
+    assert ag.recusadas == 1
+
+# CT23c - Encerra por inatividade e apaga a chave; sem agente, load_private_key volta ao prompt
+def test_inatividade(agente, tmp_path):
+    sock, ag, t = agente(inatividade=0.2)
+    t.join(5)
+    assert not t.is_alive()
+    assert ag._chave is None
+    assert not sock.exists()
+    assert conectar_agente(sock) is None
+
+# CT23d - Reconectar não renova o balde; balde ocioso é descartado
+def test_limite_sobrevive_reconexao(agente):
+    sock, ag, _ = agente(taxa=0.001, rajada=3)
+    cliente = ChaveAgente(sock)
+    cliente.assinar_lote([b"a", b"b", b"c"])
+    cliente.fechar()
+    cliente = ChaveAgente(sock)
+    with pytest.raises(PermissionError, match="Limite"):
+        cliente.sign(b"d")
+    cliente.fechar()
+    assert ag.recusadas == 1
+    assert len(ag._baldes) == 1
+
+    balde = next(iter(ag._baldes.values()))
+    balde.em -= 3 / 0.001
+    ag._podar_baldes()
+    assert ag._baldes == {}
@@ -1,3 +1,4 @@
+import shutil
 import pytest
 from unittest.mock import MagicMock, patch
 from src import used_tickets
@@ -10,6 +11,7 @@ def clear_used_tickets_file_after():
     yield
     if used_tickets.USED_TICKETS_FILE.exists():
         used_tickets.USED_TICKETS_FILE.write_text("[]", encoding="utf-8")
+    shutil.rmtree(used_tickets.default_store().base_dir, ignore_errors=True)
 
 # CT06b - Ticket já utilizado (integração real com JSON)
 def test_ticket_ja_utilizado_integration():
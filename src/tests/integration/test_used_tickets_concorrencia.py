@@ -0,0 +1,54 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from src.used_tickets import UsedTicketStore
+
+def _verificador(base_dir, ids, seed):
+    """Simula um processo verificador tentando admitir todos os tickets (em ordem própria)."""
+    store = UsedTicketStore(base_dir)
+    ordem = list(ids)
+    random.Random(seed).shuffle(ordem)
+    return [tid for tid in ordem if store.mark_used(tid)]
+
+# CT08 - Store por shards: uso duplicado no mesmo processo
+def test_store_rejeita_segundo_uso(tmp_path):
+    store = UsedTicketStore(tmp_path / "used")
+    assert store.mark_used("abc") is True
+    assert store.mark_used("abc") is False
+    assert store.is_used("abc")
+    assert not store.is_used("xyz")
+
+# CT08a - Outro processo (outra instância) enxerga o uso já registrado
+def test_store_compartilhado_entre_instancias(tmp_path):
+    a = UsedTicketStore(tmp_path / "used")
+    b = UsedTicketStore(tmp_path / "used")
+    assert a.mark_used("t1")
+    assert not b.mark_used("t1")
+    assert b.mark_used("t2")
+    assert a.is_used("t2")
+    assert a.load_all() == {"t1", "t2"}
+
+# CT08b - Arquivo legado used_tickets.json continua valendo
+def test_store_consulta_arquivo_legado(tmp_path):
+    legado = tmp_path / "used_tickets.json"
+    legado.write_text('["antigo"]', encoding="utf-8")
+    store = UsedTicketStore(tmp_path / "used", legacy_file=legado)
+    assert store.is_used("antigo")
+    assert not store.mark_used("antigo")
+
+# CT08c - Estresse multiprocesso: nenhuma dupla admissão e nenhuma escrita perdida
+@pytest.mark.parametrize("processos", [4])
+def test_store_estresse_multiprocesso(tmp_path, processos):
+    base = tmp_path / "used"
+    ids = [f"{i:032x}" for i in range(1500)]
+
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        futs = [pool.submit(_verificador, base, ids, seed) for seed in range(processos)]
+        aceitos = [tid for fut in futs for tid in fut.result()]
+
+    # Cada ticket admitido exatamente uma vez, somando todos os processos
+    assert len(aceitos) == len(ids)
+    assert set(aceitos) == set(ids)
+    # E todos persistidos
+    assert UsedTicketStore(base).load_all() == set(ids)
@@ -0,0 +1,41 @@
+import pytest
+from datetime import date
+from src.used_tickets import UsedTicketStore
+
+# CT24 - IDs usados vão para a partição do dia de emissão
+def test_particao_por_dia(tmp_path):
+    store = UsedTicketStore(tmp_path, poda_automatica=False)
+    assert store.mark_used("t1", "2099-03-01T10:00:00+00:00")
+    assert not store.mark_used("t1", "2099-03-01T22:00:00+00:00")
+    assert store.mark_used("t2", "2099-03-02T10:00:00+00:00")
+    assert store.particoes() == ["2099-03-01", "2099-03-02"]
+    assert store.is_used("t1", "2099-03-01T00:00:00")
+    assert store.is_used("t2")
+    assert not store.is_used("t3")
+    assert store.load_all() == {"t1", "t2"}
+
+# CT24a - Poda arquiva partições vencidas e passa a recusar tickets daquele período
+def test_poda_e_horizonte(tmp_path):
+    store = UsedTicketStore(tmp_path, retencao=10, poda_automatica=False)
+    store.mark_used("velho", "2099-01-01T10:00:00+00:00")
+    store.mark_used("novo", "2099-01-20T10:00:00+00:00")
+
+    assert store.podar(hoje=date(2099, 1, 25)) == ["2099-01-01"]
+    assert store.particoes() == ["2099-01-20"]
+    assert (tmp_path / "arquivo" / "2099-01-01.tar.gz").exists()
+    assert store.horizonte() == "2099-01-15"
+
+    outro = UsedTicketStore(tmp_path, retencao=10, poda_automatica=False)
+    with pytest.raises(ValueError, match="expirado"):
+        outro.mark_used("velho", "2099-01-01T10:00:00+00:00")
+    assert not outro.mark_used("novo", "2099-01-20T11:00:00+00:00")
+    assert not any(p.parent.name == "2099-01-01" for p in store._cache)
+
+# CT24b - Registro anterior às partições (shards na raiz) continua valendo
+def test_historico_sem_data(tmp_path):
+    store = UsedTicketStore(tmp_path, poda_automatica=False)
+    assert store.mark_used("antigo")
+    assert not store.mark_used("antigo", "2099-05-05T10:00:00+00:00")
+    assert store.is_used("antigo", "2099-05-05T10:00:00+00:00")
+    with pytest.raises(ValueError):
+        store.mark_used("x", "ontem")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from unittest.mock import patch
+from src.models import Sala
+from src.service import add_filme_to_sala, issue_ticket
+from src.revocation import RevocationList
+from src.used_tickets import UsedTicketStore
+from src.verification_server import VerificationService
+
+def _tickets(chave, n):
+    sala = Sala(numero=1)
+    add_filme_to_sala(sala, "Estreia", "Ação", 12, "2099-12-31")
+    with patch("src.service.load_private_key", return_value=chave):
+        return [issue_ticket(sala) for _ in range(n)]
+
+async def _cliente(sock, tickets):
+    reader, writer = await asyncio.open_unix_connection(str(sock))
+    respostas = []
+    for t in tickets:
+        writer.write(json.dumps(t).encode() + b"\n")
+        await writer.drain()
+        respostas.append(json.loads(await reader.readline()))
+    writer.close()
+    return respostas
+
+# CT15 - Várias catracas ao mesmo tempo: cada ticket admitido uma única vez
+def test_servidor_varias_catracas(tmp_path, chave):
+    tickets = _tickets(chave, 20)
+    falso = dict(tickets[0], assinatura="00" * 256)
+    sock = tmp_path / "v.sock"
+
+    async def cenario():
+        svc = VerificationService(
+            pub=chave.public_key(),
+            store=UsedTicketStore(tmp_path / "used"),
+            revocations=RevocationList(tmp_path / "revoked.log"),
+            threads=4,
+        )
+        server = await svc.iniciar(sock)
+        try:
+            # 5 catracas lendo todos os tickets (QR lido várias vezes) + um falsificado
+            respostas = await asyncio.gather(*[_cliente(sock, tickets + [falso]) for _ in range(5)])
+            stats = (await _cliente(sock, [{"op": "stats"}]))[0]
+        finally:
+            await svc.parar(server)
+        return respostas, stats
+
+    respostas, stats = asyncio.run(cenario())
+    todas = [r for lista in respostas for r in lista]
+    aceitos = [r["id"] for r in todas if r["ok"]]
+    assert sorted(aceitos) == sorted(t["id"] for t in tickets)
+    assert sum(1 for r in todas if r.get("erro") == "Assinatura inválida.") == 5
+    assert stats["total"] == 105 and stats["aceitos"] == 20
+    assert stats["p50_ms"] is not None and stats["p99_ms"] >= stats["p50_ms"]
+
+# CT15a - Requisição malformada não derruba a conexão
+def test_servidor_json_invalido(tmp_path, chave):
+    sock = tmp_path / "v.sock"
+
+    async def cenario():
+        svc = VerificationService(pub=chave.public_key(), store=UsedTicketStore(tmp_path / "used"),
+                                  revocations=RevocationList(tmp_path / "revoked.log"))
+        server = await svc.iniciar(sock)
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(sock))
+            writer.write(b"{nao e json\n" + json.dumps({"id": "x"}).encode() + b"\n")
+            await writer.drain()
+            r1 = json.loads(await reader.readline())
+            r2 = json.loads(await reader.readline())
+            writer.close()
+        finally:
+            await svc.parar(server)
+        return r1, r2
+
+    r1, r2 = asyncio.run(cenario())
+    assert r1 == {"ok": False, "erro": "JSON inválido."}
+    assert r2["ok"] is False and "campos obrigatórios" in r2["erro"]
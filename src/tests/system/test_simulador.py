@@ -0,0 +1,49 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from src.revocation import RevocationList
+from src.simulador import ConfigSimulacao, simular
+from src.used_tickets import UsedTicketStore
+from src.verification_server import VerificationService
+
+# CT16 - Simulação em processo, vários guichês por sala: sem oversell nem dupla admissão
+def test_simulacao_em_processo():
+    cfg = ConfigSimulacao(compradores=150, taxa=5000, salas=2, capacidade=40, mix=[3, 1],
+                          vendedores=3, catracas=3, releitura=0.3)
+    r = simular(cfg)
+
+    assert r["modo"] == "em_processo"
+    assert r["emissao"]["emitidos"] + r["emissao"]["esgotados"] == 150
+    assert r["emissao"]["por_sala"]["1"] == 40  # sala mais procurada esgota
+    assert r["oversell"] == 0
+    assert r["divergencia_inventario"] == 0
+    assert r["dupla_admissao"] == 0
+    assert r["validacao"]["admitidos"] == r["emissao"]["emitidos"]
+    assert r["validacao"]["apresentacoes"] == r["validacao"]["admitidos"] + r["validacao"]["recusados"]
+    assert r["validacao"]["p99_ms"] >= r["validacao"]["p50_ms"]
+
+# CT16a - Simulação contra o serviço de verificação local
+def test_simulacao_contra_servico(tmp_path):
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    sock = tmp_path / "v.sock"
+    loop = asyncio.new_event_loop()
+    svc = VerificationService(pub=chave.public_key(), store=UsedTicketStore(tmp_path / "used"),
+                              revocations=RevocationList(tmp_path / "revoked.log"))
+    server = loop.run_until_complete(svc.iniciar(sock))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        with patch("src.simulador.load_private_key", return_value=chave):
+            r = simular(ConfigSimulacao(compradores=60, taxa=5000, salas=2, capacidade=100,
+                                        catracas=2, releitura=0.5, servico=str(sock)))
+    finally:
+        asyncio.run_coroutine_threadsafe(svc.parar(server), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+
+    assert r["modo"] == "servico"
+    assert r["validacao"]["admitidos"] == 60
+    assert r["dupla_admissao"] == 0
@@ -0,0 +1,62 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from src import auth, crypto_keys
+from src.auth import Sessao, calibrar_iteracoes, criar_operador, login
+
+@pytest.fixture
+def arq(tmp_path):
+    return tmp_path / "operadores.json"
+
+# CT18 - Calibragem respeita o mínimo e cresce com o tempo-alvo
+def test_calibragem():
+    assert calibrar_iteracoes(0.0001) == auth.MIN_ITERACOES
+    assert calibrar_iteracoes(5.0) > auth.MIN_ITERACOES
+    assert calibrar_iteracoes(5.0) % 1000 == 0
+
+# CT18a - Um login libera a senha do estado e a chave de assinatura; iterações ficam na conta
+def test_login_abre_sessao(arq):
+    chave = MagicMock()
+    with patch("src.auth.carregar_chave_privada", return_value=chave) as carregar:
+        criar_operador("ana", "senha-forte", "bilheteiro", "senha-estado", "senha-chave", iteracoes=1000, path=arq)
+        sessao = login("ana", "senha-forte", path=arq)
+    carregar.assert_called_once_with("senha-chave")
+    assert sessao.senha_estado == "senha-estado"
+    assert sessao.chave_privada is chave
+    assert auth.carregar_operadores(arq)["ana"]["iteracoes"] == 1000
+    assert "senha-estado" not in arq.read_text()
+
+    sessao.ativar()
+    try:
+        assert crypto_keys.load_private_key() is chave
+    finally:
+        sessao.encerrar()
+    assert crypto_keys._chave_sessao is None
+
+# CT18b - Senha errada ou operador inexistente falham igual
+def test_login_invalido(arq):
+    criar_operador("ana", "senha-forte", "porteiro", "senha-estado", iteracoes=1000, path=arq)
+    with pytest.raises(PermissionError):
+        login("ana", "errada!!", path=arq)
+    with pytest.raises(PermissionError):
+        login("bruno", "senha-forte", path=arq)
+
+    # Operador inexistente custa o mesmo que a conta mais cara, não o mínimo
+    criar_operador("caio", "senha-forte", "porteiro", "senha-estado", iteracoes=3000, path=arq)
+    with patch("src.auth.hash_password", wraps=auth.hash_password) as medido:
+        with pytest.raises(PermissionError):
+            login("bruno", "senha-forte", path=arq)
+    assert medido.call_args.args[2] == 3000
+
+# CT18c - Papéis: porteiro só verifica e não recebe a senha da chave
+def test_papeis(arq):
+    with patch("src.auth.carregar_chave_privada") as carregar:
+        criar_operador("porta", "senha-forte", "porteiro", "senha-estado", "senha-chave", iteracoes=1000, path=arq)
+        sessao = login("porta", "senha-forte", path=arq)
+    carregar.assert_not_called()
+    assert sessao.chave_privada is None
+    assert sessao.pode("verificar") and not sessao.pode("emitir")
+    assert Sessao("adm", "admin", "x").pode("operadores")
+    with pytest.raises(ValueError):
+        criar_operador("x", "senha-forte", "gerente", "senha-estado", iteracoes=1000, path=arq)
+    with pytest.raises(ValueError):
+        criar_operador("x", "curta", "admin", "senha-estado", iteracoes=1000, path=arq)
@@ -0,0 +1,57 @@
+from src import eventos
+from src.busca import IndiceBusca, normalizar
+from src.service import initialize_state, add_filme_to_sala, remove_filme_from_sala, filter_salas
+
+def _estado():
+    state = initialize_state()
+    add_filme_to_sala(state[0], "Ação Mortal", "Ação", 14, "2099-12-31")
+    add_filme_to_sala(state[1], "Coração Valente", "Drama", 12, "2099-12-31")
+    add_filme_to_sala(state[2], "Missão Impossível", "Ação", 12, "2099-12-31")
+    add_filme_to_sala(state[3], "A Origem", "Ficção", 12, "2099-12-31")
+    return state
+
+# CT25 - Normalização remove acentos, caixa e pontuação
+def test_normalizar():
+    assert normalizar("  Ação: O Filme! ") == "acao o filme"
+    assert normalizar("CORAÇÃO") == "coracao"
+
+# CT25a - Busca sem acento, com ranking (nome pesa mais que gênero)
+def test_busca_ranking():
+    indice = IndiceBusca.from_state(_estado())
+    resultado = [s.filme.nome for s, _ in indice.buscar("acao")]
+    assert resultado[0] == "Ação Mortal"
+    assert "Missão Impossível" in resultado
+    assert [s.filme.nome for s, _ in indice.buscar("cora")] == ["Coração Valente"]
+    # Erro de digitação casa por trigramas
+    assert indice.buscar("impossivle")[0][0].filme.nome == "Missão Impossível"
+    # Quem casa todos os termos vem primeiro
+    assert indice.buscar("missao acao")[0][0].filme.nome == "Missão Impossível"
+    assert indice.buscar("zzz") == []
+
+# CT25b - Índice acompanha filmes adicionados e removidos via eventos
+def test_busca_incremental():
+    state = _estado()
+    indice = IndiceBusca.from_state(state)
+    eventos.registrar_ouvinte(indice.ouvinte)
+    try:
+        remove_filme_from_sala(state[0])
+        add_filme_to_sala(state[4], "Ação Final", "Ação", 16, "2099-12-31")
+    finally:
+        eventos.remover_ouvinte(indice.ouvinte)
+    nomes = [s.filme.nome for s, _ in indice.buscar("acao")]
+    assert "Ação Mortal" not in nomes and nomes[0] == "Ação Final"
+    assert "mortal" not in indice._postings and "mortal" not in indice._vocab
+
+# CT25c - Filtro por nome também ignora acentos
+def test_filtro_sem_acento():
+    assert [s.numero for s in filter_salas(_estado(), nome_parcial="coracao")] == [2]
+
+# CT25d - Construção em lote: vocabulário ordenado igual ao da indexação um a um
+def test_busca_construcao_em_lote():
+    state = _estado()
+    incremental = IndiceBusca()
+    for sala in state:
+        incremental.adicionar(sala)
+    lote = IndiceBusca.from_state(state)
+    assert lote._vocab == sorted(lote._vocab) == incremental._vocab
+    assert lote._postings == incremental._postings
@@ -0,0 +1,34 @@
+import pytest
+from src.models import Sala, Filme
+from src.service import add_filme_to_sala
+from src.catalogo_colunar import CatalogoColunar
+
+# CT11 - Modelos compactos: sem __dict__ e gênero internado
+def test_modelos_sem_dict_e_genero_internado():
+    a = Filme("A", "".join(["Dra", "ma"]), 12, 50, "2099-12-31")
+    b = Filme("B", "".join(["Dr", "ama"]), 14, 50, "2099-12-31")
+    assert not hasattr(a, "__dict__")
+    assert not hasattr(Sala(numero=1), "__dict__")
+    assert a.genero is b.genero
+
+# CT11a - to_dict/from_dict preservam os dados
+def test_filme_to_dict_roundtrip():
+    f = Filme("A", "Drama", 12, 50, "2099-12-31")
+    d = f.to_dict()
+    assert d == {"nome": "A", "genero": "Drama", "idade_minima": 12, "ingressos": 50, "data_saida": "2099-12-31"}
+    assert Filme.from_dict(d) == f
+
+# CT11b - Catálogo colunar ida e volta
+def test_catalogo_colunar_roundtrip():
+    salas = [Sala(numero=i + 1) for i in range(3)]
+    add_filme_to_sala(salas[0], "Aventura", "Ação", 12, "2099-12-31")
+    add_filme_to_sala(salas[2], "Outro", "Ação", 10, "2099-01-15")
+
+    cat = CatalogoColunar.from_salas(salas)
+    assert len(cat) == 2
+    assert cat.generos == ["Ação"]
+    assert [s.to_dict() for s in cat.to_salas()] == [salas[0].to_dict(), salas[2].to_dict()]
+    assert list(cat.iter_dicts())[1]["filme"]["nome"] == "Outro"
+    assert cat.posicoes_por_data(data_ate="2099-06-30") == [1]
+    assert cat.posicao_da_sala(3) == 1
+    assert cat.posicao_da_sala(2) is None
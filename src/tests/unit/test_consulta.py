@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import patch
+from cryptography.hazmat.primitives.asymmetric import rsa
+from src.crypto_keys import verify_signature
+from src.models import Sala
+from src.peek import cache_verificacao
+from src.revocation import RevocationList
+from src.service import build_filme, issue_ticket, peek_ticket, verify_ticket_payload, revoke_ticket
+from src.used_tickets import UsedTicketStore
+
+@pytest.fixture
+def ambiente(tmp_path, chave):
+    sala = Sala(numero=1)
+    sala.adicionar_filme(build_filme("Consulta", "Ação", 12, "2099-12-31"))
+    cache_verificacao.limpar()
+    return sala, UsedTicketStore(tmp_path / "used"), RevocationList(tmp_path / "rev.log")
+
+# CT20 - Consultas repetidas não consomem o ticket e só a primeira usa RSA
+def test_peek_nao_consome(ambiente, chave):
+    sala, store, rev = ambiente
+    ticket = issue_ticket(sala, priv_key=chave)
+    pub = chave.public_key()
+    with patch("src.service.verify_signature", wraps=verify_signature) as verificar:
+        for _ in range(3):
+            r = peek_ticket(ticket, store, rev, pub)
+            assert r["valido"] and not r["usado"] and not r["cancelado"]
+    assert verificar.call_count == 1
+    assert not store.is_used(ticket["id"])
+    assert "assinatura" in ticket
+
+# CT20a - Uso e revogação invalidam o cache e aparecem na consulta
+def test_peek_invalidado(ambiente, chave):
+    sala, store, rev = ambiente
+    pub = chave.public_key()
+    usado = issue_ticket(sala, priv_key=chave)
+    peek_ticket(usado, store, rev, pub)
+    verify_ticket_payload(dict(usado), store=store, revocations=rev, pub=pub)
+    assert usado["id"] not in {k[0] for k in cache_verificacao._itens}
+    assert peek_ticket(usado, store, rev, pub)["usado"]
+
+    cancelado = issue_ticket(sala, priv_key=chave)
+    peek_ticket(cancelado, store, rev, pub)
+    with patch("src.service.load_public_key", return_value=pub):
+        revoke_ticket([sala], cancelado, store=store, revocations=rev)
+    assert cancelado["id"] not in {k[0] for k in cache_verificacao._itens}
+    assert peek_ticket(cancelado, store, rev, pub)["cancelado"]
+
+# CT20b - Ticket adulterado com mesmo ID e assinatura não aproveita o cache
+def test_peek_adulterado(ambiente, chave):
+    sala, store, rev = ambiente
+    pub = chave.public_key()
+    ticket = issue_ticket(sala, priv_key=chave)
+    assert peek_ticket(ticket, store, rev, pub)["valido"]
+    r = peek_ticket(dict(ticket, sala=2), store, rev, pub)
+    assert not r["valido"] and r["erro"] == "Assinatura inválida."
+    assert not peek_ticket("lixo", store, rev, pub)["valido"]
+
+# CT20c - Verificação pela CLI passa pelo mesmo commit: registra o uso e invalida o cache
+def test_verificar_cli_invalida_cache(ambiente, chave):
+    from src import cli
+    sala, store, rev = ambiente
+    pub = chave.public_key()
+    ticket = issue_ticket(sala, priv_key=chave)
+    peek_ticket(ticket, store, rev, pub)
+    with patch("src.cli.ler_ticket_interativo", return_value=dict(ticket)), \
+         patch("src.cli.default_store", return_value=store), \
+         patch("src.service.default_revocations", return_value=rev), \
+         patch("src.service.load_public_key", return_value=pub):
+        cli.verificar_ticket([sala])
+    assert store.is_used(ticket["id"])
+    assert ticket["id"] not in {k[0] for k in cache_verificacao._itens}
+
+# CT20d - Veredito em cache vale só para a chave pública com que foi dado
+def test_peek_outra_chave(ambiente, chave):
+    sala, store, rev = ambiente
+    ticket = issue_ticket(sala, priv_key=chave)
+    assert peek_ticket(ticket, store, rev, chave.public_key())["valido"]
+    rotacionada = rsa.generate_private_key(public_exponent=65537, key_size=2048).public_key()
+    r = peek_ticket(ticket, store, rev, rotacionada)
+    assert not r["valido"] and r["erro"] == "Assinatura inválida."
+    assert peek_ticket(ticket, store, rev, chave.public_key())["valido"]
@@ -0,0 +1,69 @@
+import threading
+from datetime import date
+import pytest
+from src import eventos
+from src.service import initialize_state, add_filme_to_sala, remove_filme_from_sala
+from src.expiry import VarredorExpiracao, varrer_estado, iniciar_varredura_periodica
+
+def _estado():
+    state = initialize_state()
+    add_filme_to_sala(state[0], "Vence Cedo", "Ação", 12, "2099-01-10")
+    add_filme_to_sala(state[1], "Vence Depois", "Drama", 12, "2099-03-10")
+    add_filme_to_sala(state[2], "Fica", "Drama", 12, "2099-12-31")
+    return state
+
+# CT13 - Varredura remove só os filmes vencidos e relata
+def test_varrer_remove_expirados():
+    state = _estado()
+    v = VarredorExpiracao.from_state(state)
+    assert v.varrer(date(2099, 1, 10)) == []  # ainda no último dia
+
+    removidos = v.varrer(date(2099, 2, 1))
+    assert removidos == [{"sala": 1, "filme": "Vence Cedo", "data_saida": "2099-01-10"}]
+    assert state[0].filme is None
+    assert state[1].filme is not None
+    assert len(v) == 2
+
+# CT13a - Filme substituído não é removido pela entrada antiga
+def test_varrer_ignora_filme_substituido():
+    state = _estado()
+    v = VarredorExpiracao.from_state(state)
+    eventos.registrar_ouvinte(v.ouvinte)
+    try:
+        add_filme_to_sala(state[0], "Substituto", "Ação", 12, "2099-12-31")
+        remove_filme_from_sala(state[1])
+        assert v.varrer(date(2099, 6, 1)) == []
+        assert state[0].filme.nome == "Substituto"
+
+        # O substituto foi agendado pelo evento e vence na data dele
+        nomes = {r["filme"] for r in v.varrer(date(2100, 1, 1))}
+        assert nomes == {"Substituto", "Fica"}
+    finally:
+        eventos.remover_ouvinte(v.ouvinte)
+
+# CT13b - Comando avulso
+def test_varrer_estado():
+    state = _estado()
+    removidos = varrer_estado(state, date(2099, 4, 1))
+    assert [r["sala"] for r in removidos] == [1, 2]
+
+# CT13c - Varredura periódica em thread
+def test_varredura_periodica():
+    state = initialize_state()
+    add_filme_to_sala(state[0], "Antigo", "Ação", 12, "2099-12-31")
+    state[0].filme.data_saida = "2000-01-01"
+    v = VarredorExpiracao.from_state(state)
+
+    feito = threading.Event()
+    relatados = []
+    def ao_remover(removidos):
+        relatados.extend(removidos)
+        feito.set()
+
+    parar = iniciar_varredura_periodica(v, threading.Lock(), intervalo=0.01, ao_remover=ao_remover)
+    try:
+        assert feito.wait(2)
+    finally:
+        parar.set()
+    assert relatados[0]["filme"] == "Antigo"
+    assert state[0].filme is None
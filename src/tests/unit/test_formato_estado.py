@@ -0,0 +1,79 @@
+import json
+import pytest
+from src import storage
+from src.storage import MAGIC, encrypt_state, decrypt_state, iterar_estado, ler_estado_versionado
+
+SENHA = "teste123"
+
+def _estado(n):
+    return {"salas": [
+        {"numero": i, "filme": {"nome": f"Filme {i}", "genero": "Ação", "idade_minima": 12,
+                                "ingressos": 50, "data_saida": "2099-12-31"}}
+        for i in range(1, n + 1)
+    ]}
+
+@pytest.fixture
+def blocos_pequenos(monkeypatch):
+    # Força vários blocos mesmo com estados pequenos
+    monkeypatch.setattr(storage, "TAMANHO_BLOCO", 64)
+
+# CT22 - Formato binário comprimido, em vários blocos, faz ida e volta
+def test_roundtrip_em_blocos(tmp_path, blocos_pequenos):
+    path = tmp_path / "state.enc"
+    estado = _estado(200)
+    encrypt_state(estado, SENHA, path)
+    dados = path.read_bytes()
+    assert dados.startswith(MAGIC)
+    assert b"Filme" not in dados
+    assert len(dados) < len(json.dumps(estado)) / 2
+    assert decrypt_state(SENHA, path) == estado
+    assert decrypt_state("errada", path) is None
+
+# CT22a - Leitura em fluxo entrega uma sala por vez
+def test_iterar_estado(tmp_path, blocos_pequenos):
+    path = tmp_path / "state.enc"
+    encrypt_state(_estado(30), SENHA, path)
+    itens = iterar_estado(SENHA, path)
+    assert next(itens) == {}
+    assert next(itens)["numero"] == 1
+    assert sum(1 for _ in itens) == 29
+
+# CT22b - Blocos trocados, cortados ou versão adulterada são detectados
+def test_adulteracao(tmp_path, blocos_pequenos):
+    path = tmp_path / "state.enc"
+    encrypt_state(_estado(100), SENHA, path)
+    original = path.read_bytes()
+    inicio = len(MAGIC) + storage._CABECALHO.size
+
+    def blocos(dados):
+        pos, out = inicio, []
+        while pos < len(dados):
+            n = storage._TAMANHO.unpack(dados[pos:pos + 4])[0]
+            out.append(dados[pos:pos + 4 + n])
+            pos += 4 + n
+        return out
+
+    b = blocos(original)
+    assert len(b) > 3
+    path.write_bytes(original[:inicio] + b[1] + b[0] + b"".join(b[2:]))
+    assert decrypt_state(SENHA, path) is None
+    path.write_bytes(original[:inicio] + b"".join(b[:-1]))
+    assert decrypt_state(SENHA, path) is None
+    versao = bytearray(original)
+    versao[len(MAGIC) + 7] ^= 1
+    path.write_bytes(bytes(versao))
+    assert decrypt_state(SENHA, path) is None
+
+# CT22c - Arquivo no formato JSON antigo continua legível e é regravado em binário
+def test_formato_antigo(tmp_path):
+    import base64, os
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    path = tmp_path / "state.enc"
+    salt, nonce = os.urandom(16), os.urandom(12)
+    ct = AESGCM(storage.derive_key(SENHA, salt)).encrypt(nonce, json.dumps(_estado(2)).encode(), None)
+    path.write_text(json.dumps({k: base64.b64encode(v).decode() for k, v in
+                                {"salt": salt, "nonce": nonce, "ciphertext": ct}.items()}))
+    assert ler_estado_versionado(SENHA, path) == (_estado(2), 0)
+    encrypt_state(_estado(2), SENHA, path)
+    assert path.read_bytes().startswith(MAGIC)
+    assert ler_estado_versionado(SENHA, path) == (_estado(2), 1)
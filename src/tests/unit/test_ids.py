@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from src import ids
+from src.backends import JsonBackend
+from src.used_tickets import UsedTicketStore
+
+# CT27 - IDs de um nó: únicos, estritamente crescentes e com 13 caracteres
+def test_gerador_monotonico():
+    g = ids.GeradorIds(7)
+    gerados = [g.novo_id() for _ in range(20_000)]
+    assert len(set(gerados)) == len(gerados)
+    assert gerados == sorted(gerados)
+    assert all(len(i) == ids.TAMANHO_TEXTO for i in gerados)
+    assert [ids.decodificar(i) for i in gerados] == sorted(ids.decodificar(i) for i in gerados)
+    _, no, _ = ids.decompor(gerados[-1])
+    assert no == 7
+
+# CT27a - Relógio voltando para trás não repete nem inverte IDs
+def test_relogio_para_tras():
+    g = ids.GeradorIds(1)
+    with patch.object(g, "_agora_ms", return_value=10_000):
+        a = g.novo_id()
+    with patch.object(g, "_agora_ms", return_value=5_000):
+        b = g.novo_id()
+    assert b > a
+    assert ids.instante(b) == ids.instante(a)
+
+# CT27b - Processos no mesmo host reservam nós diferentes; nós diferentes não colidem
+def test_nos_distintos(tmp_path):
+    (tmp_path / "host").write_text("3")
+    no1, f1 = ids.reservar_no(tmp_path)
+    no2, f2 = ids.reservar_no(tmp_path)
+    try:
+        assert no1 != no2 and no1 >> ids.BITS_PROCESSO == no2 >> ids.BITS_PROCESSO == 3
+        g1, g2 = ids.GeradorIds(no1), ids.GeradorIds(no2)
+        with patch.object(g1, "_agora_ms", return_value=1), patch.object(g2, "_agora_ms", return_value=1):
+            assert not {g1.novo_id() for _ in range(100)} & {g2.novo_id() for _ in range(100)}
+    finally:
+        f1.close()
+        f2.close()
+    with pytest.raises(ValueError):
+        ids.decodificar("0a968xcyr0m00")
+
+# CT27c - Registro de usados e arquivo de tickets aproveitam a ordem dos IDs
+def test_ordem_aproveitada(tmp_path):
+    store = UsedTicketStore(tmp_path / "used")
+    ticket_id = ids.novo_id()
+    assert store.mark_used(ticket_id)
+    dia = ids.instante(ticket_id).date().isoformat()
+    assert store.particoes() == [dia]
+    assert store.is_used(ticket_id)
+
+    backend = JsonBackend("x", ticket_dir=tmp_path / "tickets", used_store=store)
+    g = ids.GeradorIds(2)
+    base = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    emitidos = []
+    for h in range(5):
+        with patch.object(g, "_agora_ms", return_value=(base + timedelta(hours=h) - ids.EPOCA) // timedelta(milliseconds=1)):
+            t = {"id": g.novo_id(), "sala": 1}
+        backend.save_ticket(t)
+        emitidos.append(t["id"])
+    backend.save_ticket({"id": "a" * 32, "sala": 1})
+    janela = [t["id"] for t in backend.listar_tickets(base + timedelta(hours=1), base + timedelta(hours=3))]
+    assert janela == emitidos[1:3]
+    assert len(list(backend.listar_tickets())) == 6
@@ -81,3 +81,19 @@ def test_emitir_ticket_ultimo_ingresso():
         # Próxima emissão deve falhar
         with pytest.raises(ValueError):
             issue_ticket(sala)
+
+# CT03e - Assinatura recusada (limite do agente) ou chave indisponível não consome o ingresso
+def test_emitir_ticket_assinatura_recusada():
+    sala = Sala(numero=1)
+    add_filme_to_sala(sala, "Filme Teste", "Ação", 12, "2025-12-31")
+    recusa = MagicMock()
+    recusa.sign.side_effect = PermissionError("Limite de assinaturas excedido.")
+
+    with pytest.raises(PermissionError, match="Limite"):
+        issue_ticket(sala, priv_key=recusa)
+    assert sala.filme.ingressos == 50
+
+    with patch("src.service.load_private_key", return_value=None):
+        with pytest.raises(PermissionError):
+            issue_ticket(sala)
+    assert sala.filme.ingressos == 50
@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import patch
+from src import merkle
+from src.crypto_keys import sign_payload, verify_signature
+from src.models import Sala
+from src.service import build_filme, issue_tickets_lote, issue_ticket, check_ticket
+
+@pytest.fixture
+def sala():
+    s = Sala(numero=1)
+    s.adicionar_filme(build_filme("Lote", "Ação", 12, "2099-12-31"))
+    merkle.cache_raizes.limpar()
+    return s
+
+# CT19 - Árvore com número ímpar de folhas: toda prova reconstrói a raiz
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13])
+def test_provas_reconstroem_raiz(n):
+    folhas = [merkle.hash_folha(str(i).encode()) for i in range(n)]
+    raiz, provas = merkle.construir(folhas)
+    for folha, prova in zip(folhas, provas):
+        assert merkle.raiz_da_prova(folha, prova) == raiz
+
+# CT19a - Lote assina uma vez e o verificador confere a raiz uma vez
+def test_lote_uma_assinatura(sala, chave):
+    with patch("src.service.sign_payload", wraps=sign_payload) as assinar:
+        tickets = issue_tickets_lote(sala, 5, priv_key=chave)
+    assert assinar.call_count == 1
+    assert sala.filme.ingressos == 45
+    assert len({t["assinatura"] for t in tickets}) == 1
+
+    pub = chave.public_key()
+    with patch("src.service.verify_signature", wraps=verify_signature) as verificar:
+        for t in tickets:
+            assert check_ticket(t, pub)["id"] == t["id"]
+    assert verificar.call_count == 1
+    assert merkle.cache_raizes.acertos == 4
+
+# CT19b - Ticket adulterado ou com prova trocada é recusado; avulso continua aceito
+def test_lote_adulterado(sala, chave):
+    tickets = issue_tickets_lote(sala, 3, priv_key=chave)
+    pub = chave.public_key()
+    falso = dict(tickets[0], filme="Outro")
+    with pytest.raises(ValueError):
+        check_ticket(falso, pub)
+    trocado = dict(tickets[0], lote=tickets[1]["lote"])
+    with pytest.raises(ValueError):
+        check_ticket(trocado, pub)
+    raiz_falsa = dict(tickets[2], assinatura="00" * 256)
+    with pytest.raises(ValueError):
+        check_ticket(raiz_falsa, pub)
+
+    avulso = issue_ticket(sala, priv_key=chave)
+    assert check_ticket(avulso, pub)["id"] == avulso["id"]
+
+# CT19c - Sem ingressos suficientes nada é descontado
+def test_lote_esgotado(sala, chave):
+    sala.filme.ingressos = 2
+    with pytest.raises(ValueError):
+        issue_tickets_lote(sala, 3, priv_key=chave)
+    assert sala.filme.ingressos == 2
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.models import Sala
+from src.service import add_filme_to_sala
+from src.utils import salas_to_dict_state, dict_state_to_salas
+from src.holds import AgendaReservas, criar_reserva, confirmar_reserva, cancelar_reserva
+
+@pytest.fixture
+def sala():
+    s = Sala(numero=1)
+    add_filme_to_sala(s, "Filme Reserva", "Ação", 12, "2099-12-31")
+    return s
+
+# CT09 - Reserva reduz a disponibilidade
+def test_reserva_reduz_disponibilidade(sala):
+    agenda = AgendaReservas()
+    rid = criar_reserva(sala, 3, ttl=60, agenda=agenda, agora=1000)
+    assert sala.filme.ingressos == 47
+    assert sala.reservas[rid]["quantidade"] == 3
+    assert agenda.proxima_expiracao() == 1060
+
+# CT09a - Reserva maior que o disponível
+def test_reserva_insuficiente(sala):
+    sala.filme.ingressos = 2
+    with pytest.raises(ValueError):
+        criar_reserva(sala, 3)
+    assert sala.filme.ingressos == 2
+
+# CT09b - Expiração devolve os ingressos; só as vencidas saem do heap
+def test_reserva_expira(sala):
+    agenda = AgendaReservas()
+    r1 = criar_reserva(sala, 2, ttl=10, agenda=agenda, agora=0)
+    r2 = criar_reserva(sala, 1, ttl=100, agenda=agenda, agora=0)
+    assert agenda.liberar_expiradas(agora=5) == []
+
+    liberadas = agenda.liberar_expiradas(agora=50)
+    assert [r["id"] for r in liberadas] == [r1]
+    assert sala.filme.ingressos == 49
+    assert r2 in sala.reservas
+    assert len(agenda) == 1
+
+# CT09c - Confirmar emite tickets sem descontar de novo
+def test_confirmar_reserva(sala):
+    agenda = AgendaReservas()
+    rid = criar_reserva(sala, 2, ttl=60, agenda=agenda)
+    with patch("src.service.load_private_key") as mock_key:
+        fake_key = MagicMock()
+        fake_key.sign.return_value = b"sig"
+        mock_key.return_value = fake_key
+        tickets = confirmar_reserva(sala, rid)
+
+    assert len(tickets) == 2
+    assert sala.filme.ingressos == 48
+    assert rid not in sala.reservas
+    # A entrada velha no heap é ignorada quando vence
+    assert agenda.liberar_expiradas(agora=float("inf")) == []
+    assert sala.filme.ingressos == 48
+
+# CT09d - Confirmar reserva vencida falha e devolve ingressos
+def test_confirmar_reserva_expirada(sala):
+    rid = criar_reserva(sala, 2, ttl=10, agora=0)
+    with pytest.raises(ValueError):
+        confirmar_reserva(sala, rid, agora=20)
+    assert sala.filme.ingressos == 50
+
+# CT09e - Cancelar devolve ingressos
+def test_cancelar_reserva(sala):
+    rid = criar_reserva(sala, 4)
+    cancelar_reserva(sala, rid)
+    assert sala.filme.ingressos == 50
+    with pytest.raises(ValueError):
+        cancelar_reserva(sala, rid)
+
+# CT09f - Reservas sobrevivem a salvar/carregar o estado
+def test_reserva_persiste_no_estado(sala):
+    rid = criar_reserva(sala, 5, ttl=30, agora=100)
+    restaurado = dict_state_to_salas(salas_to_dict_state([sala]))
+    assert restaurado[0].reservas[rid] == {"quantidade": 5, "expira_em": 130}
+    assert restaurado[0].filme.ingressos == 45
+
+    agenda = AgendaReservas.from_state(restaurado)
+    agenda.liberar_expiradas(agora=200)
+    assert restaurado[0].filme.ingressos == 50
+    assert restaurado[0].reservas == {}
@@ -0,0 +1,113 @@
+import pytest
+import threading
+from datetime import date
+from unittest.mock import MagicMock, patch
+from src.models import Sala
+from src.service import add_filme_to_sala, issue_ticket, peek_ticket, verify_ticket_payload, revoke_ticket
+from src.revocation import RevocationList
+from src.used_tickets import UsedTicketStore
+
+@pytest.fixture
+def ambiente(tmp_path):
+    sala = Sala(numero=1)
+    add_filme_to_sala(sala, "Filme Revogado", "Ação", 12, "2099-12-31")
+    store = UsedTicketStore(tmp_path / "used")
+    revogados = RevocationList(tmp_path / "revoked.log")
+    with patch("src.service.load_private_key") as mock_key, \
+         patch("src.service.load_public_key") as mock_pub:
+        fake_key = MagicMock()
+        fake_key.sign.return_value = b"sig"
+        mock_key.return_value = fake_key
+        mock_pub.return_value = MagicMock()
+        yield sala, store, revogados
+
+# CT10 - Lista de revogações: consulta, versão e deltas
+def test_lista_revogacoes_delta(tmp_path):
+    central = RevocationList(tmp_path / "revoked.log")
+    assert central.revoke("a") == 1
+    assert central.revoke("b") == 2
+    with pytest.raises(ValueError):
+        central.revoke("a")
+
+    catraca = RevocationList()
+    catraca.apply_delta(central.delta_since(0))
+    assert catraca.is_revoked("b") and catraca.seq == 2
+
+    central.revoke("c")
+    delta = central.delta_since(catraca.seq)
+    assert delta == {"desde": 2, "ate": 3, "ids": ["c"]}
+    catraca.apply_delta(delta)
+    catraca.apply_delta(delta)  # repetido: ignorado
+    assert catraca.seq == 3 and catraca.is_revoked("c")
+
+# CT10a - Outro processo enxerga revogações gravadas no log
+def test_lista_revogacoes_compartilhada(tmp_path):
+    a = RevocationList(tmp_path / "revoked.log")
+    b = RevocationList(tmp_path / "revoked.log")
+    a.revoke("x")
+    assert b.is_revoked("x")
+    assert b.revoke("y") == 2
+    assert a.delta_since(1)["ids"] == ["y"]
+
+# CT10b - Cancelamento devolve o ingresso e a verificação recusa o ticket
+def test_cancelar_ticket_devolve_ingresso(ambiente):
+    sala, store, revogados = ambiente
+    ticket = issue_ticket(sala)
+    assert sala.filme.ingressos == 49
+
+    assert revoke_ticket([sala], ticket, store=store, revocations=revogados) == 1
+    assert sala.filme.ingressos == 50
+
+    with pytest.raises(ValueError, match="cancelado"):
+        verify_ticket_payload(dict(ticket), store=store, revocations=revogados)
+
+# CT10c - Ticket já utilizado não pode ser cancelado
+def test_cancelar_ticket_usado(ambiente):
+    sala, store, revogados = ambiente
+    ticket = issue_ticket(sala)
+    assert verify_ticket_payload(dict(ticket), store=store, revocations=revogados)
+
+    with pytest.raises(ValueError, match="utilizado"):
+        revoke_ticket([sala], ticket, store=store, revocations=revogados)
+    assert sala.filme.ingressos == 49
+
+# CT10d - Ticket usado de um dia já podado não pode ser cancelado nem aparece como não utilizado
+def test_cancelar_ticket_usado_podado(ambiente):
+    sala, store, revogados = ambiente
+    ticket = issue_ticket(sala)
+    assert verify_ticket_payload(dict(ticket), store=store, revocations=revogados)
+    store.podar(hoje=date(2099, 1, 1))
+
+    with pytest.raises(ValueError, match="expirado"):
+        revoke_ticket([sala], ticket, store=store, revocations=revogados)
+    assert sala.filme.ingressos == 49 and not revogados.is_revoked(ticket["id"])
+    consulta = peek_ticket(dict(ticket), store=store, revocations=revogados)
+    assert not consulta["valido"] and "expirado" in consulta["erro"]
+
+# CT10e - Verificação e cancelamento simultâneos: exatamente um dos dois vence
+def test_usar_e_cancelar_concorrentes(ambiente):
+    sala, store, revogados = ambiente
+    for _ in range(20):
+        ticket = issue_ticket(sala)
+        barreira = threading.Barrier(2)
+        resultado = {}
+
+        def tentar(nome, fn):
+            barreira.wait()
+            try:
+                fn()
+                resultado[nome] = True
+            except ValueError:
+                resultado[nome] = False
+
+        threads = [
+            threading.Thread(target=tentar, args=("usou", lambda: verify_ticket_payload(dict(ticket), store=store, revocations=revogados))),
+            threading.Thread(target=tentar, args=("cancelou", lambda: revoke_ticket([sala], ticket, store=store, revocations=revogados))),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert resultado["usou"] != resultado["cancelou"]
+        assert store.is_used(ticket["id"]) == resultado["usou"]
+        assert revogados.is_revoked(ticket["id"]) == resultado["cancelou"]